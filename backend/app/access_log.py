@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from urllib.parse import parse_qsl, urlencode
+
+ACCESS_LOG_ENABLED = os.getenv("ACCESS_LOG_ENABLED", "true").lower() == "true"
+# Fraction of successful requests that are logged; server errors are always logged
+ACCESS_LOG_SAMPLE_RATE = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", 1.0))
+# Records waiting to be written; further records are dropped instead of blocking requests
+ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", 10000))
+# Query parameters whose values are never written to the log
+ACCESS_LOG_REDACT_PARAMS = {
+    name.strip().lower()
+    for name in os.getenv("ACCESS_LOG_REDACT_PARAMS", "token,access_token,password").split(",")
+    if name.strip()
+}
+
+REDACTED = "[redacted]"
+
+logger = logging.getLogger("backend.access")
+logger.propagate = False
+
+class JsonFormatter(logging.Formatter):
+    """Formats access records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        timestamp = datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds")
+        return json.dumps({"time": timestamp, **record.access})
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records when the queue is full instead of blocking."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class AccessLog:
+    """
+    Writes the access log from a background thread.
+
+    Requests only put a record on a bounded queue; formatting and writing to stdout
+    happen on the listener thread, so a slow log sink never delays a response.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue(maxsize=ACCESS_LOG_QUEUE_SIZE)
+        self.handler = DroppingQueueHandler(self._queue)
+        self._listener = None
+        logger.addHandler(self.handler)
+        logger.setLevel(logging.INFO)
+
+    def start(self):
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter())
+        self._listener = QueueListener(self._queue, stream_handler)
+        self._listener.start()
+
+    def stop(self):
+        """Write the queued records and stop the listener thread."""
+        if self._listener:
+            self._listener.stop()
+            self._listener = None
+
+access_log = AccessLog()
+
+def _redact_query(query_string: bytes) -> str:
+    if not query_string:
+        return ""
+    params = parse_qsl(query_string.decode("latin-1"), keep_blank_values=True)
+    return urlencode([
+        (name, REDACTED if name.lower() in ACCESS_LOG_REDACT_PARAMS else value)
+        for name, value in params
+    ], safe="[]")
+
+class AccessLogMiddleware:
+    """
+    Pure ASGI middleware logging one structured line per HTTP request.
+
+    Only the response start and body messages are inspected on their way out; request
+    and response bodies are never read or buffered. The route is logged as its template
+    (/api/recipes/{recipe_id}), so lines can be grouped per endpoint.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ACCESS_LOG_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        response = {"status": 500, "bytes": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            status = response["status"]
+            if status >= 500 or random.random() < ACCESS_LOG_SAMPLE_RATE:
+                route = scope.get("route")
+                logger.info("access", extra={"access": {
+                    "method": scope["method"],
+                    "route": getattr(route, "path", None),
+                    "path": scope["path"],
+                    "query": _redact_query(scope.get("query_string", b"")),
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                    "bytes": response["bytes"],
+                }})
@@ -4,26 +4,26 @@ from datetime import timedelta, datetime
 
 from pathlib import Path
 from dotenv import load_dotenv
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from jose import jwt
-from passlib.context import CryptContext
+from sqlalchemy import or_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 dotenv_path = Path("c:/Users/Anja/recipe_app/backend/.env")
 load_dotenv(dotenv_path=dotenv_path)
 
-from backend.app.models import User, Ingredient, IngredientTranslation
+from backend.app.models import User
 from backend.app.db import get_db
-from backend.app.schemas import UserCreate, UserResponseWithToken, UserLogin
-from backend.app.utils import load_predefined_ingredients
+from backend.app.schemas import TokenData, UserCreate, UserResponseWithToken, UserLogin
+from backend.app.services.passwords import hash_password, verify_password
+from backend.app.utils import forget_token_version, get_current_user
 
 router = APIRouter()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("ALGORITHM")
-INGREDIENTS_FILE_PATH = os.getenv("INGREDIENTS_FILE_PATH")
 
 if not SECRET_KEY:
     raise ValueError("SECRET_KEY is not set. Check your .env file.")
@@ -31,17 +31,6 @@ if not SECRET_KEY:
 if not ALGORITHM:
     raise ValueError("ALGORITHM is not set. Check your .env file.")
 
-if not INGREDIENTS_FILE_PATH:
-    raise ValueError("INGREDIENTS_FILE_PATH is not set. Check your .env file.")
-
-def get_password_hash(password: str) -> str:
-    """Hash a password using passlib's CryptContext."""
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password using passlib's CryptContext."""
-    return pwd_context.verify(plain_password, hashed_password)
-
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     """Create a JWT access token."""
     to_encode = data.copy()
@@ -49,56 +38,59 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
         to_encode.update({"exp": datetime.utcnow() + expires_delta})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
+def token_claims(user: User) -> dict:
+    """Claims that let get_current_user identify the user without a database query."""
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "username": user.username,
+        "ver": user.token_version
+    }
+
+def _registration_conflict(db: Session, user: UserCreate):
+    """Return why the email or username can't be registered, or None if both are free."""
+    existing = db.query(User.email, User.username).filter(
+        or_(User.email == user.email, User.username == user.username)
+    ).first()
+    # Return the connection to the pool while the password is hashed, which can queue for seconds
+    db.close()
+    if existing is None:
+        return None
+    return "Email already registered" if existing.email == user.email else "Username already taken"
+
+def _add_user(db: Session, user: UserCreate, hashed_password: str) -> User:
+    new_user = User(
+        username=user.username,
+        email=user.email,
+        hashed_password=hashed_password
+    )
+    db.add(new_user)
+    try:
+        db.commit()
+    except IntegrityError:
+        # The email or username was registered while the password was being hashed
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Email or username already registered")
+    db.refresh(new_user)
+    return new_user
+
 @router.post("/register", response_model=UserResponseWithToken)
-async def register_user(request: Request, user: UserCreate, db: Session = Depends(get_db)):
-    logging.info(f"Received payload: {await request.json()}")
+async def register_user(user: UserCreate, db: Session = Depends(get_db)):
+    logging.info(f"Registration attempt for username: {user.username}")
     try:
-        # Check if the email is already registered
-        db_user = db.query(User).filter(User.email == user.email).first()
-        if db_user:
-            logging.error("Email already registered")
-            raise HTTPException(status_code=400, detail="Email already registered")
+        # Check if the email or username is already registered
+        conflict = await run_in_threadpool(_registration_conflict, db, user)
+        if conflict:
+            logging.error(conflict)
+            raise HTTPException(status_code=400, detail=conflict)
         
         # Hash the password and create a new user
-        hashed_password = get_password_hash(user.password)
-        new_user = User(
-            username=user.username,
-            email=user.email,
-            hashed_password=hashed_password
-        )
-        db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        hashed_password = await hash_password(user.password)
+        new_user = await run_in_threadpool(_add_user, db, user, hashed_password)
         logging.info(f"User registered successfully: {user.username}")
 
-        # Load predefined ingredients
-        predefined_ingredients = load_predefined_ingredients(INGREDIENTS_FILE_PATH)
-        for ingredient in predefined_ingredients:
-            # Check if the ingredient already exists in the database
-            db_ingredient = db.query(Ingredient).filter(Ingredient.id == ingredient["id"]).first()
-            if not db_ingredient:
-                # Add predefined ingredient to the database
-                new_ingredient = Ingredient(
-                    id=ingredient["id"],
-                    name=ingredient["name"],
-                    language=ingredient["language"],
-                    creator_id=new_user.id
-                )
-                db.add(new_ingredient)
-                db.commit()
-
-                # Add translations for the ingredient
-                for lang, name in ingredient.get("translations", {}).items():
-                    translation = IngredientTranslation(
-                        ingredient_id=new_ingredient.id,
-                        language=lang,
-                        name=name
-                    )
-                    db.add(translation)
-                db.commit()
-
         # Create an access token
-        access_token = create_access_token(data={"sub": new_user.email})
+        access_token = create_access_token(data=token_claims(new_user))
 
         return UserResponseWithToken(
             id=new_user.id,
@@ -107,31 +99,60 @@ async def register_user(request: Request, user: UserCreate, db: Session = Depend
             access_token=access_token,
             token_type="bearer"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error during registration: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
-@router.post("/login")
-def login_user(user: UserLogin, db: Session = Depends(get_db)):
-    logging.info(f"Login attempt for identifier: {user.identifier}")
-    
+def _find_user(db: Session, identifier: str):
     # Check if the identifier is an email or username
-    if "@" in user.identifier:
-        db_user = db.query(User).filter(User.email == user.identifier).first()
+    if "@" in identifier:
+        db_user = db.query(User).filter(User.email == identifier).first()
     else:
-        db_user = db.query(User).filter(User.username == user.identifier).first()
-    
+        db_user = db.query(User).filter(User.username == identifier).first()
+    # Return the connection to the pool while the password is verified; the loaded
+    # attributes of the detached user stay readable
+    db.close()
+    return db_user
+
+def _store_password_hash(db: Session, user_id: int, hashed_password: str):
+    db.execute(update(User).where(User.id == user_id).values(hashed_password=hashed_password))
+    db.commit()
+
+@router.post("/login")
+async def login_user(user: UserLogin, db: Session = Depends(get_db)):
+    logging.info(f"Login attempt for identifier: {user.identifier}")
+
+    db_user = await run_in_threadpool(_find_user, db, user.identifier)
     if not db_user:
         logging.error("User not found")
         raise HTTPException(status_code=400, detail="Invalid credentials")
-    
-    if not verify_password(user.password, db_user.hashed_password):
+
+    valid, new_hash = await verify_password(user.password, db_user.hashed_password)
+    if not valid:
         logging.error("Invalid password")
         raise HTTPException(status_code=400, detail="Invalid credentials")
-    
+
     access_token = create_access_token(
-        data={"sub": db_user.email}    
+        data=token_claims(db_user)
     )
+
+    # Transparently upgrade hashes created with an outdated cost factor
+    if new_hash:
+        await run_in_threadpool(_store_password_hash, db, db_user.id, new_hash)
+        logging.info(f"Rehashed password of user {user.identifier}")
+
     logging.info(f"User {user.identifier} logged in successfully")
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.post("/revoke", status_code=204)
+def revoke_tokens(current_user: TokenData = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Invalidate every token issued to the current user, e.g. to log out on all devices."""
+    db.execute(
+        update(User).where(User.id == current_user.id).values(token_version=User.token_version + 1)
+    )
+    db.commit()
+    forget_token_version(current_user.id)
+    logging.info(f"Revoked all tokens of user {current_user.id}")
\ No newline at end of file
@@ -0,0 +1,307 @@
+import logging
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.app.db import get_async_db, get_db
+from backend.app.models import Cookbook, CookbookChapter, CookbookRecipe, CookbookRecipeFeedback, Recipe, User
+from backend.app.models.user import cookbook_users
+from backend.app.schemas import (
+    CookbookChapter as CookbookChapterSchema,
+    CookbookChapterCreate,
+    CookbookChapterMove,
+    CookbookCreate,
+    CookbookDetail,
+    CookbookMemberCreate,
+    CookbookRecipe as CookbookRecipeSchema,
+    CookbookRecipeCreate,
+    CookbookRecipeFeedback as CookbookRecipeFeedbackSchema,
+    CookbookRecipeFeedbackCreate,
+    CookbookRecipeMove,
+    CookbookSummary,
+    TokenData,
+)
+from backend.app.services.ordering import append_position, move
+from backend.app.utils import get_current_user
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+def _membership_statement(cookbook_id: int, user_id: int):
+    return select(cookbook_users.c.cookbook_id).where(
+        cookbook_users.c.cookbook_id == cookbook_id,
+        cookbook_users.c.user_id == user_id
+    )
+
+def _require_member(db: Session, cookbook_id: int, user_id: int):
+    # Cookbooks of other users are reported as missing rather than forbidden
+    if db.execute(_membership_statement(cookbook_id, user_id)).first() is None:
+        raise HTTPException(status_code=404, detail="Cookbook not found")
+
+def _get_entry(db: Session, cookbook_id: int, cookbook_recipe_id: int) -> CookbookRecipe:
+    entry = db.get(CookbookRecipe, cookbook_recipe_id)
+    if entry is None or entry.cookbook_id != cookbook_id:
+        raise HTTPException(status_code=404, detail="Recipe not found in cookbook")
+    return entry
+
+def _get_chapter(db: Session, cookbook_id: int, chapter_id: int) -> CookbookChapter:
+    chapter = db.get(CookbookChapter, chapter_id)
+    if chapter is None or chapter.cookbook_id != cookbook_id:
+        raise HTTPException(status_code=400, detail="Chapter does not belong to this cookbook")
+    return chapter
+
+def _apply_rating(db: Session, cookbook_recipe_id: int, count_delta: int, sum_delta: float):
+    """
+    Update the rating aggregate of a cookbook recipe in the transaction writing the feedback.
+
+    The increment happens in the UPDATE itself, so concurrent feedback never loses a rating.
+    """
+    db.execute(
+        update(CookbookRecipe)
+        .where(CookbookRecipe.id == cookbook_recipe_id)
+        .values(
+            rating_count=CookbookRecipe.rating_count + count_delta,
+            rating_sum=CookbookRecipe.rating_sum + sum_delta
+        )
+    )
+
+@router.get("/cookbooks", response_model=List[CookbookSummary])
+async def read_cookbooks(current_user: TokenData = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    """List the cookbooks the current user is a member of."""
+    cookbooks = (await db.execute(
+        select(Cookbook)
+        .join(cookbook_users, cookbook_users.c.cookbook_id == Cookbook.id)
+        .where(cookbook_users.c.user_id == current_user.id)
+        .order_by(Cookbook.created_at.desc(), Cookbook.id.desc())
+    )).scalars().all()
+    return cookbooks
+
+@router.post("/cookbooks", response_model=CookbookSummary, status_code=status.HTTP_201_CREATED)
+def create_cookbook(cookbook: CookbookCreate, current_user: TokenData = Depends(get_current_user), db: Session = Depends(get_db)):
+    db_cookbook = Cookbook(**cookbook.dict())
+    db.add(db_cookbook)
+    db.flush()
+    db.execute(insert(cookbook_users).values(cookbook_id=db_cookbook.id, user_id=current_user.id))
+    db.commit()
+    db.refresh(db_cookbook)
+    return db_cookbook
+
+@router.get("/cookbooks/{cookbook_id}", response_model=CookbookDetail)
+async def get_cookbook(cookbook_id: int, current_user: TokenData = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    """Return a cookbook with its chapters and recipes in order, including their ratings."""
+    if (await db.execute(_membership_statement(cookbook_id, current_user.id))).first() is None:
+        raise HTTPException(status_code=404, detail="Cookbook not found")
+
+    cookbook = await db.get(Cookbook, cookbook_id)
+    chapters = (await db.execute(
+        select(CookbookChapter).where(CookbookChapter.cookbook_id == cookbook_id).order_by(CookbookChapter.position, CookbookChapter.id)
+    )).scalars().all()
+
+    # Ratings come from the aggregate columns; the feedback rows are not read at all
+    rows = (await db.execute(
+        select(
+            CookbookRecipe.id,
+            CookbookRecipe.recipe_id,
+            CookbookRecipe.chapter_id,
+            CookbookRecipe.position,
+            CookbookRecipe.rating_count,
+            CookbookRecipe.rating_sum,
+            Recipe.title,
+            Recipe.thumbnail_url
+        )
+        .join(Recipe, Recipe.id == CookbookRecipe.recipe_id)
+        .where(CookbookRecipe.cookbook_id == cookbook_id)
+        .order_by(CookbookRecipe.position, CookbookRecipe.id)
+    )).all()
+
+    return {
+        "id": cookbook.id,
+        "name": cookbook.name,
+        "description": cookbook.description,
+        "image_url": cookbook.image_url,
+        "created_at": cookbook.created_at,
+        "chapters": chapters,
+        "recipes": [
+            {
+                "id": row.id,
+                "recipe_id": row.recipe_id,
+                "chapter_id": row.chapter_id,
+                "position": row.position,
+                "title": row.title,
+                "thumbnail_url": row.thumbnail_url,
+                "rating_count": row.rating_count,
+                "rating_average": round(row.rating_sum / row.rating_count, 2) if row.rating_count else None
+            }
+            for row in rows
+        ]
+    }
+
+@router.post("/cookbooks/{cookbook_id}/members", status_code=204)
+def add_cookbook_member(cookbook_id: int, member: CookbookMemberCreate, current_user: TokenData = Depends(get_current_user), db: Session = Depends(get_db)):
+    _require_member(db, cookbook_id, current_user.id)
+    if db.get(User, member.user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if db.execute(_membership_statement(cookbook_id, member.user_id)).first() is not None:
+        return
+    db.execute(insert(cookbook_users).values(cookbook_id=cookbook_id, user_id=member.user_id))
+    db.commit()
+
+@router.post("/cookbooks/{cookbook_id}/chapters", response_model=CookbookChapterSchema, status_code=status.HTTP_201_CREATED)
+def create_chapter(cookbook_id: int, chapter: CookbookChapterCreate, current_user: TokenData = Depends(get_current_user), db: Session = Depends(get_db)):
+    _require_member(db, cookbook_id, current_user.id)
+    db_chapter = CookbookChapter(
+        name=chapter.name,
+        cookbook_id=cookbook_id,
+        position=append_position(db, CookbookChapter, cookbook_id)
+    )
+    db.add(db_chapter)
+    db.commit()
+    db.refresh(db_chapter)
+    return db_chapter
+
+@router.post("/cookbooks/{cookbook_id}/chapters/{chapter_id}/move", response_model=CookbookChapterSchema)
+def move_chapter(cookbook_id: int, chapter_id: int, target: CookbookChapterMove, current_user: TokenData = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Move a chapter directly after another one, or to the start if after_id is null."""
+    _require_member(db, cookbook_id, current_user.id)
+    chapter = _get_chapter(db, cookbook_id, chapter_id)
+    if target.after_id is not None:
+        if target.after_id == chapter.id:
+            raise HTTPException(status_code=400, detail="A chapter can't be moved after itself")
+        _get_chapter(db, cookbook_id, target.after_id)
+
+    move(db, chapter, target.after_id)
+    db.commit()
+    db.refresh(chapter)
+    return chapter
+
+@router.post("/cookbooks/{cookbook_id}/recipes", response_model=CookbookRecipeSchema, status_code=status.HTTP_201_CREATED)
+def add_cookbook_recipe(cookbook_id: int, entry: CookbookRecipeCreate, current_user: TokenData = Depends(get_current_user), db: Session = Depends(get_db)):
+    _require_member(db, cookbook_id, current_user.id)
+
+    recipe = db.get(Recipe, entry.recipe_id)
+    if recipe is None or recipe.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    if entry.chapter_id is not None:
+        _get_chapter(db, cookbook_id, entry.chapter_id)
+
+    db_entry = CookbookRecipe(
+        recipe_id=entry.recipe_id,
+        chapter_id=entry.chapter_id,
+        cookbook_id=cookbook_id,
+        position=append_position(db, CookbookRecipe, cookbook_id)
+    )
+    db.add(db_entry)
+    db.commit()
+    db.refresh(db_entry)
+    return db_entry
+
+@router.post("/cookbooks/{cookbook_id}/recipes/{cookbook_recipe_id}/move", response_model=CookbookRecipeSchema)
+def move_cookbook_recipe(
+    cookbook_id: int,
+    cookbook_recipe_id: int,
+    target: CookbookRecipeMove,
+    current_user: TokenData = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Move a recipe directly after another one, or to the start if after_id is null, and
+    optionally into another chapter.
+
+    Recipes are ordered across the whole cookbook, so moving one writes only its own row
+    unless the cookbook has to be rebalanced.
+    """
+    _require_member(db, cookbook_id, current_user.id)
+    entry = _get_entry(db, cookbook_id, cookbook_recipe_id)
+    if target.after_id is not None:
+        if target.after_id == entry.id:
+            raise HTTPException(status_code=400, detail="A recipe can't be moved after itself")
+        _get_entry(db, cookbook_id, target.after_id)
+    if "chapter_id" in target.model_fields_set:
+        if target.chapter_id is not None:
+            _get_chapter(db, cookbook_id, target.chapter_id)
+        entry.chapter_id = target.chapter_id
+
+    move(db, entry, target.after_id)
+    db.commit()
+    db.refresh(entry)
+    return entry
+
+@router.delete("/cookbooks/{cookbook_id}/recipes/{cookbook_recipe_id}", status_code=204)
+def remove_cookbook_recipe(cookbook_id: int, cookbook_recipe_id: int, current_user: TokenData = Depends(get_current_user), db: Session = Depends(get_db)):
+    _require_member(db, cookbook_id, current_user.id)
+    entry = _get_entry(db, cookbook_id, cookbook_recipe_id)
+    db.execute(delete(CookbookRecipeFeedback).where(CookbookRecipeFeedback.cookbook_recipe_id == entry.id))
+    db.delete(entry)
+    db.commit()
+
+@router.get("/cookbooks/{cookbook_id}/recipes/{cookbook_recipe_id}/feedback", response_model=List[CookbookRecipeFeedbackSchema])
+async def read_feedback(cookbook_id: int, cookbook_recipe_id: int, current_user: TokenData = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    if (await db.execute(_membership_statement(cookbook_id, current_user.id))).first() is None:
+        raise HTTPException(status_code=404, detail="Cookbook not found")
+    feedback = (await db.execute(
+        select(CookbookRecipeFeedback)
+        .join(CookbookRecipe, CookbookRecipe.id == CookbookRecipeFeedback.cookbook_recipe_id)
+        .where(CookbookRecipe.id == cookbook_recipe_id, CookbookRecipe.cookbook_id == cookbook_id)
+        .order_by(CookbookRecipeFeedback.created_at.desc())
+    )).scalars().all()
+    return feedback
+
+@router.post("/cookbooks/{cookbook_id}/recipes/{cookbook_recipe_id}/feedback", response_model=CookbookRecipeFeedbackSchema, status_code=status.HTTP_201_CREATED)
+def create_feedback(
+    cookbook_id: int,
+    cookbook_recipe_id: int,
+    feedback: CookbookRecipeFeedbackCreate,
+    current_user: TokenData = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    _require_member(db, cookbook_id, current_user.id)
+    entry = _get_entry(db, cookbook_id, cookbook_recipe_id)
+
+    if feedback.rating is not None:
+        already_rated = db.execute(
+            select(CookbookRecipeFeedback.id).where(
+                CookbookRecipeFeedback.cookbook_recipe_id == entry.id,
+                CookbookRecipeFeedback.user_id == current_user.id,
+                CookbookRecipeFeedback.rating.is_not(None)
+            )
+        ).first()
+        if already_rated:
+            raise HTTPException(status_code=400, detail="You have already rated this recipe")
+
+    db_feedback = CookbookRecipeFeedback(
+        cookbook_recipe_id=entry.id,
+        user_id=current_user.id,
+        rating=feedback.rating,
+        comment=feedback.comment
+    )
+    db.add(db_feedback)
+    if feedback.rating is not None:
+        _apply_rating(db, entry.id, 1, feedback.rating)
+    db.commit()
+    db.refresh(db_feedback)
+    return db_feedback
+
+@router.delete("/cookbooks/{cookbook_id}/recipes/{cookbook_recipe_id}/feedback/{feedback_id}", status_code=204)
+def delete_feedback(
+    cookbook_id: int,
+    cookbook_recipe_id: int,
+    feedback_id: int,
+    current_user: TokenData = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    _require_member(db, cookbook_id, current_user.id)
+    entry = _get_entry(db, cookbook_id, cookbook_recipe_id)
+
+    feedback = db.get(CookbookRecipeFeedback, feedback_id)
+    if feedback is None or feedback.cookbook_recipe_id != entry.id:
+        raise HTTPException(status_code=404, detail="Feedback not found")
+    if feedback.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="You do not have permission to delete this feedback")
+
+    if feedback.rating is not None:
+        _apply_rating(db, entry.id, -1, -feedback.rating)
+    db.delete(feedback)
+    db.commit()
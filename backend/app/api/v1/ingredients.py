@@ -1,20 +1,34 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
-from typing import List
+from typing import List, Optional
 
-from backend.app.models import Ingredient, IngredientTranslation, User, Recipe
-from backend.app.schemas import IngredientCreate, Ingredient as IngredientSchema, IngredientTranslationCreate, IngredientTranslation as IngredientTranslationSchema
-from backend.app.db import get_db
+from backend.app.models import Ingredient, IngredientTranslation, Recipe
+from backend.app.schemas import TokenData, IngredientCreate, Ingredient as IngredientSchema, IngredientTranslationCreate, IngredientTranslation as IngredientTranslationSchema, IngredientSuggestion
+from backend.app.db import get_async_db, get_db
 from backend.app.utils import get_current_user
+from backend.app.services.catalogue import bump_catalogue_version, get_catalogue_version_async
+from backend.app.services.http_cache import cache_headers, is_not_modified, make_etag, not_modified_response
+from backend.app.services.ingredient_index import ingredient_index, normalize_name
+from backend.app.services.ingredient_suggestions import ingredient_suggestions
+from backend.app.services.search import mark_ingredient_stale, search_reindexer
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.get("/ingredients", response_model=List[IngredientSchema])
-def get_all_ingredients(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    # Fetch all ingredients from the database
-    ingredients = db.query(Ingredient).options(joinedload(Ingredient.translations)).all()
+async def get_all_ingredients(request: Request, response: Response, db: AsyncSession = Depends(get_async_db), current_user: TokenData = Depends(get_current_user)):
+    # The catalogue is the same for every user and only changes when its version is bumped
+    version, changed_at = await get_catalogue_version_async(db)
+    headers = cache_headers(make_etag("ingredients", version), changed_at, cache_control="public, no-cache")
+    if is_not_modified(request, headers["ETag"], changed_at):
+        return not_modified_response(headers)
+    response.headers.update(headers)
+
+    # Fetch all ingredients with their translations in one joined query, as the sync path did
+    ingredients = (await db.execute(select(Ingredient).options(joinedload(Ingredient.translations)))).unique().scalars().all()
 
     # Convert ingredients to a dictionary format with translations
     ingredients_data = [
@@ -32,16 +46,30 @@ def get_all_ingredients(db: Session = Depends(get_db), current_user: User = Depe
 
     return ingredients_data
 
+@router.get("/ingredients/suggest", response_model=List[IngredientSuggestion])
+async def suggest_ingredients(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    lang: Optional[str] = Query(None, max_length=20, description="Language to show the suggested names in"),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenData = Depends(get_current_user)
+):
+    """Suggest ingredients whose name or translation starts with the prefix."""
+    return await db.run_sync(lambda session: ingredient_suggestions.suggest(session, prefix, lang, limit))
+
 @router.post("/ingredients", response_model=IngredientSchema)
-def create_ingredient(ingredient: IngredientCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    db_ingredient = Ingredient(**ingredient.dict(), creator_id=current_user.id)
+def create_ingredient(ingredient: IngredientCreate, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
+    db_ingredient = Ingredient(**ingredient.dict(), normalized_name=normalize_name(ingredient.name), creator_id=current_user.id)
     db.add(db_ingredient)
+    version = bump_catalogue_version(db)
     db.commit()
+    ingredient_index.invalidate()
     db.refresh(db_ingredient)
+    ingredient_suggestions.add(version, db_ingredient.id, db_ingredient.name, db_ingredient.language)
     return db_ingredient
 
 @router.post("/ingredients/{ingredient_id}/translations", response_model=IngredientTranslationSchema)
-def add_translation(ingredient_id: int, translation: IngredientTranslationCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def add_translation(ingredient_id: int, translation: IngredientTranslationCreate, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
     # Fetch the ingredient from the database
     ingredient = db.query(Ingredient).filter(Ingredient.id == ingredient_id).first()
 
@@ -49,14 +77,20 @@ def add_translation(ingredient_id: int, translation: IngredientTranslationCreate
         raise HTTPException(status_code=404, detail="Ingredient not found")
 
     # Add the translation to the database
-    db_translation = IngredientTranslation(**translation.dict(), ingredient_id=ingredient.id)
+    db_translation = IngredientTranslation(**translation.dict(), normalized_name=normalize_name(translation.name), ingredient_id=ingredient.id)
     db.add(db_translation)
+    # The recipes using the ingredient are reindexed in the background, as there can be many
+    mark_ingredient_stale(db, ingredient.id)
+    version = bump_catalogue_version(db)
     db.commit()
+    search_reindexer.notify()
+    ingredient_index.invalidate()
     db.refresh(db_translation)
+    ingredient_suggestions.add(version, ingredient.id, db_translation.name, db_translation.language)
     return db_translation
 
 @router.delete("/ingredients/{ingredient_id}", status_code=204)
-def delete_ingredient(ingredient_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def delete_ingredient(ingredient_id: int, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
     # Fetch the ingredient
     ingredient = db.query(Ingredient).filter(Ingredient.id == ingredient_id).first()
     
@@ -77,7 +111,9 @@ def delete_ingredient(ingredient_id: int, db: Session = Depends(get_db), current
     # Delete related translations
     try:
         db.query(IngredientTranslation).filter(IngredientTranslation.ingredient_id == ingredient_id).delete()
+        bump_catalogue_version(db)
         db.commit()
+        ingredient_index.invalidate()
     except Exception as e:
         logger.error(f"Error deleting translations for ingredient {ingredient_id}: {e}")
         raise HTTPException(status_code=500, detail="Error deleting related translations")
@@ -86,7 +122,10 @@ def delete_ingredient(ingredient_id: int, db: Session = Depends(get_db), current
     if ingredient.creator_id is None or ingredient.creator_id == current_user.id:
         try:
             db.delete(ingredient)
+            version = bump_catalogue_version(db)
             db.commit()
+            ingredient_index.invalidate()
+            ingredient_suggestions.remove(version, ingredient_id)
             logger.info(f"Ingredient with ID {ingredient_id} deleted successfully.")
             return
         except Exception as e:
@@ -101,7 +140,7 @@ def delete_translation(
     ingredient_id: int,
     translation_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: TokenData = Depends(get_current_user)
 ):
     # Fetch the translation
     translation = db.query(IngredientTranslation).join(Ingredient).filter(
@@ -127,8 +166,12 @@ def delete_translation(
 
     # Delete the translation
     try:
+        translation_name = translation.name
         db.delete(translation)
+        version = bump_catalogue_version(db)
         db.commit()
+        ingredient_index.invalidate()
+        ingredient_suggestions.remove(version, ingredient_id, translation_name)
         logger.info(f"Translation with ID {translation_id} deleted successfully.")
         return
     except Exception as e:
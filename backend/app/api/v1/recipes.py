@@ -1,111 +1,219 @@
 import os
-import shutil
 import json
 import logging
-from typing import List, Optional
+import tempfile
+import zipfile
+from datetime import datetime
+from typing import Dict, List, Optional
 
 from dotenv import load_dotenv
-from fastapi import APIRouter, Depends, status, UploadFile, File, Form, HTTPException, Query
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, status, UploadFile, File, Form, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
 
 load_dotenv()
 
-from backend.app.db import get_db
-from backend.app.models import User, Recipe as RecipeModel, Ingredient, recipe_ingredients
-from backend.app.schemas import RecipeResponse
+from backend.app.db import get_async_db, get_db
+from backend.app.models import Recipe as RecipeModel, Ingredient, SharedRecipe, recipe_ingredients
+from backend.app.models.recipe import Unit as RecipeUnit
+from backend.app.schemas import RecipeResponse, RecipePage, RecipeSearchPage, RecipeUpdate, RecipeImportResult, CookableRecipePage, TokenData
+from backend.app.services.cookbooks import remove_cookbook_entries
+from backend.app.services.forks import (
+    detach_forks, fork_counts_statement, fork_recipe, group_fork_info, ingredients_recipe_id, lineage_statement
+)
+from backend.app.services.ingredient_index import ingredient_index, normalize_name
+from backend.app.services.http_cache import cache_headers, is_not_modified, make_etag, not_modified_response
+from backend.app.services.images import derivative_urls, derivative_worker
+from backend.app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, after_cursor, encode_cursor
+from backend.app.services.recipe_import import IMPORT_CHUNK_SIZE, RecipeImporter, import_archive, stream_lines
+from backend.app.services.search import index_recipes, remove_recipes, search_statement
+from backend.app.services.sharing import refresh_shares, remove_shares
+from backend.app.services.uploads import StagedUploadRoute, staged_uploads
 from backend.app.utils import get_current_user
 
 router = APIRouter()
+# Endpoints taking file uploads, which are staged while the request body streams in
+upload_router = APIRouter(route_class=StagedUploadRoute)
 
 logger = logging.getLogger(__name__)
 
 base_url = os.getenv("API_BASE_URL")
 
-@router.get("/recipes", response_model=List[RecipeResponse])
-def read_recipes(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    recipes = db.query(RecipeModel).filter(RecipeModel.owner_id == current_user.id).all()
-    recipe_data = []
-
-    for recipe in recipes:
-        # Fetch ingredients with quantity and unit for the recipe
-        ingredients = db.execute(
-            recipe_ingredients.select().where(recipe_ingredients.c.recipe_id == recipe.id)
-        ).fetchall()
-
-        servings_unit = recipe.servings_unit or 'number'
-        instructions = {"steps": recipe.instructions} if isinstance(recipe.instructions, list) else recipe.instructions
-
-        # Build the response data
-        recipe_data.append({
-            "id": recipe.id,
-            "title": recipe.title,
-            "servings": recipe.servings,
-            "servings_unit": servings_unit,
-            "special_equipment": recipe.special_equipment,
-            "instructions": instructions,
-            "prep_time": recipe.prep_time,
-            "cook_time": recipe.cook_time,
-            "rest_time": recipe.rest_time,
-            "total_time": recipe.total_time,
-            "thumbnail_url": recipe.thumbnail_url,
-            "images_url": recipe.images_url or [],
-            "ingredients": [
-                {
-                    "name": db.query(Ingredient).get(ingredient.ingredient_id).name,
-                    "quantity": ingredient.quantity,
-                    "unit": ingredient.unit
-                }
-                for ingredient in ingredients
-            ],
-            "added_at": recipe.added_at,
-            "changed_at": recipe.changed_at,
-            "owner_id": current_user.id,  # Set owner_id to the currently logged-in user
-            "owner": {
-                "id": current_user.id,
-                "username": current_user.username,
-                "email": current_user.email
-            }
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/jsonl", "application/json-lines"}
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed"}
+MAX_IMPORT_ARCHIVE_BYTES = int(os.getenv("MAX_IMPORT_ARCHIVE_BYTES", 500 * 1024 * 1024))
+
+# Columns needed to render a recipe card; instructions and the JSON columns stay unloaded
+SUMMARY_COLUMNS = (
+    RecipeModel.id,
+    RecipeModel.title,
+    RecipeModel.servings,
+    RecipeModel.servings_unit,
+    RecipeModel.thumbnail_url,
+    RecipeModel.prep_time,
+    RecipeModel.cook_time,
+    RecipeModel.rest_time,
+    RecipeModel.total_time,
+    RecipeModel.added_at,
+    RecipeModel.changed_at,
+    RecipeModel.owner_id,
+)
+
+async def _owned_recipes_page(db: AsyncSession, owner_id: int, cursor: Optional[str], limit: Optional[int], *options):
+    """Fetch a page of a user's recipes, most recently changed first, and the cursor of the next page."""
+    statement = select(RecipeModel).options(*options).where(RecipeModel.owner_id == owner_id)
+
+    if cursor:
+        statement = statement.where(after_cursor(RecipeModel.changed_at, RecipeModel.id, cursor))
+
+    statement = statement.order_by(RecipeModel.changed_at.desc(), RecipeModel.id.desc())
+    if limit is None:
+        return (await db.execute(statement)).scalars().all(), None
+
+    # Fetch one extra row to find out whether there is a next page
+    recipes = (await db.execute(statement.limit(limit + 1))).scalars().all()
+    if len(recipes) > limit:
+        recipes = recipes[:limit]
+        return recipes, encode_cursor(recipes[-1].changed_at, recipes[-1].id)
+    return recipes, None
+
+def _recipe_ingredients_statement(recipe_ids: List[int]):
+    """Select the ingredient rows of several recipes, including unedited forks, in a single joined query."""
+    return (
+        select(
+            RecipeModel.id.label("recipe_id"),
+            Ingredient.name,
+            recipe_ingredients.c.quantity,
+            recipe_ingredients.c.unit
+        )
+        .join(recipe_ingredients, recipe_ingredients.c.recipe_id == ingredients_recipe_id)
+        .join(Ingredient, Ingredient.id == recipe_ingredients.c.ingredient_id)
+        .where(RecipeModel.id.in_(recipe_ids))
+    )
+
+def _group_recipe_ingredients(recipe_ids: List[int], rows) -> Dict[int, List[dict]]:
+    """Group the rows selected by _recipe_ingredients_statement by recipe."""
+    ingredients_by_recipe = {recipe_id: [] for recipe_id in recipe_ids}
+    for row in rows:
+        ingredients_by_recipe[row.recipe_id].append({
+            "name": row.name,
+            "quantity": row.quantity,
+            "unit": row.unit
         })
+    return ingredients_by_recipe
+
+def _load_recipe_ingredients(db: Session, recipe_ids: List[int]) -> Dict[int, List[dict]]:
+    """Fetch the ingredient rows of several recipes with a sync session."""
+    if not recipe_ids:
+        return {}
+    return _group_recipe_ingredients(recipe_ids, db.execute(_recipe_ingredients_statement(recipe_ids)).all())
+
+async def _load_recipe_ingredients_async(db: AsyncSession, recipe_ids: List[int]) -> Dict[int, List[dict]]:
+    """Fetch the ingredient rows of several recipes with an async session."""
+    if not recipe_ids:
+        return {}
+    rows = (await db.execute(_recipe_ingredients_statement(recipe_ids))).all()
+    return _group_recipe_ingredients(recipe_ids, rows)
+
+def _load_fork_info(db: Session, recipe_ids: List[int], user_id: int) -> Dict[int, dict]:
+    """Fetch the fork counts and lineage of several recipes, as seen by a user, with a sync session."""
+    if not recipe_ids:
+        return {}
+    fork_counts = db.execute(fork_counts_statement(recipe_ids)).all()
+    return group_fork_info(recipe_ids, fork_counts, db.execute(lineage_statement(recipe_ids, user_id)).all())
+
+async def _load_fork_info_async(db: AsyncSession, recipe_ids: List[int], user_id: int) -> Dict[int, dict]:
+    """Fetch the fork counts and lineage of several recipes, as seen by a user, with an async session."""
+    if not recipe_ids:
+        return {}
+    fork_counts = (await db.execute(fork_counts_statement(recipe_ids))).all()
+    return group_fork_info(recipe_ids, fork_counts, (await db.execute(lineage_statement(recipe_ids, user_id))).all())
+
+def _resolve_ingredients(db: Session, ingredients: List[dict]) -> List[dict]:
+    """
+    Validate the submitted ingredients and resolve their names to ingredient ids.
+
+    Returns:
+        The recipe_ingredients rows of the ingredients, without the recipe id.
+    """
+    # Validate and fetch ingredients from the database
+    if not ingredients:
+        raise HTTPException(
+            status_code=400,
+            detail="Ingredients field cannot be empty."
+        )
 
-    return recipe_data
+    # Normalize ingredient names from the request
+    ingredient_names = [normalize_name(ingredient['name']) for ingredient in ingredients if 'name' in ingredient]
+    if not ingredient_names:
+        raise HTTPException(
+            status_code=400,
+            detail="At least one ingredient with a valid name is required."
+        )
 
-@router.get("/recipes/{recipe_id}", response_model=RecipeResponse)
-def get_recipe(recipe_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    recipe = db.query(RecipeModel).filter(RecipeModel.id == recipe_id, RecipeModel.owner_id == current_user.id).first()
-    if not recipe:
-        raise HTTPException(status_code=404, detail="Recipe not found")
+    # Resolve only the submitted names against the ingredient and translation names
+    db_ingredient_map = ingredient_index.lookup(db, ingredient_names)
+
+    # Check for invalid ingredients
+    invalid_ingredients = [name for name in ingredient_names if name not in db_ingredient_map]
+    if invalid_ingredients:
+        logger.warning(f"Invalid ingredients: {invalid_ingredients}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"The following ingredients are not valid: {', '.join(invalid_ingredients)}"
+        )
 
-    # Fetch ingredients with quantity and unit for the recipe
-    ingredients = db.execute(
-        recipe_ingredients.select().where(recipe_ingredients.c.recipe_id == recipe.id)
-    ).fetchall()
+    # Each ingredient can only be linked once per recipe
+    ingredient_ids = [db_ingredient_map[name] for name in ingredient_names]
+    if len(set(ingredient_ids)) != len(ingredient_ids):
+        raise HTTPException(
+            status_code=400,
+            detail="An ingredient is listed more than once."
+        )
 
-    owner = db.query(User).filter(User.id == recipe.owner_id).first()
+    return [
+        {
+            "ingredient_id": db_ingredient_map[normalize_name(ingredient['name'])],
+            "quantity": ingredient.get('quantity'),
+            "unit": ingredient.get('unit')
+        }
+        for ingredient in ingredients if 'name' in ingredient
+    ]
 
+def _summary_item(recipe: RecipeModel) -> dict:
+    return {
+        **{column.key: getattr(recipe, column.key) for column in SUMMARY_COLUMNS},
+        "servings_unit": recipe.servings_unit or 'number',
+        "thumbnail_derivatives": derivative_urls(recipe.thumbnail_url)
+    }
+
+def _serialize_recipe(recipe: RecipeModel, ingredients: List[dict], fork_info: dict, owner: TokenData) -> dict:
+    """Build the RecipeResponse payload for a recipe and its preloaded ingredients and fork info."""
     return {
         "id": recipe.id,
         "title": recipe.title,
         "servings": recipe.servings,
-        "servings_unit": recipe.servings_unit,
+        "servings_unit": recipe.servings_unit or 'number',
         "special_equipment": recipe.special_equipment or [],
         "instructions": recipe.instructions,
+        "source": recipe.source,
         "prep_time": recipe.prep_time,
         "cook_time": recipe.cook_time,
         "rest_time": recipe.rest_time,
         "total_time": recipe.total_time,
         "thumbnail_url": recipe.thumbnail_url,
         "images_url": recipe.images_url or [],
-        "ingredients": [
-            {
-                "name": db.query(Ingredient).get(ingredient.ingredient_id).name,
-                "quantity": ingredient.quantity,
-                "unit": ingredient.unit
-            }
-            for ingredient in ingredients
-        ],
+        "thumbnail_derivatives": derivative_urls(recipe.thumbnail_url),
+        "image_derivatives": [derivative_urls(url) for url in recipe.images_url or []],
+        "ingredients": ingredients,
         "added_at": recipe.added_at,
         "changed_at": recipe.changed_at,
         "owner_id": recipe.owner_id,
+        "original_id": recipe.original_id,
+        "fork_count": fork_info["fork_count"],
+        "lineage": fork_info["lineage"],
         "owner": {
             "id": owner.id,
             "username": owner.username,
@@ -113,7 +221,167 @@ def get_recipe(recipe_id: int, current_user: User = Depends(get_current_user), d
         }
     }
 
-@router.post("/recipes", response_model=RecipeResponse, status_code=status.HTTP_201_CREATED)
+@router.get("/recipes", response_model=List[RecipeResponse])
+async def read_recipes(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="Cursor returned in the X-Next-Cursor header of the previous page"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; all recipes are returned if omitted"),
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    recipes, next_cursor = await _owned_recipes_page(db, current_user.id, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    # Fetch the ingredients and forks of all recipes at once instead of per recipe
+    recipe_ids = [recipe.id for recipe in recipes]
+    ingredients_by_recipe = await _load_recipe_ingredients_async(db, recipe_ids)
+    fork_info = await _load_fork_info_async(db, recipe_ids, current_user.id)
+
+    return [
+        _serialize_recipe(recipe, ingredients_by_recipe[recipe.id], fork_info[recipe.id], current_user)
+        for recipe in recipes
+    ]
+
+@router.get("/recipes/summary", response_model=RecipePage)
+async def read_recipe_summaries(
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List the recipes of the current user without instructions, images and ingredients."""
+    recipes, next_cursor = await _owned_recipes_page(db, current_user.id, cursor, limit, load_only(*SUMMARY_COLUMNS))
+    return {"items": [_summary_item(recipe) for recipe in recipes], "next_cursor": next_cursor}
+
+@router.get("/recipes/search", response_model=RecipeSearchPage)
+async def search_recipes(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to search for in titles, ingredients and instructions"),
+    offset: int = Query(0, ge=0, description="next_offset of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Search the recipes of the current user, best matches first."""
+    statement = search_statement(q, current_user.id, limit + 1, offset)
+    if statement is None:
+        return {"items": [], "next_offset": None}
+
+    recipe_ids = (await db.execute(statement)).scalars().all()
+    next_offset = offset + limit if len(recipe_ids) > limit else None
+    recipe_ids = recipe_ids[:limit]
+
+    recipes = (await db.execute(
+        select(RecipeModel).options(load_only(*SUMMARY_COLUMNS)).where(RecipeModel.id.in_(recipe_ids))
+    )).scalars().all()
+    recipes_by_id = {recipe.id: recipe for recipe in recipes}
+    items = [_summary_item(recipes_by_id[recipe_id]) for recipe_id in recipe_ids if recipe_id in recipes_by_id]
+    return {"items": items, "next_offset": next_offset}
+
+@router.get("/recipes/cookable", response_model=CookableRecipePage)
+async def get_cookable_recipes(
+    ingredient_ids: List[int] = Query([], description="IDs of the ingredients on hand"),
+    ingredients: List[str] = Query([], description="Names of the ingredients on hand, in any language"),
+    max_missing: Optional[int] = Query(None, ge=0, description="Only return recipes missing at most this many ingredients"),
+    offset: int = Query(0, ge=0, description="next_offset of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Find the recipes of the current user that can be cooked with the given ingredients.
+
+    Recipes are ranked by the fraction of their ingredients on hand, then by the fewest
+    missing ingredients; recipes using none of them are left out.
+    """
+    on_hand = set(ingredient_ids)
+    if ingredients:
+        # Names and translations resolve to the canonical ingredient ids
+        names = [normalize_name(name) for name in ingredients]
+        ids_by_name = await db.run_sync(lambda session: ingredient_index.lookup(session, names))
+        on_hand.update(ids_by_name.values())
+    if not on_hand:
+        return {"items": [], "next_offset": None}
+
+    # One grouped pass over the ingredient rows of the user's recipes using any of the
+    # ingredients; forks that still share the rows of another recipe count those rows
+    matched = func.sum(case((recipe_ingredients.c.ingredient_id.in_(on_hand), 1), else_=0))
+    total = func.count()
+    coverage = (
+        select(
+            recipe_ingredients.c.recipe_id,
+            matched.label("matched"),
+            total.label("total")
+        )
+        .where(
+            recipe_ingredients.c.recipe_id.in_(
+                select(ingredients_recipe_id).where(RecipeModel.owner_id == current_user.id)
+            ),
+            recipe_ingredients.c.recipe_id.in_(
+                select(recipe_ingredients.c.recipe_id).where(recipe_ingredients.c.ingredient_id.in_(on_hand))
+            )
+        )
+        .group_by(recipe_ingredients.c.recipe_id)
+    )
+    if max_missing is not None:
+        coverage = coverage.having(total - matched <= max_missing)
+    coverage = coverage.subquery()
+
+    rows = (await db.execute(
+        select(RecipeModel, coverage.c.matched, coverage.c.total)
+        .join(coverage, coverage.c.recipe_id == ingredients_recipe_id)
+        .options(load_only(*SUMMARY_COLUMNS))
+        .where(RecipeModel.owner_id == current_user.id)
+        .order_by(
+            (coverage.c.matched * 1.0 / coverage.c.total).desc(),
+            (coverage.c.total - coverage.c.matched).asc(),
+            RecipeModel.id.desc()
+        )
+        .limit(limit + 1)
+        .offset(offset)
+    )).all()
+
+    next_offset = offset + limit if len(rows) > limit else None
+    items = [
+        {
+            **_summary_item(recipe),
+            "matched_ingredients": matched_count,
+            "missing_ingredients": total_count - matched_count,
+            "coverage": matched_count / total_count
+        }
+        for recipe, matched_count, total_count in rows[:limit]
+    ]
+    return {"items": items, "next_offset": next_offset}
+
+@router.get("/recipes/{recipe_id}", response_model=RecipeResponse)
+async def get_recipe(recipe_id: int, request: Request, response: Response, current_user: TokenData = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
+    # Check the validators before loading and serializing the full recipe
+    changed_at = (await db.execute(
+        select(RecipeModel.changed_at).where(RecipeModel.id == recipe_id, RecipeModel.owner_id == current_user.id)
+    )).scalar_one_or_none()
+    if changed_at is None:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+
+    # The fork count and lineage are part of the body but change without touching the
+    # recipe's changed_at, so they are part of the validators too. Deleted forks and
+    # ancestors leave no timestamp behind and are only caught by the ETag.
+    fork_info = (await _load_fork_info_async(db, [recipe_id], current_user.id))[recipe_id]
+    last_modified = max(filter(None, [changed_at, fork_info["changed_at"]]))
+    lineage = [(ancestor["id"], ancestor["title"], ancestor["owner_id"]) for ancestor in fork_info["lineage"]]
+    etag = make_etag("recipe", recipe_id, changed_at.isoformat(), last_modified.isoformat(), fork_info["fork_count"], lineage)
+    headers = cache_headers(etag, last_modified)
+    if is_not_modified(request, headers["ETag"], last_modified):
+        return not_modified_response(headers)
+    response.headers.update(headers)
+
+    recipe = await db.get(RecipeModel, recipe_id)
+
+    ingredients_by_recipe = await _load_recipe_ingredients_async(db, [recipe.id])
+
+    # The recipe is filtered by owner, so the owner is the current user
+    return _serialize_recipe(recipe, ingredients_by_recipe[recipe.id], fork_info, current_user)
+
+@upload_router.post("/recipes", response_model=RecipeResponse, status_code=status.HTTP_201_CREATED)
 def create_recipe(
     title: str = Form(...),
     ingredients: str = Form(...),
@@ -127,7 +395,7 @@ def create_recipe(
     rest_time: Optional[int] = Form(None),
     thumbnail: Optional[UploadFile] = File(None),
     images: Optional[List[UploadFile]] = File(None),
-    current_user: User = Depends(get_current_user),
+    current_user: TokenData = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     logger.info(f"Creating recipe with title: {title}")
@@ -154,98 +422,180 @@ def create_recipe(
 
     special_equipment = [item.strip() for item in special_equipment if item.strip()]
 
-    # Validate and fetch ingredients from the database
-    if not ingredients:
-        raise HTTPException(
-            status_code=400,
-            detail="Ingredients field cannot be empty."
-        )
+    ingredient_rows = _resolve_ingredients(db, ingredients)
 
-    # Normalize ingredient names from the request
-    ingredient_names = [ingredient['name'].strip().lower() for ingredient in ingredients if 'name' in ingredient]
-    if not ingredient_names:
-        raise HTTPException(
-            status_code=400,
-            detail="At least one ingredient with a valid name is required."
-        )
+    total_time = sum(filter(None, [prep_time, cook_time, rest_time]))
 
-    # Fetch and normalize predefined ingredient names and translations from the database
-    db_ingredients = db.query(Ingredient).options(joinedload(Ingredient.translations)).all()
-    db_ingredient_map = {ingredient.name.strip().lower(): ingredient for ingredient in db_ingredients}
+    # Files were staged while the body streamed in and are only moved into place once the recipe is committed
+    uploads = ([thumbnail] if thumbnail else []) + (images or [])
+    staged_files = staged_uploads(uploads)
+    try:
+        thumbnail_url = staged_files[0].url if thumbnail else None
+        image_urls = [f"{base_url}{staged.url}" for staged in staged_files[1 if thumbnail else 0:]]
+
+        # Create the recipe and its ingredient rows in a single transaction
+        db_recipe = RecipeModel(
+            title=title,
+            instructions=instructions,
+            servings=servings,
+            servings_unit=servings_unit,
+            special_equipment=special_equipment,
+            source=source,
+            prep_time=prep_time,
+            cook_time=cook_time,
+            rest_time=rest_time,
+            total_time=total_time,
+            thumbnail_url=thumbnail_url,
+            images_url=image_urls,
+            owner_id=current_user.id
+        )
+        db.add(db_recipe)
+        db.flush()
 
-    # Include translations in the validation map
-    for ingredient in db_ingredients:
-        for translation in ingredient.translations:
-            db_ingredient_map[translation.name.strip().lower()] = ingredient
+        # Add ingredients with optional quantity and unit to the recipe in one executemany
+        db.execute(recipe_ingredients.insert(), [{"recipe_id": db_recipe.id, **row} for row in ingredient_rows])
+        index_recipes(db, [db_recipe.id])
+        db.commit()
+    except Exception:
+        db.rollback()
+        for staged in staged_files:
+            staged.discard()
+        raise
 
-    logger.info(f"Predefined ingredients and translations in database: {list(db_ingredient_map.keys())}")
+    for staged in staged_files:
+        staged.promote()
+        derivative_worker.enqueue(staged.relative_path)
 
-    # Check for invalid ingredients
-    invalid_ingredients = [name for name in ingredient_names if name not in db_ingredient_map]
-    if invalid_ingredients:
-        logger.warning(f"Invalid ingredients: {invalid_ingredients}")
+    db.refresh(db_recipe)
+    logger.info(f"Recipe created successfully: {db_recipe.title}")
+    ingredients_by_recipe = _load_recipe_ingredients(db, [db_recipe.id])
+    return _serialize_recipe(db_recipe, ingredients_by_recipe[db_recipe.id], {"fork_count": 0, "lineage": []}, current_user)
+
+router.include_router(upload_router)
+
+@router.post("/recipes/import", response_model=RecipeImportResult)
+async def import_recipes(request: Request, current_user: TokenData = Depends(get_current_user)):
+    """
+    Import recipes from a JSON Lines body, or from a zip archive with a JSON Lines file
+    and the images it references.
+
+    JSON Lines bodies are imported while they stream in, IMPORT_CHUNK_SIZE recipes per
+    transaction. Invalid lines are reported in the result and don't stop the import.
+    """
+    importer = RecipeImporter(current_user.id)
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    if content_type in NDJSON_CONTENT_TYPES:
+        chunk = []
+        async for line in stream_lines(request.stream()):
+            chunk.append(line)
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                await run_in_threadpool(importer.import_chunk, chunk)
+                chunk = []
+        if chunk:
+            await run_in_threadpool(importer.import_chunk, chunk)
+
+    elif content_type in ZIP_CONTENT_TYPES:
+        # Zip archives are read from the end, so the body is spooled to a temporary file first
+        with tempfile.TemporaryFile() as body:
+            size = 0
+            async for data in request.stream():
+                size += len(data)
+                if size > MAX_IMPORT_ARCHIVE_BYTES:
+                    raise HTTPException(status_code=413, detail=f"The archive exceeds the limit of {MAX_IMPORT_ARCHIVE_BYTES} bytes")
+                await run_in_threadpool(body.write, data)
+            body.seek(0)
+            try:
+                with zipfile.ZipFile(body) as archive:
+                    await run_in_threadpool(import_archive, importer, archive)
+            except (zipfile.BadZipFile, ValueError) as e:
+                raise HTTPException(status_code=400, detail=str(e))
+
+    else:
         raise HTTPException(
-            status_code=400,
-            detail=f"The following ingredients are not valid: {', '.join(invalid_ingredients)}"
+            status_code=415,
+            detail=f"Expected one of {', '.join(sorted(NDJSON_CONTENT_TYPES | ZIP_CONTENT_TYPES))}"
         )
 
-    total_time = sum(filter(None, [prep_time, cook_time, rest_time]))
+    logger.info(f"Imported {importer.imported} recipes for user {current_user.id}, {importer.failed} lines failed")
+    return importer.result
 
-    # Create the recipe in the database
-    db_recipe = RecipeModel(
-        title=title,
-        instructions=instructions,
-        servings=servings,
-        servings_unit=servings_unit,
-        special_equipment=special_equipment,
-        source=source,
-        prep_time=prep_time,
-        cook_time=cook_time,
-        rest_time=rest_time,
-        total_time=total_time,
-        owner_id=current_user.id
-    )
-    db.add(db_recipe)
+@router.post("/recipes/{recipe_id}/fork", response_model=RecipeResponse, status_code=status.HTTP_201_CREATED)
+def create_fork(recipe_id: int, current_user: TokenData = Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    Fork one of the current user's recipes or a recipe shared with them.
+
+    The fork shares the ingredient rows and images of the recipe until it is edited.
+    """
+    recipe = db.get(RecipeModel, recipe_id)
+    if recipe is None:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+    if recipe.owner_id != current_user.id:
+        shared = db.execute(
+            select(SharedRecipe.id).where(SharedRecipe.recipe_id == recipe_id, SharedRecipe.user_id == current_user.id)
+        ).first()
+        if shared is None:
+            raise HTTPException(status_code=404, detail="Recipe not found")
+
+    fork = fork_recipe(db, recipe, current_user.id)
+    index_recipes(db, [fork.id])
     db.commit()
+    db.refresh(fork)
+    logger.info(f"Recipe {recipe.id} forked as {fork.id}")
+
+    ingredients_by_recipe = _load_recipe_ingredients(db, [fork.id])
+    fork_info = _load_fork_info(db, [fork.id], current_user.id)
+    return _serialize_recipe(fork, ingredients_by_recipe[fork.id], fork_info[fork.id], current_user)
+
+@router.patch("/recipes/{recipe_id}", response_model=RecipeResponse)
+def update_recipe(recipe_id: int, changes: RecipeUpdate, current_user: TokenData = Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    Update the fields of a recipe that are given.
+
+    A fork gets its own ingredient rows only when its ingredients are edited; forks still
+    sharing the rows of this recipe get a copy of them before they are replaced.
+    """
+    recipe = db.get(RecipeModel, recipe_id)
+    if recipe is None or recipe.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Recipe not found")
 
-    # Add ingredients with optional quantity and unit to the recipe
-    for ingredient in ingredients:
-        normalized_name = ingredient['name'].strip().lower()
-        db.execute(
-            recipe_ingredients.insert().values(
-                recipe_id=db_recipe.id,
-                ingredient_id=db_ingredient_map[normalized_name].id,
-                quantity=ingredient.get('quantity'),
-                unit=ingredient.get('unit')
-            )
-        )
+    fields = changes.model_dump(exclude_unset=True)
+    ingredients = fields.pop("ingredients", None)
+    if "title" in fields and not fields["title"]:
+        raise HTTPException(status_code=400, detail="Title cannot be empty.")
+    if "special_equipment" in fields:
+        fields["special_equipment"] = [item.strip() for item in fields["special_equipment"] or [] if item.strip()]
+    if "servings_unit" in fields and fields["servings_unit"] is not None:
+        fields["servings_unit"] = RecipeUnit(fields["servings_unit"].value)
+    ingredient_rows = _resolve_ingredients(db, ingredients) if "ingredients" in changes.model_fields_set else None
 
-    uploads_dir = "uploads"
-
-    thumbnail_url = None
-    if thumbnail:
-        thumbnail_path = os.path.join(uploads_dir, thumbnail.filename)
-        with open(thumbnail_path, "wb") as f:
-            shutil.copyfileobj(thumbnail.file, f)
-        thumbnail_url = f"/uploads/{thumbnail.filename}"
-    db_recipe.thumbnail_url = thumbnail_url
-
-    image_urls = []
-    if images:
-        for image in images:
-            image_path = os.path.join(uploads_dir, image.filename)
-            with open(image_path, "wb") as f:
-                shutil.copyfileobj(image.file, f)
-            image_urls.append(f"{base_url}/{image_path.replace(os.sep, '/')}")
-    db_recipe.images_url = image_urls
+    try:
+        for field, value in fields.items():
+            setattr(recipe, field, value)
+        recipe.total_time = sum(filter(None, [recipe.prep_time, recipe.cook_time, recipe.rest_time]))
+
+        if ingredient_rows is not None:
+            detach_forks(db, recipe.id)
+            db.execute(delete(recipe_ingredients).where(recipe_ingredients.c.recipe_id == recipe.id))
+            db.execute(recipe_ingredients.insert(), [{"recipe_id": recipe.id, **row} for row in ingredient_rows])
+            recipe.ingredients_source_id = None
+
+        recipe.changed_at = datetime.utcnow()
+        db.flush()
+        index_recipes(db, [recipe.id])
+        refresh_shares(db, recipe)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
 
-    db.commit()
-    db.refresh(db_recipe)
-    logger.info(f"Recipe created successfully: {db_recipe.title}")
-    return db_recipe
+    db.refresh(recipe)
+    ingredients_by_recipe = _load_recipe_ingredients(db, [recipe.id])
+    fork_info = _load_fork_info(db, [recipe.id], current_user.id)
+    return _serialize_recipe(recipe, ingredients_by_recipe[recipe.id], fork_info[recipe.id], current_user)
 
 @router.delete("/recipes/{recipe_id}", status_code=204)
-def delete_recipe(recipe_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+def delete_recipe(recipe_id: int, db: Session = Depends(get_db), current_user: TokenData = Depends(get_current_user)):
     recipe = db.query(RecipeModel).filter(RecipeModel.id == recipe_id).first()
 
     if not recipe:
@@ -255,6 +605,16 @@ def delete_recipe(recipe_id: int, db: Session = Depends(get_db), current_user: U
         raise HTTPException(status_code=403, detail="You do not have permission to delete this recipe")
 
     try:
+        # Forks keep their ingredients and lose only the link to the deleted recipe
+        detach_forks(db, recipe.id)
+        db.execute(
+            update(RecipeModel)
+            .where(RecipeModel.original_id == recipe.id)
+            .values(original_id=None, changed_at=RecipeModel.changed_at)
+        )
+        remove_recipes(db, [recipe.id])
+        remove_shares(db, [recipe.id])
+        remove_cookbook_entries(db, [recipe.id])
         db.delete(recipe)
         db.commit()
         return
@@ -263,25 +623,28 @@ def delete_recipe(recipe_id: int, db: Session = Depends(get_db), current_user: U
         raise HTTPException(status_code=500, detail="Error deleting recipe")
 
 @router.get("/recipes/filter/by-ingredient")
-def get_recipes_by_ingredient(
+async def get_recipes_by_ingredient(
     ingredient_id: int = Query(..., description="The ID of the ingredient to filter recipes by"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         # Ensure ingredient_id is a valid integer
         if not isinstance(ingredient_id, int) or ingredient_id <= 0:
             raise HTTPException(status_code=422, detail="Invalid ingredient_id")
 
-        # Validate that the ingredient exists
-        ingredient = db.query(Ingredient).filter(Ingredient.id == ingredient_id).first()
-        if not ingredient:
-            raise HTTPException(status_code=404, detail="Ingredient not found")
-
         # Fetch recipes that use the ingredient
-        recipes = db.query(RecipeModel).join(recipe_ingredients).filter(
-            recipe_ingredients.c.ingredient_id == ingredient_id
-        ).all()
+        recipes = (await db.execute(
+            select(RecipeModel)
+            .join(recipe_ingredients, recipe_ingredients.c.recipe_id == ingredients_recipe_id)
+            .where(recipe_ingredients.c.ingredient_id == ingredient_id)
+        )).scalars().all()
+
+        # Only an empty result needs to tell an unused ingredient from an unknown one
+        if not recipes and not await db.get(Ingredient, ingredient_id):
+            raise HTTPException(status_code=404, detail="Ingredient not found")
 
         return recipes
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail="Error processing request")
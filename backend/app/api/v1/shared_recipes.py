@@ -0,0 +1,81 @@
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.app.db import get_async_db, get_db
+from backend.app.models import Recipe, SharedRecipe
+from backend.app.models.user import cookbook_users
+from backend.app.schemas import SharedRecipeCreate, SharedRecipePage, SharedRecipeResult, TokenData
+from backend.app.services.images import derivative_urls
+from backend.app.services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, after_cursor, encode_cursor
+from backend.app.services.sharing import share_recipe
+from backend.app.utils import get_current_user
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.post("/recipes/{recipe_id}/shares", response_model=SharedRecipeResult)
+def create_shares(recipe_id: int, shares: SharedRecipeCreate, current_user: TokenData = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Share a recipe with users and/or every member of a cookbook."""
+    recipe = db.get(Recipe, recipe_id)
+    if recipe is None or recipe.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Recipe not found")
+
+    if shares.cookbook_id is not None:
+        is_member = db.execute(
+            select(cookbook_users.c.cookbook_id).where(
+                cookbook_users.c.cookbook_id == shares.cookbook_id,
+                cookbook_users.c.user_id == current_user.id
+            )
+        ).first()
+        if is_member is None:
+            raise HTTPException(status_code=404, detail="Cookbook not found")
+
+    try:
+        shared = share_recipe(db, recipe.id, current_user.id, shares.user_ids, shares.cookbook_id)
+        db.commit()
+    except IntegrityError:
+        # Another request shared the recipe with one of the recipients at the same time
+        db.rollback()
+        raise HTTPException(status_code=409, detail="The recipe is being shared concurrently, please retry")
+
+    logger.info(f"Recipe {recipe.id} shared with {shared} users")
+    return {"shared": shared}
+
+@router.get("/shared-recipes", response_model=SharedRecipePage)
+async def read_shared_recipes(
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor of the previous page"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: TokenData = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    List the recipes shared with the current user, most recently shared first.
+
+    Every inbox row carries the summary of its recipe, so a page is one range scan on
+    (user_id, created_at, id) without joining recipes, users or ingredients.
+    """
+    statement = select(SharedRecipe).where(SharedRecipe.user_id == current_user.id)
+    if cursor:
+        statement = statement.where(after_cursor(SharedRecipe.created_at, SharedRecipe.id, cursor))
+    statement = statement.order_by(SharedRecipe.created_at.desc(), SharedRecipe.id.desc()).limit(limit + 1)
+
+    shares = (await db.execute(statement)).scalars().all()
+    next_cursor = None
+    if len(shares) > limit:
+        shares = shares[:limit]
+        next_cursor = encode_cursor(shares[-1].created_at, shares[-1].id)
+
+    items = [
+        {
+            **{column: getattr(share, column) for column in SharedRecipe.__table__.columns.keys()},
+            "thumbnail_derivatives": derivative_urls(share.thumbnail_url)
+        }
+        for share in shares
+    ]
+    return {"items": items, "next_cursor": next_cursor}
@@ -1 +1,2 @@
-from .session import SessionLocal, get_db
\ No newline at end of file
+from .session import SessionLocal, get_db
+from .async_session import AsyncSessionLocal, get_async_db
\ No newline at end of file
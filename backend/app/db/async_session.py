@@ -0,0 +1,64 @@
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from backend.app.db.session import (
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    SQLALCHEMY_DATABASE_URL,
+    SQLITE_BUSY_TIMEOUT_MS,
+    InstrumentedQueuePool,
+    PoolMetrics,
+    _set_sqlite_pragmas,
+    instrument_pool,
+)
+
+# Async driver used for each database backend
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+async_pool_metrics = PoolMetrics()
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout waits like the pool of the sync engine."""
+
+    metrics = async_pool_metrics
+
+def _async_url(url: str):
+    """Return the configured database URL with the async driver of its backend."""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+def _create_async_engine(url: str):
+    async_url = _async_url(url)
+    if async_url.get_backend_name() == "sqlite":
+        engine = create_async_engine(
+            async_url,
+            poolclass=InstrumentedAsyncQueuePool,
+            connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        )
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+        return engine
+
+    return create_async_engine(
+        async_url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+    )
+
+async_engine = _create_async_engine(SQLALCHEMY_DATABASE_URL)
+instrument_pool("async", async_engine.sync_engine, async_pool_metrics)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
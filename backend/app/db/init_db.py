@@ -1,5 +1,26 @@
+import logging
+import os
+
 from backend.app.db.base_class import Base
-from backend.app.db.session import engine
+from backend.app.db.migrations import upgrade
+from backend.app.db.seed import seed_ingredients
+from backend.app.db.session import SessionLocal, engine
+from backend.app.services.catalogue import ensure_catalogue_version
+
+logger = logging.getLogger(__name__)
+
+INGREDIENTS_FILE_PATH = os.getenv("INGREDIENTS_FILE_PATH")
 
 def init_db():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
+    upgrade(engine)
+    with SessionLocal() as db:
+        ensure_catalogue_version(db)
+        if INGREDIENTS_FILE_PATH:
+            seed_ingredients(db, INGREDIENTS_FILE_PATH)
+        else:
+            logger.warning("INGREDIENTS_FILE_PATH is not set; predefined ingredients are not seeded")
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    init_db()
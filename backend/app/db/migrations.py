@@ -0,0 +1,423 @@
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, String, Table, bindparam, delete, func, inspect, insert, select, text, update
+from sqlalchemy.engine import Connection, Engine
+
+from backend.app.db.base_class import Base
+from backend.app.models import Cookbook, CookbookChapter, CookbookRecipe, CookbookRecipeFeedback, Ingredient, IngredientTranslation, Recipe, SharedRecipe, User, recipe_ingredients
+from backend.app.models.user import cookbook_users
+from backend.app.services.ingredient_index import normalize_name
+from backend.app.services.ordering import GAP
+from backend.app.services.search import backfill_search_index, create_search_index, drop_search_index
+
+logger = logging.getLogger(__name__)
+
+# Revisions that have been applied to the database
+schema_migrations = Table(
+    "schema_migrations",
+    Base.metadata,
+    Column("revision", String(100), primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# Progress of the data backfills: the id of the last processed row and when they finished
+data_migrations = Table(
+    "data_migrations",
+    Base.metadata,
+    Column("name", String(100), primary_key=True),
+    Column("last_id", Integer, nullable=False),
+    Column("completed_at", DateTime, nullable=True),
+)
+
+BACKFILL_BATCH_SIZE = int(os.getenv("BACKFILL_BATCH_SIZE", 500))
+BACKFILL_PAUSE_SECONDS = float(os.getenv("BACKFILL_PAUSE_SECONDS", 0.05))
+RUN_BACKFILLS_AT_STARTUP = os.getenv("RUN_BACKFILLS_AT_STARTUP", "true").lower() == "true"
+
+def _add_column(connection: Connection, table_name: str, column_name: str, definition: str):
+    """Add a column unless the table already has it."""
+    columns = {column["name"] for column in inspect(connection).get_columns(table_name)}
+    if column_name not in columns:
+        connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}"))
+
+def _add_user_token_version(connection: Connection):
+    _add_column(connection, "users", "token_version", "INTEGER NOT NULL DEFAULT 0")
+
+# Indexes of the recipes table that no query uses; they only slowed down every write
+OBSOLETE_RECIPE_INDEXES = [
+    "ix_recipes_id",
+    "ix_recipes_servings",
+    "ix_recipes_servings_unit",
+    "ix_recipes_special_equipment",
+    "ix_recipes_instructions",
+    "ix_recipes_thumbnail_url",
+    "ix_recipes_images_url",
+    "ix_recipes_source",
+    "ix_recipes_prep_time",
+    "ix_recipes_cook_time",
+    "ix_recipes_rest_time",
+    "ix_recipes_total_time",
+    "ix_recipes_added_at",
+    "ix_recipes_changed_at",
+]
+
+# Indexes added by the audit; later revisions create their own
+AUDITED_RECIPE_INDEXES = ["ix_recipes_title", "ix_recipes_owner_id_changed_at", "ix_recipe_ingredients_ingredient_id_recipe_id"]
+
+def _recipe_index_audit(connection: Connection):
+    for name in OBSOLETE_RECIPE_INDEXES:
+        connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+    for index in [*Recipe.__table__.indexes, *recipe_ingredients.indexes]:
+        if index.name in AUDITED_RECIPE_INDEXES:
+            index.create(connection, checkfirst=True)
+
+def _cookbook_rating_aggregates(connection: Connection):
+    _add_column(connection, "cookbook_recipes", "rating_count", "INTEGER NOT NULL DEFAULT 0")
+    _add_column(connection, "cookbook_recipes", "rating_sum", "FLOAT NOT NULL DEFAULT 0")
+    for model in (CookbookRecipe, CookbookRecipeFeedback, CookbookChapter):
+        for index in model.__table__.indexes:
+            index.create(connection, checkfirst=True)
+
+def _shared_recipe_inbox(connection: Connection):
+    _add_column(connection, "shared_recipes", "shared_by_id", "INTEGER REFERENCES users (id)")
+    _add_column(connection, "shared_recipes", "cookbook_id", "INTEGER REFERENCES cookbooks (id)")
+    _add_column(connection, "shared_recipes", "title", "VARCHAR")
+    _add_column(connection, "shared_recipes", "thumbnail_url", "VARCHAR")
+    _add_column(connection, "shared_recipes", "total_time", "INTEGER")
+    _add_column(connection, "shared_recipes", "owner_id", "INTEGER REFERENCES users (id)")
+    _add_column(connection, "shared_recipes", "owner_username", "VARCHAR")
+    for index in [*SharedRecipe.__table__.indexes, *cookbook_users.indexes]:
+        index.create(connection, checkfirst=True)
+
+def _recipe_forks(connection: Connection):
+    _add_column(connection, "recipes", "ingredients_source_id", "INTEGER REFERENCES recipes (id)")
+    for index in Recipe.__table__.indexes:
+        if index.name in ("ix_recipes_original_id", "ix_recipes_ingredients_source_id"):
+            index.create(connection, checkfirst=True)
+
+def _ingredient_seed_key(connection: Connection):
+    creator_id = next(column for column in inspect(connection).get_columns("ingredients") if column["name"] == "creator_id")
+    if not creator_id["nullable"]:
+        if connection.dialect.name == "sqlite":
+            # SQLite can't change the constraints of a column, so the table is rebuilt.
+            # Foreign keys aren't enforced, and the references to it keep its name.
+            connection.execute(text(
+                "CREATE TABLE ingredients_rebuild ("
+                "id INTEGER NOT NULL PRIMARY KEY, "
+                "creator_id INTEGER REFERENCES users (id), "
+                "name VARCHAR(255) NOT NULL, "
+                "language VARCHAR(20) NOT NULL)"
+            ))
+            connection.execute(text(
+                "INSERT INTO ingredients_rebuild (id, creator_id, name, language) "
+                "SELECT id, creator_id, name, language FROM ingredients"
+            ))
+            connection.execute(text("DROP TABLE ingredients"))
+            connection.execute(text("ALTER TABLE ingredients_rebuild RENAME TO ingredients"))
+        else:
+            connection.execute(text("ALTER TABLE ingredients ALTER COLUMN creator_id DROP NOT NULL"))
+    _add_column(connection, "ingredients", "seed_id", "INTEGER")
+    for index in Ingredient.__table__.indexes:
+        index.create(connection, checkfirst=True)
+
+def _recipe_search_owner(connection: Connection):
+    # The index gained an owner column and prefix indexes; the recipe_search_index
+    # backfill fills the new table again
+    drop_search_index(connection)
+    create_search_index(connection)
+    data_migrations.create(connection, checkfirst=True)
+    connection.execute(delete(data_migrations).where(data_migrations.c.name == "recipe_search_index"))
+
+def _ingredient_normalized_names(connection: Connection):
+    # Filled here rather than in a backfill, as lookups by name only see filled rows.
+    # The catalogue is small, and SQL lower() would only fold ASCII letters.
+    for model in (Ingredient, IngredientTranslation):
+        table = model.__table__
+        _add_column(connection, table.name, "normalized_name", "VARCHAR(255)")
+        rows = connection.execute(select(table.c.id, table.c.name).where(table.c.normalized_name.is_(None))).all()
+        if rows:
+            connection.execute(
+                update(table).where(table.c.id == bindparam("row_id")).values(normalized_name=bindparam("normalized")),
+                [{"row_id": row.id, "normalized": normalize_name(row.name)} for row in rows]
+            )
+        for index in table.indexes:
+            if index.name == f"ix_{table.name}_normalized_name":
+                index.create(connection, checkfirst=True)
+
+# Ordered list of revisions; never reorder or rename an entry once it has been released.
+# Databases created from the current models already match every revision, so each one
+# must be safe to run against them.
+REVISIONS: List[Tuple[str, Callable[[Connection], None]]] = [
+    ("0001_user_token_version", _add_user_token_version),
+    ("0002_recipe_index_audit", _recipe_index_audit),
+    ("0003_recipe_search", create_search_index),
+    ("0004_cookbook_rating_aggregates", _cookbook_rating_aggregates),
+    ("0005_shared_recipe_inbox", _shared_recipe_inbox),
+    ("0006_recipe_forks", _recipe_forks),
+    ("0007_ingredient_seed_key", _ingredient_seed_key),
+    ("0008_recipe_search_owner", _recipe_search_owner),
+    ("0009_ingredient_normalized_names", _ingredient_normalized_names),
+]
+
+def _recompute_total_time(connection: Connection, after_id: int, batch_size: int) -> Optional[int]:
+    recipes = Recipe.__table__
+    rows = connection.execute(
+        select(recipes.c.id, recipes.c.prep_time, recipes.c.cook_time, recipes.c.rest_time, recipes.c.total_time)
+        .where(recipes.c.id > after_id)
+        .order_by(recipes.c.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return None
+
+    changed = []
+    for row in rows:
+        total_time = sum(filter(None, [row.prep_time, row.cook_time, row.rest_time]))
+        if row.total_time != total_time:
+            changed.append({"recipe_id": row.id, "total_time": total_time})
+    if changed:
+        # Keep changed_at as it is; a recomputed total is not an edit by the owner
+        connection.execute(
+            update(recipes)
+            .where(recipes.c.id == bindparam("recipe_id"))
+            .values(total_time=bindparam("total_time"), changed_at=recipes.c.changed_at),
+            changed
+        )
+    return rows[-1].id
+
+def _recompute_rating_aggregates(connection: Connection, after_id: int, batch_size: int) -> Optional[int]:
+    entries = CookbookRecipe.__table__
+    feedback = CookbookRecipeFeedback.__table__
+    entry_ids = connection.execute(
+        select(entries.c.id).where(entries.c.id > after_id).order_by(entries.c.id).limit(batch_size)
+    ).scalars().all()
+    if not entry_ids:
+        return None
+
+    totals = {
+        row.cookbook_recipe_id: row
+        for row in connection.execute(
+            select(feedback.c.cookbook_recipe_id, func.count(feedback.c.rating).label("count"), func.sum(feedback.c.rating).label("sum"))
+            .where(feedback.c.cookbook_recipe_id.in_(entry_ids))
+            .group_by(feedback.c.cookbook_recipe_id)
+        )
+    }
+    connection.execute(
+        update(entries)
+        .where(entries.c.id == bindparam("entry_id"))
+        .values(rating_count=bindparam("count"), rating_sum=bindparam("sum")),
+        [
+            {
+                "entry_id": entry_id,
+                "count": totals[entry_id].count if entry_id in totals else 0,
+                "sum": (totals[entry_id].sum or 0) if entry_id in totals else 0,
+            }
+            for entry_id in entry_ids
+        ]
+    )
+    return entry_ids[-1]
+
+def _spread_cookbook_positions(connection: Connection, after_id: int, batch_size: int) -> Optional[int]:
+    # Positions used to be 1, 2, 3, ...; moves need room between neighbours
+    cookbook_ids = connection.execute(
+        select(Cookbook.id).where(Cookbook.id > after_id).order_by(Cookbook.id).limit(batch_size)
+    ).scalars().all()
+    if not cookbook_ids:
+        return None
+
+    for table in (CookbookChapter.__table__, CookbookRecipe.__table__):
+        rows = connection.execute(
+            select(table.c.id, table.c.cookbook_id)
+            .where(table.c.cookbook_id.in_(cookbook_ids))
+            .order_by(table.c.cookbook_id, table.c.position, table.c.id)
+        ).all()
+        positions, ranks = [], {}
+        for row in rows:
+            ranks[row.cookbook_id] = ranks.get(row.cookbook_id, 0) + 1
+            positions.append({"item_id": row.id, "new_position": ranks[row.cookbook_id] * GAP})
+        if positions:
+            connection.execute(
+                update(table).where(table.c.id == bindparam("item_id")).values(position=bindparam("new_position")),
+                positions
+            )
+    return cookbook_ids[-1]
+
+def _copy_shared_recipe_summaries(connection: Connection, after_id: int, batch_size: int) -> Optional[int]:
+    shares = SharedRecipe.__table__
+    rows = connection.execute(
+        select(shares.c.id, Recipe.title, Recipe.thumbnail_url, Recipe.total_time, Recipe.owner_id, User.username)
+        .join(Recipe, Recipe.id == shares.c.recipe_id)
+        .join(User, User.id == Recipe.owner_id)
+        .where(shares.c.id > after_id)
+        .order_by(shares.c.id)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return None
+
+    connection.execute(
+        update(shares)
+        .where(shares.c.id == bindparam("share_id"))
+        .values(
+            title=bindparam("shared_title"),
+            thumbnail_url=bindparam("shared_thumbnail_url"),
+            total_time=bindparam("shared_total_time"),
+            owner_id=bindparam("shared_owner_id"),
+            owner_username=bindparam("shared_owner_username")
+        ),
+        [
+            {
+                "share_id": row.id,
+                "shared_title": row.title,
+                "shared_thumbnail_url": row.thumbnail_url,
+                "shared_total_time": row.total_time,
+                "shared_owner_id": row.owner_id,
+                "shared_owner_username": row.username,
+            }
+            for row in rows
+        ]
+    )
+    return rows[-1].id
+
+# Data migrations that rewrite existing rows. Each one processes the rows after the given
+# id in one batch and returns the last id it processed, or None once there are no rows
+# left. Every batch commits together with its checkpoint, so an interrupted backfill
+# continues where it stopped and never holds locks for longer than one batch.
+BACKFILLS: List[Tuple[str, Callable[[Connection, int, int], Optional[int]]]] = [
+    ("recipes_total_time", _recompute_total_time),
+    ("recipe_search_index", backfill_search_index),
+    ("cookbook_rating_aggregates", _recompute_rating_aggregates),
+    ("cookbook_positions", _spread_cookbook_positions),
+    ("shared_recipe_summaries", _copy_shared_recipe_summaries),
+]
+
+def upgrade(engine: Engine) -> List[str]:
+    """
+    Apply all pending revisions, each in its own transaction.
+
+    Returns:
+        The revisions that were applied.
+    """
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        applied = set(connection.execute(select(schema_migrations.c.revision)).scalars())
+
+    newly_applied = []
+    for revision, apply in REVISIONS:
+        if revision in applied:
+            continue
+        with engine.begin() as connection:
+            apply(connection)
+            connection.execute(insert(schema_migrations).values(revision=revision, applied_at=datetime.utcnow()))
+        logger.info(f"Applied migration {revision}")
+        newly_applied.append(revision)
+    return newly_applied
+
+def run_backfills(
+    engine: Engine,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+    pause: float = BACKFILL_PAUSE_SECONDS,
+    stop_event: Optional[threading.Event] = None
+) -> bool:
+    """
+    Run the unfinished backfills batch by batch, pausing between batches to leave room
+    for regular traffic.
+
+    Returns:
+        Whether all backfills are complete; False if stop_event interrupted them.
+    """
+    data_migrations.create(engine, checkfirst=True)
+    for name, process_batch in BACKFILLS:
+        with engine.begin() as connection:
+            progress = connection.execute(select(data_migrations).where(data_migrations.c.name == name)).first()
+            if progress is None:
+                connection.execute(insert(data_migrations).values(name=name, last_id=0))
+        if progress is not None and progress.completed_at is not None:
+            continue
+
+        last_id = progress.last_id if progress is not None else 0
+        logger.info(f"Running backfill {name} from id {last_id}")
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                logger.info(f"Interrupted backfill {name} after id {last_id}")
+                return False
+            with engine.begin() as connection:
+                next_id = process_batch(connection, last_id, batch_size)
+                values = {"last_id": next_id} if next_id is not None else {"completed_at": datetime.utcnow()}
+                connection.execute(update(data_migrations).where(data_migrations.c.name == name).values(**values))
+            if next_id is None:
+                logger.info(f"Completed backfill {name}")
+                break
+            last_id = next_id
+            time.sleep(pause)
+    return True
+
+class BackfillRunner:
+    """Runs the pending backfills in a background thread, so startup doesn't wait for them."""
+
+    def __init__(self, engine: Engine):
+        self._engine = engine
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    def start(self):
+        if not RUN_BACKFILLS_AT_STARTUP:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="backfills", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop after the current batch; the backfills resume from there on the next start."""
+        if self._thread:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        try:
+            run_backfills(self._engine, stop_event=self._stop_event)
+        except Exception as e:
+            logger.error(f"Backfills failed: {e}")
+
+def status(engine: Engine):
+    """Print the applied and pending revisions and the progress of each backfill."""
+    schema_migrations.create(engine, checkfirst=True)
+    data_migrations.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        applied = dict(connection.execute(select(schema_migrations.c.revision, schema_migrations.c.applied_at)).all())
+        progress = {row.name: row for row in connection.execute(select(data_migrations))}
+
+    for revision, _ in REVISIONS:
+        print(f"{revision}: {'applied ' + str(applied[revision]) if revision in applied else 'pending'}")
+    for name, _ in BACKFILLS:
+        row = progress.get(name)
+        if row is None:
+            state = "pending"
+        elif row.completed_at is None:
+            state = f"in progress after id {row.last_id}"
+        else:
+            state = f"completed {row.completed_at}"
+        print(f"backfill {name}: {state}")
+
+if __name__ == "__main__":
+    from backend.app.db.session import engine
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Manage the database schema and data migrations.")
+    parser.add_argument("command", choices=["upgrade", "backfill", "status"])
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.command == "upgrade":
+        Base.metadata.create_all(bind=engine)
+        upgrade(engine)
+    elif args.command == "backfill":
+        run_backfills(engine, batch_size=args.batch_size)
+    else:
+        status(engine)
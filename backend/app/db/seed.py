@@ -0,0 +1,144 @@
+import hashlib
+import json
+import logging
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, String, Table, bindparam, insert, select, update
+from sqlalchemy.orm import Session
+
+from backend.app.db.base_class import Base
+from backend.app.models import Ingredient, IngredientTranslation
+from backend.app.services.catalogue import bump_catalogue_version
+from backend.app.services.ingredient_index import normalize_name
+
+logger = logging.getLogger(__name__)
+
+# Checksum of the last applied version of each seed file
+seed_versions = Table(
+    "seed_versions",
+    Base.metadata,
+    Column("name", String(100), primary_key=True),
+    Column("checksum", String(64), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+INGREDIENTS_SEED = "ingredients"
+
+def seed_ingredients(db: Session, filepath: str) -> bool:
+    """
+    Apply the predefined ingredients and their translations from a JSON seed file.
+
+    The file is only processed when its checksum differs from the last applied one. In
+    that case the missing and changed rows are written with bulk statements in a single
+    transaction; ingredients removed from the file are kept, as recipes may use them.
+
+    Entries are matched to rows by seed_id, which holds the id of the entry in the file;
+    the database assigns the ids of the rows. An entry without a row adopts a predefined
+    ingredient with the same name and language, or one seeded with the id of the entry
+    before seed_id existed, instead of creating a duplicate. Other ingredients created by
+    users are never matched, so the seed can't rename them.
+
+    Returns:
+        Whether the catalogue was changed.
+    """
+    with open(filepath, "rb") as file:
+        raw = file.read()
+    checksum = hashlib.sha256(raw).hexdigest()
+
+    applied_checksum = db.execute(
+        select(seed_versions.c.checksum).where(seed_versions.c.name == INGREDIENTS_SEED)
+    ).scalar_one_or_none()
+    if applied_checksum == checksum:
+        return False
+
+    predefined_ingredients = json.loads(raw)
+
+    seeded_ingredients, unseeded_ingredients, unseeded_predefined = {}, {}, {}
+    for row in db.execute(select(Ingredient.id, Ingredient.seed_id, Ingredient.creator_id, Ingredient.name, Ingredient.language)):
+        if row.seed_id is not None:
+            seeded_ingredients[row.seed_id] = (row.id, row.name, row.language)
+        else:
+            unseeded_ingredients[row.id] = (row.name, row.language)
+            if row.creator_id is None:
+                unseeded_predefined.setdefault((row.name, row.language), row.id)
+
+    new_ingredients, adopted_ingredients, changed_ingredients = [], [], []
+    for ingredient in predefined_ingredients:
+        values = (ingredient["name"], ingredient["language"])
+        existing = seeded_ingredients.get(ingredient["id"])
+        if existing is None:
+            adopted_id = unseeded_predefined.get(values)
+            if adopted_id is None and unseeded_ingredients.get(ingredient["id"]) == values:
+                adopted_id = ingredient["id"]
+            if adopted_id is None or adopted_id not in unseeded_ingredients:
+                new_ingredients.append({"seed_id": ingredient["id"], "name": values[0], "normalized_name": normalize_name(values[0]), "language": values[1], "creator_id": None})
+            else:
+                del unseeded_ingredients[adopted_id]
+                adopted_ingredients.append({"b_id": adopted_id, "seed_id": ingredient["id"]})
+                seeded_ingredients[ingredient["id"]] = (adopted_id, *values)
+        elif existing[1:] != values:
+            changed_ingredients.append({"b_id": existing[0], "name": values[0], "normalized_name": normalize_name(values[0]), "language": values[1]})
+
+    if new_ingredients:
+        for row in db.execute(insert(Ingredient).returning(Ingredient.id, Ingredient.seed_id), new_ingredients):
+            seeded_ingredients[row.seed_id] = (row.id, None, None)
+    if adopted_ingredients:
+        db.execute(
+            update(Ingredient.__table__)
+            .where(Ingredient.__table__.c.id == bindparam("b_id"))
+            .values(seed_id=bindparam("seed_id")),
+            adopted_ingredients
+        )
+
+    existing_translations = {
+        (row.ingredient_id, row.language): (row.id, row.name)
+        for row in db.execute(
+            select(IngredientTranslation.id, IngredientTranslation.ingredient_id, IngredientTranslation.language, IngredientTranslation.name)
+        )
+    }
+    new_translations, changed_translations = [], []
+    for ingredient in predefined_ingredients:
+        ingredient_id = seeded_ingredients[ingredient["id"]][0]
+        for language, name in ingredient.get("translations", {}).items():
+            existing = existing_translations.get((ingredient_id, language))
+            if existing is None:
+                new_translations.append({"ingredient_id": ingredient_id, "language": language, "name": name, "normalized_name": normalize_name(name)})
+            elif existing[1] != name:
+                changed_translations.append({"b_id": existing[0], "name": name, "normalized_name": normalize_name(name)})
+
+    if changed_ingredients:
+        db.execute(
+            update(Ingredient.__table__)
+            .where(Ingredient.__table__.c.id == bindparam("b_id"))
+            .values(name=bindparam("name"), normalized_name=bindparam("normalized_name"), language=bindparam("language")),
+            changed_ingredients
+        )
+    if new_translations:
+        db.execute(insert(IngredientTranslation), new_translations)
+    if changed_translations:
+        db.execute(
+            update(IngredientTranslation.__table__)
+            .where(IngredientTranslation.__table__.c.id == bindparam("b_id"))
+            .values(name=bindparam("name"), normalized_name=bindparam("normalized_name")),
+            changed_translations
+        )
+
+    changed = bool(new_ingredients or adopted_ingredients or changed_ingredients or new_translations or changed_translations)
+    if changed:
+        bump_catalogue_version(db)
+
+    if applied_checksum is None:
+        db.execute(insert(seed_versions).values(name=INGREDIENTS_SEED, checksum=checksum, applied_at=datetime.utcnow()))
+    else:
+        db.execute(
+            update(seed_versions)
+            .where(seed_versions.c.name == INGREDIENTS_SEED)
+            .values(checksum=checksum, applied_at=datetime.utcnow())
+        )
+    db.commit()
+
+    logger.info(
+        f"Applied ingredient seed: {len(new_ingredients)} new, {len(adopted_ingredients)} adopted and {len(changed_ingredients)} changed ingredients, "
+        f"{len(new_translations)} new and {len(changed_translations)} changed translations"
+    )
+    return changed
@@ -1,14 +1,138 @@
-from sqlalchemy import create_engine
+import os
+import threading
+import time
+from typing import Dict, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+
+# Connection pool settings for server databases
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))  #Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  #Seconds before a connection is replaced
+
+# SQLite tuning
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+
+class PoolMetrics:
+    """Counters describing how busy the connection pool is, used to size workers and pools."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checked_out = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.timeouts += 1
+
+    def record_checkout(self):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+
+    def record_checkin(self):
+        with self._lock:
+            self.checked_out -= 1
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+    def record_connect(self):
+        with self._lock:
+            self.connects += 1
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+pool_metrics = PoolMetrics()
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection in its metrics."""
+
+    metrics = pool_metrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+# Engines whose pools are reported by pool_status, by name
+_instrumented_engines: Dict[str, Tuple[Engine, PoolMetrics]] = {}
+
+def instrument_pool(name: str, engine: Engine, metrics: PoolMetrics):
+    """Count the connections of an engine's pool in metrics and report it in pool_status under name."""
+    event.listen(engine, "connect", lambda *args: metrics.record_connect())
+    event.listen(engine, "checkout", lambda *args: metrics.record_checkout())
+    event.listen(engine, "checkin", lambda *args: metrics.record_checkin())
+    _instrumented_engines[name] = (engine, metrics)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run concurrently with the single writer, and NORMAL sync only
+    # fsyncs at checkpoints, which is safe in WAL mode
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+def _create_engine(url: str):
+    if url.startswith("sqlite"):
+        engine = create_engine(
+            url,
+            poolclass=InstrumentedQueuePool,
+            connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        )
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    else:
+        engine = create_engine(
+            url,
+            poolclass=InstrumentedQueuePool,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+    return engine
+
+engine = _create_engine(SQLALCHEMY_DATABASE_URL)
+instrument_pool("sync", engine, pool_metrics)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def pool_status() -> Dict[str, dict]:
+    """Return the current state of each connection pool and its cumulative wait metrics, by engine."""
+    return {
+        name: {
+            "size": instrumented_engine.pool.size(),
+            "checked_out": metrics.checked_out,
+            "overflow": instrumented_engine.pool.overflow(),
+            "checkouts": metrics.checkouts,
+            "connects": metrics.connects,
+            "timeouts": metrics.timeouts,
+            "wait_seconds_total": round(metrics.wait_seconds_total, 6),
+            "wait_seconds_max": round(metrics.wait_seconds_max, 6),
+        }
+        for name, (instrumented_engine, metrics) in _instrumented_engines.items()
+    }
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -1,29 +1,50 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.exc import SQLAlchemyError
-from starlette.middleware.base import BaseHTTPMiddleware
 
+from backend.app.access_log import AccessLogMiddleware, access_log
 from backend.app.api.v1 import users
 from backend.app.api.v1.auth import router as auth_router
+from backend.app.api.v1.cookbooks import router as cookbooks_router
 from backend.app.api.v1.recipes import router as recipes_router
+from backend.app.api.v1.shared_recipes import router as shared_recipes_router
 from backend.app.api.v1.ingredients import router as ingredients_router
 from backend.app.api.v1.users import router as users_router
 from backend.app.db.init_db import init_db
+from backend.app.db.migrations import BackfillRunner
+from backend.app.db.async_session import async_engine
+from backend.app.db.session import engine, pool_status
+from backend.app.metrics import MetricsMiddleware, render_metrics
+from backend.app.services.images import derivative_worker
+from backend.app.services.search import search_reindexer
+from backend.app.services.uploads import remove_stale_staging_files
 
 import os
 
 FRONTEND_BASE_URL = os.getenv("FRONTEND_BASE_URL")
 
+backfill_runner = BackfillRunner(engine)
+
 # Initialize the database
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    access_log.start()
     print("Initializing database...")
     init_db()
+    remove_stale_staging_files()
+    derivative_worker.start()
+    backfill_runner.start()
+    search_reindexer.start()
     yield
     print("Shutting down...")
+    derivative_worker.stop()
+    backfill_runner.stop()
+    search_reindexer.stop()
+    await async_engine.dispose()
+    access_log.stop()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -35,19 +56,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-class LogRequestMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        content_type = request.headers.get("content-type", "")
-        if "multipart/form-data" in content_type:
-            print("Incoming request with multipart/form-data")
-        else:
-            body = await request.body()
-            print("Incoming request data:", body.decode("utf-8", errors="replace"))
-        response = await call_next(request)
-        return response
+# Record per-route latency and SQL statement counts
+app.add_middleware(MetricsMiddleware)
 
-# Add middleware to log incoming requests
-app.add_middleware(LogRequestMiddleware)
+# Log every request; added last so it is the outermost middleware and times everything
+app.add_middleware(AccessLogMiddleware)
 
 # Mount the uploads directory as a static files route
 app.mount("/uploads", StaticFiles(directory=os.getenv("UPLOADS_DIR")), name="uploads")
@@ -70,6 +83,16 @@ async def sqlalchemy_exception_handler(request, exc):
 def read_root():
     return {"message": "Welcome!"}
 
+@app.get("/health/db")
+def database_pool_status():
+    """Connection pool usage and checkout wait times of the sync and async engines, for sizing workers and pools."""
+    return pool_status()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Request and connection pool metrics in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/test-cors")
 def test_cors():
     return {"message": "CORS is working!"}
@@ -77,4 +100,6 @@ def test_cors():
 app.include_router(auth_router, prefix="/api/auth", tags=["auth"])
 app.include_router(users_router, prefix="/api", tags=["users"])
 app.include_router(recipes_router, prefix="/api", tags=["recipes"])
-app.include_router(ingredients_router, prefix="/api", tags=["ingredients"])
\ No newline at end of file
+app.include_router(ingredients_router, prefix="/api", tags=["ingredients"])
+app.include_router(cookbooks_router, prefix="/api", tags=["cookbooks"])
+app.include_router(shared_recipes_router, prefix="/api", tags=["shared recipes"])
\ No newline at end of file
@@ -0,0 +1,177 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+from backend.app.access_log import access_log
+from backend.app.db.async_session import async_engine
+from backend.app.db.session import engine, pool_status
+
+# Requests slower than this many milliseconds are logged with their SQL statements; 0 disables the log
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", 0))
+MAX_LOGGED_STATEMENT_LENGTH = 1000
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+logger = logging.getLogger(__name__)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class Histogram:
+    """A Prometheus histogram with labels, rendered in the text exposition format."""
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # Label values -> per-bucket counts (not cumulative), sum and count
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for label_values, (counts, total, count) in sorted(series.items()):
+            labels = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, bucket_count in zip([*self.buckets, "+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Time spent handling HTTP requests.",
+    ("method", "route", "status"), LATENCY_BUCKETS
+)
+request_statements = Histogram(
+    "http_request_db_statements", "SQL statements executed per HTTP request.",
+    ("method", "route"), STATEMENT_BUCKETS
+)
+request_db_duration = Histogram(
+    "http_request_db_duration_seconds", "Time spent executing SQL statements per HTTP request.",
+    ("method", "route"), LATENCY_BUCKETS
+)
+
+class RequestStats:
+    """SQL statements attributed to the request being handled."""
+
+    def __init__(self, record_statements: bool):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.statement_log: Optional[List[Tuple[str, float]]] = [] if record_statements else None
+
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current_request.get()
+    if stats is None:
+        return
+    stats.statements += 1
+    stats.db_seconds += elapsed
+    if stats.statement_log is not None:
+        stats.statement_log.append((statement[:MAX_LOGGED_STATEMENT_LENGTH], elapsed))
+
+# Sync endpoints run in a threadpool that copies the request context, so statements
+# from both engines are attributed to the request that issued them
+for instrumented_engine in (engine, async_engine.sync_engine):
+    event.listen(instrumented_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(instrumented_engine, "after_cursor_execute", _after_cursor_execute)
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording the duration and SQL statements of every HTTP request
+    per route template.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(record_statements=SLOW_REQUEST_MS > 0)
+        token = _current_request.set(stats)
+        start = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+            duration = time.perf_counter() - start
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            request_duration.observe(duration, method, route, str(status["code"]))
+            request_statements.observe(stats.statements, method, route)
+            request_db_duration.observe(stats.db_seconds, method, route)
+
+            if SLOW_REQUEST_MS and duration * 1000 >= SLOW_REQUEST_MS:
+                logger.warning("Slow request: " + json.dumps({
+                    "method": method,
+                    "route": route,
+                    "path": scope["path"],
+                    "status": status["code"],
+                    "duration_ms": round(duration * 1000, 2),
+                    "db_ms": round(stats.db_seconds * 1000, 2),
+                    "statements": [
+                        {"sql": sql, "duration_ms": round(seconds * 1000, 2)}
+                        for sql, seconds in stats.statement_log
+                    ],
+                }))
+
+def render_metrics() -> str:
+    """Return all metrics in the Prometheus text exposition format."""
+    lines = []
+    for histogram in (request_duration, request_statements, request_db_duration):
+        lines.extend(histogram.render())
+
+    pools = pool_status()
+    for name, kind, key, description in (
+        ("db_pool_checked_out_connections", "gauge", "checked_out", "Connections currently checked out of the pool."),
+        ("db_pool_checkouts_total", "counter", "checkouts", "Connections checked out of the pool."),
+        ("db_pool_connects_total", "counter", "connects", "Database connections opened."),
+        ("db_pool_timeouts_total", "counter", "timeouts", "Checkouts that timed out waiting for a connection."),
+        ("db_pool_wait_seconds_total", "counter", "wait_seconds_total", "Time spent waiting for a connection."),
+    ):
+        lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+        lines += [f'{name}{{engine="{engine_name}"}} {pool[key]}' for engine_name, pool in pools.items()]
+
+    lines += [
+        "# HELP access_log_dropped_total Access log records dropped because the queue was full.",
+        "# TYPE access_log_dropped_total counter",
+        f"access_log_dropped_total {access_log.handler.dropped}",
+    ]
+    return "\n".join(lines) + "\n"
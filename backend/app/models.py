@@ -1,6 +1,6 @@
 from backend.app.models.category import Category
 from backend.app.models.cookbook import Cookbook, CookbookChapter, CookbookRecipe, CookbookRecipeFeedback
-from backend.app.models.ingredient import Ingredient, IngredientTranslation
+from backend.app.models.ingredient import Ingredient, IngredientTranslation, IngredientCatalogueVersion
 from backend.app.models.recipe import Recipe
 from backend.app.models.shared_recipe import SharedRecipe
 from backend.app.models.user import User
\ No newline at end of file
@@ -1,6 +1,6 @@
 from .category import Category
 from .cookbook import Cookbook, CookbookChapter, CookbookRecipe, CookbookRecipeFeedback
-from .ingredient import Ingredient, IngredientTranslation
+from .ingredient import Ingredient, IngredientTranslation, IngredientCatalogueVersion
 from .recipe import Recipe, recipe_ingredients
 from .shared_recipe import SharedRecipe
 from .user import User
\ No newline at end of file
@@ -1,6 +1,6 @@
 from datetime import datetime
 import enum
-from sqlalchemy import CheckConstraint, Column, DateTime, Float, ForeignKey, Integer, String, Text
+from sqlalchemy import CheckConstraint, Column, DateTime, Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 from backend.app.db.base_class import Base
 from backend.app.models.user import cookbook_users
@@ -20,6 +20,7 @@ class Cookbook(Base):
 
 class CookbookRecipe(Base):
     __tablename__ = "cookbook_recipes"
+    __table_args__ = (Index("ix_cookbook_recipes_cookbook_id_position", "cookbook_id", "position"),)
 
     id = Column(Integer, primary_key=True, index=True)
     recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=False)
@@ -27,6 +28,8 @@ class CookbookRecipe(Base):
     position = Column(Integer, nullable=False)  #Position in Cookbook
     cookbook_id = Column(Integer, ForeignKey("cookbooks.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")  #Ratings in the feedback, kept in sync when feedback is written
+    rating_sum = Column(Float, nullable=False, default=0, server_default="0")
 
     recipe = relationship("Recipe", back_populates="cookbook_recipes")
     chapter = relationship("CookbookChapter", back_populates="recipes")
@@ -36,6 +39,7 @@ class CookbookRecipe(Base):
 
 class CookbookRecipeFeedback(Base):
     __tablename__ = "cookbook_recipe_feedback"
+    __table_args__ = (Index("ix_cookbook_recipe_feedback_cookbook_recipe_id_user_id", "cookbook_recipe_id", "user_id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     cookbook_recipe_id = Column(Integer, ForeignKey("cookbook_recipes.id"), nullable=False)
@@ -50,6 +54,7 @@ class CookbookRecipeFeedback(Base):
 
 class CookbookChapter(Base):
     __tablename__ = "cookbook_chapters"
+    __table_args__ = (Index("ix_cookbook_chapters_cookbook_id_position", "cookbook_id", "position"),)
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
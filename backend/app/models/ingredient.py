@@ -1,4 +1,5 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
+from datetime import datetime
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
 from sqlalchemy.orm import relationship
 from backend.app.db.base_class import Base
 from backend.app.models.recipe import recipe_ingredients
@@ -7,9 +8,11 @@ class Ingredient(Base):
     __tablename__ = "ingredients"
 
     id = Column(Integer, primary_key=True, index=True)
-    creator_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    creator_id = Column(Integer, ForeignKey("users.id"), nullable=True)  #NULL for predefined ingredients
     name = Column(String(255), nullable=False, index=True)
+    normalized_name = Column(String(255), nullable=True, index=True)  #Trimmed, lowercased name that names are looked up by
     language = Column(String(20), nullable=False)
+    seed_id = Column(Integer, nullable=True, unique=True, index=True)  #Id of the entry in the seed file for predefined ingredients
 
     recipes = relationship(
         "Recipe",
@@ -26,5 +29,13 @@ class IngredientTranslation(Base):
     ingredient_id = Column(Integer, ForeignKey("ingredients.id"), nullable=False)
     language = Column(String(20), nullable=False)  #Z.B. "en", "de", "fr"
     name = Column(String(255), nullable=False, index=True)
+    normalized_name = Column(String(255), nullable=True, index=True)  #Trimmed, lowercased name that names are looked up by
 
-    ingredient = relationship("Ingredient", back_populates="translations", foreign_keys="[IngredientTranslation.ingredient_id]")
\ No newline at end of file
+    ingredient = relationship("Ingredient", back_populates="translations", foreign_keys="[IngredientTranslation.ingredient_id]")
+
+class IngredientCatalogueVersion(Base):
+    __tablename__ = "ingredient_catalogue_version"
+
+    id = Column(Integer, primary_key=True)  #Single row with id 1
+    version = Column(Integer, nullable=False, default=0)  #Bumped by every catalogue change
+    changed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import JSON, Column, Integer, String, DateTime, ForeignKey, Table, Enum, Float
+from sqlalchemy import JSON, Column, Integer, String, DateTime, ForeignKey, Table, Enum, Float, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from backend.app.db.base_class import Base
@@ -16,6 +16,8 @@ recipe_ingredients = Table(
     Column("ingredient_id", Integer, ForeignKey("ingredients.id"), primary_key=True),
     Column("quantity", Float, nullable=True),
     Column("unit", String(25), nullable=True),
+    # The primary key covers lookups by recipe; this one covers lookups by ingredient
+    Index("ix_recipe_ingredients_ingredient_id_recipe_id", "ingredient_id", "recipe_id"),
 )
 
 recipe_categories = Table(
@@ -27,28 +29,36 @@ recipe_categories = Table(
 
 class Recipe(Base):
     __tablename__ = "recipes"
+    __table_args__ = (
+        # Every listing filters by owner and pages by (changed_at, id)
+        Index("ix_recipes_owner_id_changed_at", "owner_id", "changed_at"),
+        # Fork counts and copy-on-write lookups
+        Index("ix_recipes_original_id", "original_id"),
+        Index("ix_recipes_ingredients_source_id", "ingredients_source_id"),
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     title = Column(String(255), nullable=False, index=True)
-    servings = Column(JSON, nullable=True, index=True)
-    servings_unit = Column(Enum(Unit), index=True)
-    special_equipment = Column(JSON, nullable=True, index=True)
-    instructions = Column(String, nullable=False, index=True)
+    servings = Column(JSON, nullable=True)
+    servings_unit = Column(Enum(Unit))
+    special_equipment = Column(JSON, nullable=True)
+    instructions = Column(String, nullable=False)
 
-    thumbnail_url = Column(String(255), nullable=True, index=True)
-    images_url = Column(JSON, nullable=True, index=True)
-    source = Column(String(255), nullable=True, index=True)
+    thumbnail_url = Column(String(255), nullable=True)
+    images_url = Column(JSON, nullable=True)
+    source = Column(String(255), nullable=True)
 
-    prep_time = Column(Integer, nullable=True, index=True) #In minutes
-    cook_time = Column(Integer, nullable=True, index=True) #In minutes
-    rest_time = Column(Integer, nullable=True, index=True) #In minutes
-    total_time = Column(Integer, nullable=True, index=True) #In minutes
+    prep_time = Column(Integer, nullable=True) #In minutes
+    cook_time = Column(Integer, nullable=True) #In minutes
+    rest_time = Column(Integer, nullable=True) #In minutes
+    total_time = Column(Integer, nullable=True) #In minutes
 
-    added_at = Column(DateTime, default=datetime.utcnow, index=True)
-    changed_at = Column(DateTime, default=datetime.utcnow, index=True)
+    added_at = Column(DateTime, default=datetime.utcnow)
+    changed_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     original_id = Column(Integer, ForeignKey("recipes.id", ondelete="SET NULL"), nullable=True) #If Copy of another recipe
+    ingredients_source_id = Column(Integer, ForeignKey("recipes.id"), nullable=True) #Fork still using the ingredient rows of this recipe
 
     owner = relationship("User", back_populates="recipes")
     ingredients = relationship(
@@ -56,8 +66,8 @@ class Recipe(Base):
         secondary=recipe_ingredients,
         back_populates="recipes"
     )
-    original = relationship("Recipe", remote_side=[id], back_populates="copies")
-    copies = relationship("Recipe", back_populates="original")
+    original = relationship("Recipe", remote_side=[id], back_populates="copies", foreign_keys=[original_id])
+    copies = relationship("Recipe", back_populates="original", foreign_keys=[original_id])
     categories = relationship("Category", secondary=recipe_categories, back_populates="recipes")
     shared_recipes = relationship("SharedRecipe", back_populates="recipe")
     cookbook_recipes = relationship("CookbookRecipe", back_populates="recipe")
\ No newline at end of file
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, UniqueConstraint
 from sqlalchemy.orm import relationship
 from backend.app.db.base_class import Base
 
@@ -8,10 +8,22 @@ class SharedRecipe(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)  #Recipient
     created_at = Column(DateTime, default=datetime.utcnow)
+    shared_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    cookbook_id = Column(Integer, ForeignKey("cookbooks.id"), nullable=True)  #Set if shared with the members of a cookbook
+
+    # Summary of the recipe copied at share time, so the feed is read without joins
+    title = Column(String, nullable=True)
+    thumbnail_url = Column(String, nullable=True)
+    total_time = Column(Integer, nullable=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    owner_username = Column(String, nullable=True)
 
     recipe = relationship("Recipe", back_populates="shared_recipes")
-    user = relationship("User", back_populates="shared_recipes")
+    user = relationship("User", back_populates="shared_recipes", foreign_keys=[user_id])
 
-    __table_args__ = (UniqueConstraint("recipe_id", "user_id", name="uq_shared_recipe"),)
\ No newline at end of file
+    __table_args__ = (
+        UniqueConstraint("recipe_id", "user_id", name="uq_shared_recipe"),
+        Index("ix_shared_recipes_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Table, ForeignKey
+from sqlalchemy import Column, Index, Integer, String, Table, ForeignKey
 from sqlalchemy.orm import relationship
 from backend.app.db.base_class import Base
 
@@ -7,6 +7,7 @@ cookbook_users = Table(
     Base.metadata,
     Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
     Column("cookbook_id", Integer, ForeignKey("cookbooks.id"), primary_key=True),
+    Index("ix_cookbook_users_cookbook_id_user_id", "cookbook_id", "user_id"),
 )
 
 class User(Base):
@@ -16,9 +17,10 @@ class User(Base):
     username = Column(String, unique=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  #Bumped to revoke all issued tokens
 
     recipes = relationship("Recipe", back_populates="owner")
-    shared_recipes = relationship("SharedRecipe", back_populates="user")
+    shared_recipes = relationship("SharedRecipe", back_populates="user", foreign_keys="SharedRecipe.user_id")
     cookbooks = relationship("Cookbook", secondary=cookbook_users, back_populates="members")
     feedback = relationship("CookbookRecipeFeedback", back_populates="user")
     ingredients = relationship("Ingredient", back_populates="creator")
\ No newline at end of file
@@ -1,15 +1,25 @@
 from .user import User, UserLogin, UserCreate, UserResponse, UserResponseWithToken
 from .token import Token, TokenData
-from .recipe import Recipe, RecipeCreate, RecipeResponse
+from .recipe import Recipe, RecipeCreate, RecipeUpdate, RecipeImport, RecipeImportError, RecipeImportResult, RecipeLineage, RecipeResponse, RecipeSummary, RecipePage, RecipeSearchPage, CookableRecipe, CookableRecipePage
 from .category import Category, CategoryCreate
-from .cookbook import Cookbook, CookbookCreate, CookbookRecipe, CookbookRecipeFeedback, CookbookChapter
-from .shared_recipe import SharedRecipe
-from .ingredient import Ingredient, IngredientCreate, IngredientTranslationCreate, IngredientTranslation, IngredientResponse
+from .cookbook import (
+    Cookbook, CookbookCreate, CookbookSummary, CookbookDetail, CookbookMemberCreate, CookbookRecipe,
+    CookbookRecipeCreate, CookbookRecipeEntry, CookbookRecipeFeedback, CookbookRecipeFeedbackCreate,
+    CookbookRecipeMove, CookbookChapter, CookbookChapterCreate, CookbookChapterMove
+)
+from .shared_recipe import SharedRecipe, SharedRecipeCreate, SharedRecipePage, SharedRecipeResult
+from .ingredient import Ingredient, IngredientCreate, IngredientTranslationCreate, IngredientTranslation, IngredientResponse, IngredientSuggestion
 
 __all__ = [
     "User", "UserLogin", "UserCreate", "UserResponse", "UserResponseWithToken", "Token", 
-    "TokenData", "Recipe", "RecipeCreate", "RecipeResponse", "Category", "CategoryCreate",
-    "Cookbook", "CookbookCreate", "CookbookRecipe", "CookbookRecipeFeedback", 
-    "CookbookChapter", "SharedRecipe", "Ingredient", "IngredientCreate", 
-    "IngredientTranslationCreate", "IngredientTranslation", "IngredientResponse"
+    "TokenData", "Recipe", "RecipeCreate", "RecipeUpdate", "RecipeImport", "RecipeImportError",
+    "RecipeImportResult", "RecipeLineage", "RecipeResponse", "RecipeSummary", "RecipePage", "RecipeSearchPage",
+    "CookableRecipe", "CookableRecipePage",
+    "Category", "CategoryCreate",
+    "Cookbook", "CookbookCreate", "CookbookSummary", "CookbookDetail", "CookbookMemberCreate",
+    "CookbookRecipe", "CookbookRecipeCreate", "CookbookRecipeEntry", "CookbookRecipeFeedback",
+    "CookbookRecipeFeedbackCreate", "CookbookRecipeMove", "CookbookChapter", "CookbookChapterCreate",
+    "CookbookChapterMove", "SharedRecipe", "SharedRecipeCreate", "SharedRecipePage", "SharedRecipeResult",
+    "Ingredient", "IngredientCreate", 
+    "IngredientTranslationCreate", "IngredientTranslation", "IngredientResponse", "IngredientSuggestion"
 ]
\ No newline at end of file
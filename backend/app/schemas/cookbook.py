@@ -1,5 +1,5 @@
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from typing import TYPE_CHECKING, List, Optional
 
 if TYPE_CHECKING:
@@ -23,6 +23,20 @@ class Cookbook(CookbookBase):
     class Config:
         from_attributes = True
 
+class CookbookSummary(CookbookBase):
+    id: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class CookbookMemberCreate(BaseModel):
+    user_id: int
+
+class CookbookRecipeCreate(BaseModel):
+    recipe_id: int
+    chapter_id: Optional[int] = None
+
 class CookbookRecipe(BaseModel):
     id: int
     recipe_id: int
@@ -30,10 +44,32 @@ class CookbookRecipe(BaseModel):
     position: int
     cookbook_id: int
     created_at: datetime
+    rating_count: int = 0
+    rating_sum: float = 0
 
     class Config:
         from_attributes = True
 
+class CookbookRecipeEntry(BaseModel):
+    id: int
+    recipe_id: int
+    chapter_id: Optional[int] = None
+    position: int
+    title: str
+    thumbnail_url: Optional[str] = None
+    rating_count: int
+    rating_average: Optional[float] = None
+
+class CookbookRecipeFeedbackCreate(BaseModel):
+    rating: Optional[float] = Field(None, ge=1, le=5)
+    comment: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        if self.rating is None and not self.comment:
+            raise ValueError("Feedback needs a rating or a comment")
+        return self
+
 class CookbookRecipeFeedback(BaseModel):
     id: int
     cookbook_recipe_id: int
@@ -45,6 +81,16 @@ class CookbookRecipeFeedback(BaseModel):
     class Config:
         from_attributes = True
 
+class CookbookRecipeMove(BaseModel):
+    after_id: Optional[int] = None  #Entry to place this one after, None for the start of the cookbook
+    chapter_id: Optional[int] = None  #Only changed if given, null removes the recipe from its chapter
+
+class CookbookChapterCreate(BaseModel):
+    name: str
+
+class CookbookChapterMove(BaseModel):
+    after_id: Optional[int] = None  #Chapter to place this one after, None for the first chapter
+
 class CookbookChapter(BaseModel):
     id: int
     name: str
@@ -52,4 +98,8 @@ class CookbookChapter(BaseModel):
     cookbook_id: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class CookbookDetail(CookbookSummary):
+    chapters: List[CookbookChapter] = []
+    recipes: List[CookbookRecipeEntry] = []
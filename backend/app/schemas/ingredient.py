@@ -10,7 +10,7 @@ class IngredientCreate(IngredientBase):
 
 class Ingredient(IngredientBase):
     id: int
-    creator_id: int
+    creator_id: Optional[int] = None
     translations: List['IngredientTranslation'] = []
 
     class Config:
@@ -37,4 +37,9 @@ class IngredientResponse(BaseModel):
     unit: Optional[str] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class IngredientSuggestion(BaseModel):
+    id: int
+    name: str
+    language: str
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional, Union, Dict
 from datetime import datetime
 from fastapi import UploadFile, File
@@ -36,15 +36,64 @@ class RecipeCreate(RecipeBase):
     class Config:
         from_attributes = True
 
+class RecipeUpdate(BaseModel):
+    title: Optional[str] = None
+    ingredients: Optional[List[IngredientResponse]] = None
+    servings: Optional[Union[int, Dict[str, int]]] = None
+    servings_unit: Optional[Unit] = None
+    special_equipment: Optional[List[str]] = None
+    instructions: Optional[str] = None
+    source: Optional[str] = None
+    prep_time: Optional[int] = None
+    cook_time: Optional[int] = None
+    rest_time: Optional[int] = None
+
+class RecipeImport(BaseModel):
+    """One line of a bulk import."""
+    title: str = Field(min_length=1, max_length=255)
+    ingredients: List[IngredientResponse] = Field(min_length=1)
+    servings: Union[int, Dict[str, int]]
+    servings_unit: Unit = Unit.NUMBER
+    special_equipment: List[str] = []
+    instructions: str
+    source: Optional[str] = None
+    prep_time: Optional[int] = None
+    cook_time: Optional[int] = None
+    rest_time: Optional[int] = None
+    thumbnail: Optional[str] = None  #Path of an image in the imported zip archive
+    images: List[str] = []  #Paths of images in the imported zip archive
+
+    @field_validator("servings_unit", mode="before")
+    @classmethod
+    def accept_unit_names(cls, value):
+        # The multipart endpoint takes the enum names (BAKING_TRAY), exports may use either
+        return value.lower().replace("_", " ") if isinstance(value, str) else value
+
+class RecipeImportError(BaseModel):
+    line: int
+    error: str
+
+class RecipeImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[RecipeImportError] = []  #The first MAX_REPORTED_ERRORS failures
+
+class RecipeLineage(BaseModel):
+    id: int
+    title: Optional[str] = None  #None for recipes that weren't shared with the user
+    owner_id: Optional[int] = None
+
 class Recipe(RecipeBase):
     id: int
+    thumbnail_derivatives: Optional[Dict[str, str]] = None
+    image_derivatives: List[Optional[Dict[str, str]]] = []
     added_at: datetime
     changed_at: datetime
     owner_id: int
     original_id: Optional[int] = None
     owner: User
-    original: Optional['Recipe'] = None
-    copies: List['Recipe'] = []
+    fork_count: int = 0  #Direct forks of this recipe
+    lineage: List[RecipeLineage] = []  #Recipes this one was forked from, nearest first
     categories: List[Category] = []
     shared_recipes: List[SharedRecipe] = []
     cookbook_recipes: List[CookbookRecipe] = []
@@ -54,4 +103,39 @@ class Recipe(RecipeBase):
 
 class RecipeResponse(Recipe):
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class RecipeSummary(BaseModel):
+    id: int
+    title: str
+    servings: Union[int, Dict[str, int]]
+    servings_unit: Unit
+    thumbnail_url: Optional[str] = None
+    thumbnail_derivatives: Optional[Dict[str, str]] = None
+    prep_time: Optional[int] = None
+    cook_time: Optional[int] = None
+    rest_time: Optional[int] = None
+    total_time: Optional[int] = None
+    added_at: datetime
+    changed_at: datetime
+    owner_id: int
+
+    class Config:
+        from_attributes = True
+
+class RecipePage(BaseModel):
+    items: List[RecipeSummary]
+    next_cursor: Optional[str] = None
+
+class RecipeSearchPage(BaseModel):
+    items: List[RecipeSummary]
+    next_offset: Optional[int] = None
+
+class CookableRecipe(RecipeSummary):
+    matched_ingredients: int
+    missing_ingredients: int
+    coverage: float
+
+class CookableRecipePage(BaseModel):
+    items: List[CookableRecipe]
+    next_offset: Optional[int] = None
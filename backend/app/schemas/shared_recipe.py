@@ -1,9 +1,37 @@
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, model_validator
+from typing import Dict, List, Optional
+
+class SharedRecipeCreate(BaseModel):
+    user_ids: List[int] = []
+    cookbook_id: Optional[int] = None  #Share with every member of this cookbook
+
+    @model_validator(mode="after")
+    def check_recipients(self):
+        if not self.user_ids and self.cookbook_id is None:
+            raise ValueError("Either user_ids or cookbook_id is required")
+        return self
+
+class SharedRecipeResult(BaseModel):
+    shared: int  #Recipients that didn't have the recipe yet
 
 class SharedRecipe(BaseModel):
     id: int
     recipe_id: int
-    shared_with_user_id: int
+    user_id: int
+    created_at: datetime
+    shared_by_id: Optional[int] = None
+    cookbook_id: Optional[int] = None
+    title: Optional[str] = None
+    thumbnail_url: Optional[str] = None
+    thumbnail_derivatives: Optional[Dict[str, str]] = None
+    total_time: Optional[int] = None
+    owner_id: Optional[int] = None
+    owner_username: Optional[str] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class SharedRecipePage(BaseModel):
+    items: List[SharedRecipe]
+    next_cursor: Optional[str] = None
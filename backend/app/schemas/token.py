@@ -5,4 +5,7 @@ class Token(BaseModel):
     token_type: str
 
 class TokenData(BaseModel):
+    """The user identity carried in the signed claims of an access token."""
+    id: int
+    username: str
     email: str
\ No newline at end of file
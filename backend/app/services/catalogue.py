@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.app.models import IngredientCatalogueVersion
+
+CATALOGUE_VERSION_ID = 1
+
+def ensure_catalogue_version(db: Session):
+    """Create the catalogue version row if the database doesn't have it yet."""
+    if db.get(IngredientCatalogueVersion, CATALOGUE_VERSION_ID) is None:
+        db.add(IngredientCatalogueVersion(id=CATALOGUE_VERSION_ID, version=0, changed_at=datetime.utcnow()))
+        db.commit()
+
+_CATALOGUE_VERSION_QUERY = (
+    select(IngredientCatalogueVersion.version, IngredientCatalogueVersion.changed_at)
+    .where(IngredientCatalogueVersion.id == CATALOGUE_VERSION_ID)
+)
+
+def get_catalogue_version(db: Session) -> Tuple[int, datetime]:
+    """Return the current version of the ingredient catalogue and when it last changed."""
+    row = db.execute(_CATALOGUE_VERSION_QUERY).one()
+    return row.version, row.changed_at
+
+async def get_catalogue_version_async(db: AsyncSession) -> Tuple[int, datetime]:
+    """Same as get_catalogue_version, for an async session."""
+    row = (await db.execute(_CATALOGUE_VERSION_QUERY)).one()
+    return row.version, row.changed_at
+
+def bump_catalogue_version(db: Session):
+    """
+    Mark the ingredient catalogue as changed.
+
+    Must be called in the same transaction as the change, before it is committed.
+
+    Returns:
+        The new version.
+    """
+    return db.execute(
+        update(IngredientCatalogueVersion)
+        .where(IngredientCatalogueVersion.id == CATALOGUE_VERSION_ID)
+        .values(
+            version=IngredientCatalogueVersion.version + 1,
+            changed_at=datetime.utcnow()
+        )
+        .returning(IngredientCatalogueVersion.version)
+    ).scalar_one()
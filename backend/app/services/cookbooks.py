@@ -0,0 +1,17 @@
+from typing import List
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from backend.app.models import CookbookRecipe, CookbookRecipeFeedback
+
+def remove_cookbook_entries(db: Session, recipe_ids: List[int]):
+    """
+    Remove recipes, with their feedback, from every cookbook; must run before the recipes
+    are deleted.
+
+    The rating aggregates are stored on the removed entries, so no other entry changes.
+    """
+    entry_ids = select(CookbookRecipe.id).where(CookbookRecipe.recipe_id.in_(recipe_ids))
+    db.execute(delete(CookbookRecipeFeedback).where(CookbookRecipeFeedback.cookbook_recipe_id.in_(entry_ids)))
+    db.execute(delete(CookbookRecipe).where(CookbookRecipe.recipe_id.in_(recipe_ids)))
@@ -0,0 +1,123 @@
+from typing import Dict, List
+
+from sqlalchemy import exists, func, insert, literal, or_, select, update
+from sqlalchemy.orm import Session, aliased
+
+from backend.app.models import Recipe, SharedRecipe, recipe_ingredients
+
+# Ancestors listed in the lineage of a recipe; deeper ones are left out
+MAX_LINEAGE_DEPTH = 20
+
+# Id of the recipe whose rows in recipe_ingredients hold the ingredients of a recipe.
+# Forks read the rows of the recipe they were forked from until their ingredients are edited.
+ingredients_recipe_id = func.coalesce(Recipe.ingredients_source_id, Recipe.id)
+
+def fork_recipe(db: Session, recipe: Recipe, owner_id: int) -> Recipe:
+    """
+    Create a fork of a recipe for a user.
+
+    Only the recipe row is copied. The fork points at the ingredient rows of the recipe
+    and reuses its image files, which are content-addressed and never rewritten.
+    """
+    fork = Recipe(
+        **{
+            column.key: getattr(recipe, column.key)
+            for column in Recipe.__table__.columns
+            if column.key not in ("id", "added_at", "changed_at", "owner_id", "original_id", "ingredients_source_id")
+        },
+        owner_id=owner_id,
+        original_id=recipe.id,
+        # A fork of an unedited fork shares the rows of the same recipe, so there is never more than one hop
+        ingredients_source_id=recipe.ingredients_source_id or recipe.id
+    )
+    db.add(fork)
+    db.flush()
+    return fork
+
+def detach_forks(db: Session, recipe_id: int) -> List[int]:
+    """
+    Give every fork still sharing the ingredient rows of a recipe its own copy of them.
+
+    Must run before the ingredients of the recipe are changed or the recipe is deleted.
+    The rows of all forks are copied by one INSERT ... SELECT.
+
+    Returns:
+        The ids of the detached forks.
+    """
+    fork_ids = db.execute(select(Recipe.id).where(Recipe.ingredients_source_id == recipe_id)).scalars().all()
+    if not fork_ids:
+        return []
+
+    fork = aliased(Recipe)
+    db.execute(
+        insert(recipe_ingredients).from_select(
+            ["recipe_id", "ingredient_id", "quantity", "unit"],
+            select(fork.id, recipe_ingredients.c.ingredient_id, recipe_ingredients.c.quantity, recipe_ingredients.c.unit)
+            .join(fork, fork.ingredients_source_id == recipe_ingredients.c.recipe_id)
+            .where(recipe_ingredients.c.recipe_id == recipe_id)
+        )
+    )
+    # Keep changed_at as it is; the forks' content didn't change
+    db.execute(
+        update(Recipe)
+        .where(Recipe.ingredients_source_id == recipe_id)
+        .values(ingredients_source_id=None, changed_at=Recipe.changed_at)
+    )
+    return fork_ids
+
+def fork_counts_statement(recipe_ids: List[int]):
+    """Select the number of direct forks of several recipes and when the newest was created."""
+    return (
+        select(Recipe.original_id, func.count().label("forks"), func.max(Recipe.added_at).label("latest_fork_at"))
+        .where(Recipe.original_id.in_(recipe_ids))
+        .group_by(Recipe.original_id)
+    )
+
+def lineage_statement(recipe_ids: List[int], user_id: int):
+    """
+    Select the ancestors of several recipes, nearest first, with a recursive query
+    that follows original_id.
+
+    Each ancestor is flagged as visible when the user owns it or it was shared with them.
+    """
+    ancestors = (
+        select(Recipe.id.label("recipe_id"), Recipe.original_id.label("ancestor_id"), literal(1).label("depth"))
+        .where(Recipe.id.in_(recipe_ids), Recipe.original_id.is_not(None))
+        .cte("ancestors", recursive=True)
+    )
+    parent = aliased(Recipe)
+    ancestors = ancestors.union_all(
+        select(ancestors.c.recipe_id, parent.original_id, ancestors.c.depth + 1)
+        .join(parent, parent.id == ancestors.c.ancestor_id)
+        .where(parent.original_id.is_not(None), ancestors.c.depth < MAX_LINEAGE_DEPTH)
+    )
+    visible = or_(
+        Recipe.owner_id == user_id,
+        exists().where(SharedRecipe.recipe_id == Recipe.id, SharedRecipe.user_id == user_id)
+    )
+    return (
+        select(ancestors.c.recipe_id, Recipe.id, Recipe.title, Recipe.owner_id, Recipe.changed_at, visible.label("visible"))
+        .join(Recipe, Recipe.id == ancestors.c.ancestor_id)
+        .order_by(ancestors.c.recipe_id, ancestors.c.depth)
+    )
+
+def group_fork_info(recipe_ids: List[int], fork_counts, lineage) -> Dict[int, dict]:
+    """
+    Combine the rows of fork_counts_statement and lineage_statement by recipe.
+
+    The title and owner of ancestors that aren't visible to the user are left out. The
+    changed_at of each recipe's info is the newest change among its forks and ancestors.
+    """
+    info = {recipe_id: {"fork_count": 0, "lineage": [], "changed_at": None} for recipe_id in recipe_ids}
+    for row in fork_counts:
+        info[row.original_id]["fork_count"] = row.forks
+        info[row.original_id]["changed_at"] = row.latest_fork_at
+    for row in lineage:
+        recipe_info = info[row.recipe_id]
+        if row.visible:
+            recipe_info["lineage"].append({"id": row.id, "title": row.title, "owner_id": row.owner_id})
+        else:
+            recipe_info["lineage"].append({"id": row.id, "title": None, "owner_id": None})
+        if row.changed_at is not None and (recipe_info["changed_at"] is None or row.changed_at > recipe_info["changed_at"]):
+            recipe_info["changed_at"] = row.changed_at
+    return info
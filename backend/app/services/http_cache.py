@@ -0,0 +1,49 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict
+
+from fastapi import Request, Response
+
+def make_etag(*parts) -> str:
+    """Build a weak ETag from the values that identify a version of a resource."""
+    digest = hashlib.sha1(":".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+def cache_headers(etag: str, last_modified: datetime, cache_control: str = "private, no-cache") -> Dict[str, str]:
+    """
+    Build the validator headers of a response.
+
+    no-cache lets clients and caches store the response but makes them revalidate it
+    with If-None-Match / If-Modified-Since before every use.
+    """
+    return {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified.replace(tzinfo=timezone.utc), usegmt=True),
+        "Cache-Control": cache_control,
+    }
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    """Evaluate the conditional headers of a GET request against the current validators."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match takes precedence over If-Modified-Since and uses weak comparison
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or etag.removeprefix("W/") in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have a resolution of one second
+        return last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+
+    return False
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    """Return an empty 304 response carrying the validator headers."""
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,164 @@
+import logging
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from backend.app.services.uploads import UPLOADS_DIR
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; without it no derivatives are produced
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Maximum width of each derivative; images are never scaled up
+DERIVATIVE_WIDTHS = {"thumbnail": 320, "card": 800, "full": 1600}
+DERIVATIVE_FORMAT = "webp"
+DERIVATIVE_QUALITY = 80
+
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+
+_ORIGINAL_NAME = re.compile(r"^[0-9a-f]{64}(\.[a-z0-9]{1,8})?$")
+_ORIGINAL_URL = re.compile(r"/uploads/([0-9a-f]{2}/[0-9a-f]{64})(\.[a-z0-9]{1,8})?$")
+
+# Originals whose derivatives exist, by path without extension. Filled by the worker as
+# it renders them and by the startup scan, so serving a URL never touches the disk.
+_completed = set()
+
+def derivative_path(relative_path: str, name: str) -> str:
+    """Path of a derivative below the uploads directory, next to its original."""
+    stem, _ = os.path.splitext(relative_path)
+    return f"{stem}_{name}.{DERIVATIVE_FORMAT}"
+
+def failure_marker_path(relative_path: str) -> str:
+    """Path of the marker recording that no derivatives could be rendered for an original."""
+    stem, _ = os.path.splitext(relative_path)
+    return f"{stem}_derivatives.failed"
+
+def _derivatives_on_disk(relative_path: str) -> bool:
+    return all(os.path.exists(os.path.join(UPLOADS_DIR, derivative_path(relative_path, name))) for name in DERIVATIVE_WIDTHS)
+
+def derivative_urls(url: Optional[str]) -> Optional[Dict[str, str]]:
+    """
+    Return the derivative URLs of a content-addressed upload URL.
+
+    Args:
+        url: A thumbnail or image URL as stored on the recipe.
+
+    Returns:
+        A dict from derivative name to URL, or None if the URL has no derivatives or
+        this process hasn't seen them rendered (yet).
+    """
+    if not url:
+        return None
+    match = _ORIGINAL_URL.search(url)
+    if not match or match.group(1) not in _completed:
+        return None
+    prefix = url[:match.start(1)]
+    return {name: f"{prefix}{match.group(1)}_{name}.{DERIVATIVE_FORMAT}" for name in DERIVATIVE_WIDTHS}
+
+class DerivativeWorker:
+    """
+    Background thread pool that renders resized derivatives of uploaded images.
+
+    Derivatives are written next to their original under deterministic names, so a
+    missing file is all it takes to know that work is outstanding; on startup the
+    uploads directory is scanned, finished originals are remembered and unfinished ones
+    are queued again. Originals that can't be rendered get a failure marker instead and
+    are not retried until it is deleted. Derivatives rendered by another process are
+    served once this one has scanned them at its next start.
+    """
+
+    def __init__(self, workers: int = IMAGE_WORKERS):
+        self._workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = set()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the pool, remember finished originals and queue the unfinished ones."""
+        if Image is None:
+            logger.warning("Pillow is not installed; no new image derivatives are rendered")
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="image-derivatives")
+        self._executor.submit(self._scan)
+
+    def stop(self):
+        """Stop the pool, dropping queued work; it is picked up again on the next start."""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def enqueue(self, relative_path: str):
+        """Queue an original below the uploads directory for derivative generation."""
+        if not self._executor or Image is None:
+            return
+        with self._lock:
+            if relative_path in self._pending:
+                return
+            self._pending.add(relative_path)
+        self._executor.submit(self._generate, relative_path)
+
+    def _scan(self):
+        if not os.path.isdir(UPLOADS_DIR):
+            return
+        for directory in os.scandir(UPLOADS_DIR):
+            if not directory.is_dir() or directory.name.startswith("."):
+                continue
+            for entry in os.scandir(directory.path):
+                if not _ORIGINAL_NAME.match(entry.name):
+                    continue
+                relative_path = f"{directory.name}/{entry.name}"
+                if _derivatives_on_disk(relative_path):
+                    _completed.add(os.path.splitext(relative_path)[0])
+                    continue
+                if os.path.exists(os.path.join(UPLOADS_DIR, failure_marker_path(relative_path))):
+                    continue
+                self.enqueue(relative_path)
+
+    def _generate(self, relative_path: str):
+        try:
+            with Image.open(os.path.join(UPLOADS_DIR, relative_path)) as original:
+                image = ImageOps.exif_transpose(original)
+                if image.mode not in ("RGB", "RGBA"):
+                    image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+                for name, width in DERIVATIVE_WIDTHS.items():
+                    target = os.path.join(UPLOADS_DIR, derivative_path(relative_path, name))
+                    if os.path.exists(target):
+                        continue
+                    resized = image.copy()
+                    resized.thumbnail((width, width * 4))
+                    self._save(resized, target)
+            _completed.add(os.path.splitext(relative_path)[0])
+            logger.info(f"Generated derivatives for {relative_path}")
+        except Exception as e:
+            logger.warning(f"Could not generate derivatives for {relative_path}: {e}")
+            self._record_failure(relative_path)
+        finally:
+            with self._lock:
+                self._pending.discard(relative_path)
+
+    @staticmethod
+    def _record_failure(relative_path: str):
+        # An empty marker next to the original keeps the startup scan from retrying it
+        try:
+            open(os.path.join(UPLOADS_DIR, failure_marker_path(relative_path)), "wb").close()
+        except OSError as e:
+            logger.warning(f"Could not record the failure for {relative_path}: {e}")
+
+    @staticmethod
+    def _save(image, target: str):
+        # Write to a temporary file first so an interrupted save never looks finished
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".derivative-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                image.save(f, format=DERIVATIVE_FORMAT, quality=DERIVATIVE_QUALITY)
+            os.replace(temp_path, target)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+derivative_worker = DerivativeWorker()
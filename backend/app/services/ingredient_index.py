@@ -0,0 +1,94 @@
+import logging
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.app.models import Ingredient, IngredientTranslation
+from backend.app.services.catalogue import get_catalogue_version
+
+logger = logging.getLogger(__name__)
+
+def normalize_name(name: str) -> str:
+    """Normalize an ingredient or translation name for lookups."""
+    return name.strip().lower()
+
+class IngredientIndex:
+    """
+    Process-wide cache mapping normalized ingredient and translation names to ingredient ids.
+
+    The cache is filled on demand: names that are not cached yet are resolved with one
+    IN query on the indexed normalized_name columns and remembered. The ingredient endpoints call invalidate() whenever
+    the catalogue changes, and changes made by other processes are picked up through the
+    catalogue version.
+    """
+
+    def __init__(self):
+        self._ids_by_name: Dict[str, int] = {}
+        self._generation = 0
+        self._catalogue_version = None
+        self._lock = threading.Lock()
+
+    def lookup(self, db: Session, names: Iterable[str]) -> Dict[str, int]:
+        """
+        Resolve normalized names to ingredient ids.
+
+        Args:
+            db: The database session used for names that are not cached.
+            names: Names normalized with normalize_name.
+
+        Returns:
+            A dict from name to ingredient id; unknown names are left out.
+        """
+        names = set(names)
+        version, _ = get_catalogue_version(db)
+        with self._lock:
+            if version != self._catalogue_version:
+                self._ids_by_name = {}
+                self._generation += 1
+                self._catalogue_version = version
+            found = {name: self._ids_by_name[name] for name in names if name in self._ids_by_name}
+            generation = self._generation
+
+        missing = names - found.keys()
+        if not missing:
+            return found
+
+        resolved = self._query_names(db, missing)
+
+        with self._lock:
+            # Don't cache rows that were read before a concurrent invalidation
+            if generation == self._generation:
+                self._ids_by_name.update(resolved)
+
+        found.update({name: resolved[name] for name in missing if name in resolved})
+        return found
+
+    def invalidate(self):
+        """Drop all cached names after the catalogue has changed."""
+        with self._lock:
+            self._ids_by_name = {}
+            self._generation += 1
+        logger.debug("Ingredient index invalidated")
+
+    @staticmethod
+    def _query_names(db: Session, names: Iterable[str]) -> Dict[str, int]:
+        names = list(names)
+        ingredient_rows = db.execute(
+            select(Ingredient.normalized_name, Ingredient.id).where(Ingredient.normalized_name.in_(names))
+        ).all()
+        translation_rows = db.execute(
+            select(IngredientTranslation.normalized_name, IngredientTranslation.ingredient_id)
+            .where(IngredientTranslation.normalized_name.in_(names))
+        ).all()
+        return IngredientIndex._build(ingredient_rows, translation_rows)
+
+    @staticmethod
+    def _build(ingredient_rows: List[Tuple[str, int]], translation_rows: List[Tuple[str, int]]) -> Dict[str, int]:
+        # Translation names take precedence over ingredient names, as they always have
+        ids_by_name = dict(ingredient_rows)
+        ids_by_name.update(translation_rows)
+        return ids_by_name
+
+ingredient_index = IngredientIndex()
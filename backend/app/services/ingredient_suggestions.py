@@ -0,0 +1,156 @@
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.app.models import Ingredient, IngredientTranslation
+from backend.app.services.catalogue import get_catalogue_version
+from backend.app.services.ingredient_index import normalize_name
+
+# Upper bound of prefix matches that are ranked for a single request
+MAX_CANDIDATES = 500
+# Prefixes shorter than this are not matched fuzzily; there would be too many matches
+FUZZY_MIN_LENGTH = 3
+
+def _fold(name: str) -> str:
+    """Normalize a name and strip accents, so "creme" finds "Crème"."""
+    decomposed = unicodedata.normalize("NFKD", normalize_name(name))
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+def _edit_distance(a: str, b: str) -> int:
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+# (folded name, ingredient id, name, language)
+Entry = Tuple[str, int, str, str]
+
+class IngredientSuggestions:
+    """
+    Prefix index over the ingredient and translation names, for autocompletion.
+
+    The names are kept in a sorted array, so the matches of a prefix are a contiguous
+    range found by binary search. The ingredient endpoints apply their own changes to the
+    index right after committing them; any other change, including those made by other
+    processes, shows up as a new catalogue version and triggers a full rebuild.
+    """
+
+    def __init__(self):
+        self._entries: List[Entry] = []
+        self._names: Dict[int, Dict[str, str]] = {}
+        self._catalogue_version = None
+        self._lock = threading.Lock()
+
+    def suggest(self, db: Session, prefix: str, language: Optional[str] = None, limit: int = 10) -> List[dict]:
+        """
+        Find the ingredients with a name or translation starting with the prefix.
+
+        Exact matches come first, then names in the requested language, then shorter names.
+        If nothing starts with the prefix, names whose start is one or two typos away from
+        it are returned instead.
+
+        Returns:
+            Up to limit dicts with the ingredient id and its name, in the requested
+            language if it has one.
+        """
+        version, _ = get_catalogue_version(db)
+        if version != self._catalogue_version:
+            self._rebuild(db, version)
+        with self._lock:
+            entries, names = self._entries, self._names
+
+        folded = _fold(prefix)
+        if not folded:
+            return []
+        candidates = self._prefix_matches(entries, folded)
+        if not candidates and len(folded) >= FUZZY_MIN_LENGTH:
+            candidates = self._fuzzy_matches(entries, folded)
+
+        best: Dict[int, Tuple] = {}
+        for distance, (key, ingredient_id, name, entry_language) in candidates:
+            rank = (distance, key != folded, entry_language != language, len(key), key)
+            if ingredient_id not in best or rank < best[ingredient_id][0]:
+                best[ingredient_id] = (rank, name, entry_language)
+
+        suggestions = []
+        for ingredient_id, (_, name, entry_language) in sorted(best.items(), key=lambda item: item[1][0])[:limit]:
+            localized = names.get(ingredient_id, {}).get(language)
+            suggestions.append({
+                "id": ingredient_id,
+                "name": localized or name,
+                "language": language if localized else entry_language
+            })
+        return suggestions
+
+    def add(self, version: int, ingredient_id: int, name: str, language: str):
+        """Add a committed name; version is the catalogue version of that commit."""
+        with self._lock:
+            if self._catalogue_version != version - 1:
+                return
+            entries = list(self._entries)
+            insort(entries, (_fold(name), ingredient_id, name, language))
+            names = dict(self._names)
+            names[ingredient_id] = {**names.get(ingredient_id, {}), language: name}
+            self._entries, self._names, self._catalogue_version = entries, names, version
+
+    def remove(self, version: int, ingredient_id: int, name: Optional[str] = None):
+        """Remove one committed name of an ingredient, or all of them if name is None."""
+        with self._lock:
+            if self._catalogue_version != version - 1:
+                return
+            entries = [
+                entry for entry in self._entries
+                if entry[1] != ingredient_id or (name is not None and entry[2] != name)
+            ]
+            names = dict(self._names)
+            remaining = {entry[3]: entry[2] for entry in entries if entry[1] == ingredient_id}
+            if remaining:
+                names[ingredient_id] = remaining
+            else:
+                names.pop(ingredient_id, None)
+            self._entries, self._names, self._catalogue_version = entries, names, version
+
+    def _rebuild(self, db: Session, version: int):
+        rows = db.execute(select(Ingredient.id, Ingredient.name, Ingredient.language)).all()
+        rows += db.execute(
+            select(IngredientTranslation.ingredient_id, IngredientTranslation.name, IngredientTranslation.language)
+        ).all()
+        entries = sorted((_fold(name), ingredient_id, name, language) for ingredient_id, name, language in rows)
+        names: Dict[int, Dict[str, str]] = {}
+        for ingredient_id, name, language in rows:
+            names.setdefault(ingredient_id, {})[language] = name
+        with self._lock:
+            self._entries, self._names, self._catalogue_version = entries, names, version
+
+    @staticmethod
+    def _prefix_matches(entries: List[Entry], prefix: str) -> List[Tuple[int, Entry]]:
+        matches = []
+        for entry in entries[bisect_left(entries, (prefix,)):]:
+            if not entry[0].startswith(prefix) or len(matches) >= MAX_CANDIDATES:
+                break
+            matches.append((0, entry))
+        return matches
+
+    @staticmethod
+    def _fuzzy_matches(entries: List[Entry], prefix: str) -> List[Tuple[int, Entry]]:
+        max_distance = 1 if len(prefix) < 7 else 2
+        matches = []
+        for entry in entries:
+            # Compare against starts of the name one shorter and longer, to allow for a
+            # missing or an extra character as well as a wrong one
+            distance = min(
+                _edit_distance(prefix, entry[0][:length])
+                for length in range(len(prefix) - 1, len(prefix) + 2)
+            )
+            if distance <= max_distance:
+                matches.append((distance, entry))
+        return matches
+
+ingredient_suggestions = IngredientSuggestions()
@@ -0,0 +1,66 @@
+from typing import Optional
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from backend.app.models import Cookbook
+
+# Distance between neighbouring positions. Items are moved to the midpoint between their
+# new neighbours, so about log2(GAP) moves into the same spot fit before the neighbours
+# have to be renumbered.
+GAP = 1024
+
+def append_position(db: Session, model, cookbook_id: int) -> int:
+    """Return the position after the last chapter or recipe of a cookbook."""
+    last = db.execute(select(func.max(model.position)).where(model.cookbook_id == cookbook_id)).scalar()
+    return (last or 0) + GAP
+
+def rebalance(db: Session, model, cookbook_id: int, exclude_id: Optional[int] = None):
+    """
+    Renumber the chapters or recipes of a cookbook GAP apart, keeping their order.
+
+    All rows are written with a single executemany statement. The cookbook row is
+    locked first, so concurrent rebalances of one cookbook run one after the other.
+    """
+    db.execute(select(Cookbook.id).where(Cookbook.id == cookbook_id).with_for_update())
+    ids = db.execute(
+        select(model.id)
+        .where(model.cookbook_id == cookbook_id, model.id != exclude_id)
+        .order_by(model.position, model.id)
+    ).scalars().all()
+    if not ids:
+        return
+    table = model.__table__
+    db.execute(
+        update(table).where(table.c.id == bindparam("item_id")).values(position=bindparam("new_position")),
+        [{"item_id": item_id, "new_position": (index + 1) * GAP} for index, item_id in enumerate(ids)]
+    )
+
+def _free_position(db: Session, model, cookbook_id: int, item_id: int, after_id: Optional[int]) -> Optional[int]:
+    # Position between the item to move after (or the start) and its current successor
+    others = (model.cookbook_id == cookbook_id, model.id != item_id)
+    lower = 0
+    if after_id is not None:
+        lower = db.execute(select(model.position).where(model.id == after_id)).scalar()
+    upper = db.execute(
+        select(func.min(model.position)).where(*others, model.id != after_id, model.position >= lower)
+    ).scalar()
+    if upper is None:
+        return lower + GAP
+    position = (lower + upper) // 2
+    return position if lower < position < upper else None
+
+def move(db: Session, item, after_id: Optional[int]):
+    """
+    Move a chapter or recipe of a cookbook directly after another one, or to the start
+    if after_id is None.
+
+    Only the moved row is written, unless there is no free position left between its
+    new neighbours; then the cookbook is rebalanced once and the move retried.
+    """
+    model = type(item)
+    position = _free_position(db, model, item.cookbook_id, item.id, after_id)
+    if position is None:
+        rebalance(db, model, item.cookbook_id, exclude_id=item.id)
+        position = _free_position(db, model, item.cookbook_id, item.id, after_id)
+    item.position = position
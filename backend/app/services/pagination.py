@@ -0,0 +1,31 @@
+import base64
+from datetime import datetime
+from typing import Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Listings page with keyset cursors holding the (timestamp, id) of the last row of the
+# previous page. With an index on the two columns every page is a range scan, where an
+# OFFSET would re-read all earlier rows.
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """Encode the (timestamp, id) position of a row as an opaque keyset cursor."""
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor created by encode_cursor."""
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def after_cursor(timestamp_column, id_column, cursor: str):
+    """Condition selecting the rows after a cursor in (timestamp, id) descending order."""
+    timestamp, row_id = decode_cursor(cursor)
+    return or_(timestamp_column < timestamp, and_(timestamp_column == timestamp, id_column < row_id))
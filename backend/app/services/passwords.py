@@ -0,0 +1,57 @@
+import asyncio
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+# bcrypt cost factor; hashes with any other cost are rehashed on the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_QUEUE_SIZE = int(os.getenv("PASSWORD_HASH_QUEUE_SIZE", 32))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+# bcrypt runs on its own small pool, so a burst of logins can neither block the event
+# loop nor starve the threadpool that serves the sync endpoints.
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE)
+
+async def _run_on_executor(function, *args):
+    # Shed load instead of queueing without bound once all workers and queue slots are taken
+    if not _slots.acquire(blocking=False):
+        logger.warning("Password hashing queue is full")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many concurrent sign-ins, please retry shortly",
+            headers={"Retry-After": "1"}
+        )
+    try:
+        return await asyncio.wrap_future(_executor.submit(function, *args))
+    finally:
+        _slots.release()
+
+async def hash_password(password: str) -> str:
+    """Hash a password on the password executor."""
+    return await _run_on_executor(pwd_context.hash, password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the password executor.
+
+    Returns:
+        Whether the password matches, and a new hash if the stored one uses an outdated
+        scheme or cost factor (None otherwise).
+    """
+    return await _run_on_executor(pwd_context.verify_and_update, plain_password, hashed_password)
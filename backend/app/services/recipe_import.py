@@ -0,0 +1,280 @@
+"""
+Bulk import of recipes from JSON Lines.
+
+    python -m backend.app.services.recipe_import --owner anja recipes.ndjson
+    python -m backend.app.services.recipe_import --owner anja export.zip
+
+Every line holds one recipe in the RecipeImport format. A zip archive contains one
+.jsonl or .ndjson file and the images its recipes reference by their path in the archive.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import zipfile
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, or_, select
+
+from backend.app.db.session import SessionLocal
+from backend.app.models import Recipe, User, recipe_ingredients
+from backend.app.models.recipe import Unit
+from backend.app.schemas import RecipeImport
+from backend.app.services.images import derivative_worker
+from backend.app.services.ingredient_index import ingredient_index, normalize_name
+from backend.app.services.search import index_recipes
+from backend.app.services.uploads import StagedUpload, stage_file
+
+logger = logging.getLogger(__name__)
+
+# Recipes written per transaction
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", 500))
+# Longest accepted line; longer lines are reported as errors instead of being buffered
+MAX_LINE_BYTES = 1024 * 1024
+# Failures listed in the result; all of them are counted
+MAX_REPORTED_ERRORS = 1000
+
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson")
+
+base_url = os.getenv("API_BASE_URL")
+
+def _describe(error: ValidationError) -> str:
+    first = error.errors()[0]
+    location = ".".join(str(part) for part in first["loc"])
+    return f"{location}: {first['msg']}" if location else first["msg"]
+
+class RecipeImporter:
+    """
+    Imports the recipes of one owner chunk by chunk.
+
+    Each chunk resolves all of its ingredient names with one lookup and is written in
+    one transaction with executemany statements. Lines that fail validation are
+    reported and skipped; the rest of their chunk is still imported.
+    """
+
+    def __init__(self, owner_id: int, archive: Optional[zipfile.ZipFile] = None):
+        self.owner_id = owner_id
+        self.archive = archive
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    @property
+    def result(self) -> dict:
+        return {"imported": self.imported, "failed": self.failed, "errors": sorted(self.errors, key=lambda error: error["line"])}
+
+    def _fail(self, line: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def _stage_images(self, record: RecipeImport) -> List[StagedUpload]:
+        paths = ([record.thumbnail] if record.thumbnail else []) + record.images
+        if paths and self.archive is None:
+            raise ValueError("Images can only be imported from a zip archive")
+        staged = []
+        try:
+            for path in paths:
+                try:
+                    member = self.archive.getinfo(path)
+                except KeyError:
+                    raise ValueError(f"Image {path} is not in the archive")
+                with self.archive.open(member) as file:
+                    staged.append(stage_file(file, path))
+        except Exception:
+            for staged_upload in staged:
+                staged_upload.discard()
+            raise
+        return staged
+
+    def import_lines(self, lines: Iterable[Tuple[int, bytes]]):
+        """Import numbered lines, IMPORT_CHUNK_SIZE at a time."""
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                self.import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.import_chunk(chunk)
+
+    def import_chunk(self, lines: List[Tuple[int, bytes]]):
+        """Validate and import numbered lines in one transaction."""
+        records = []
+        for number, line in lines:
+            if len(line) > MAX_LINE_BYTES:
+                self._fail(number, f"Line is longer than {MAX_LINE_BYTES} bytes")
+                continue
+            if not line.strip():
+                continue
+            try:
+                records.append((number, RecipeImport.model_validate_json(line)))
+            except ValidationError as e:
+                self._fail(number, _describe(e))
+        if not records:
+            return
+
+        with SessionLocal() as db:
+            names = {normalize_name(ingredient.name) for _, record in records for ingredient in record.ingredients}
+            ids_by_name = ingredient_index.lookup(db, names)
+
+            numbers, recipe_rows, ingredient_rows, staged_files = [], [], [], []
+            for number, record in records:
+                ingredient_names = [normalize_name(ingredient.name) for ingredient in record.ingredients]
+                unknown = [name for name in ingredient_names if name not in ids_by_name]
+                if unknown:
+                    self._fail(number, f"The following ingredients are not valid: {', '.join(unknown)}")
+                    continue
+                if len({ids_by_name[name] for name in ingredient_names}) != len(ingredient_names):
+                    self._fail(number, "An ingredient is listed more than once.")
+                    continue
+                try:
+                    staged = self._stage_images(record)
+                except Exception as e:
+                    self._fail(number, getattr(e, "detail", None) or str(e))
+                    continue
+
+                thumbnail = staged[0] if record.thumbnail else None
+                numbers.append(number)
+                staged_files.extend(staged)
+                recipe_rows.append({
+                    "title": record.title,
+                    "instructions": record.instructions,
+                    "servings": record.servings,
+                    "servings_unit": Unit(record.servings_unit.value),
+                    "special_equipment": [item.strip() for item in record.special_equipment if item.strip()],
+                    "source": record.source,
+                    "prep_time": record.prep_time,
+                    "cook_time": record.cook_time,
+                    "rest_time": record.rest_time,
+                    "total_time": sum(filter(None, [record.prep_time, record.cook_time, record.rest_time])),
+                    "thumbnail_url": thumbnail.url if thumbnail else None,
+                    "images_url": [f"{base_url}{staged_upload.url}" for staged_upload in staged[1 if thumbnail else 0:]],
+                    "owner_id": self.owner_id,
+                })
+                ingredient_rows.append([
+                    {"ingredient_id": ids_by_name[name], "quantity": ingredient.quantity, "unit": ingredient.unit}
+                    for name, ingredient in zip(ingredient_names, record.ingredients)
+                ])
+            if not recipe_rows:
+                return
+
+            try:
+                recipe_ids = db.execute(
+                    insert(Recipe).returning(Recipe.id, sort_by_parameter_order=True),
+                    recipe_rows
+                ).scalars().all()
+                db.execute(recipe_ingredients.insert(), [
+                    {"recipe_id": recipe_id, **row}
+                    for recipe_id, rows in zip(recipe_ids, ingredient_rows)
+                    for row in rows
+                ])
+                index_recipes(db, recipe_ids)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                for staged_upload in staged_files:
+                    staged_upload.discard()
+                logger.exception(f"Could not import lines {numbers[0]}-{numbers[-1]}")
+                for number in numbers:
+                    self._fail(number, f"Could not be saved: {e.__class__.__name__}")
+                return
+
+        for staged_upload in staged_files:
+            staged_upload.promote()
+            derivative_worker.enqueue(staged_upload.relative_path)
+        self.imported += len(recipe_ids)
+
+def numbered_lines(file) -> Iterator[Tuple[int, bytes]]:
+    """
+    Number the lines of a binary file, starting at 1.
+
+    Like stream_lines, lines longer than MAX_LINE_BYTES are cut off just after the limit
+    and the rest of them is skipped without being buffered.
+    """
+    number = 0
+    while line := file.readline(MAX_LINE_BYTES + 1):
+        number += 1
+        if line.endswith(b"\n"):
+            line = line[:-1]
+        elif len(line) > MAX_LINE_BYTES:
+            rest = line
+            while rest and not rest.endswith(b"\n"):
+                rest = file.readline(MAX_LINE_BYTES + 1)
+        yield number, line
+
+async def stream_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """
+    Split a streamed body into numbered lines, starting at 1.
+
+    Lines longer than MAX_LINE_BYTES are cut off just after the limit, so import_chunk
+    reports them without the whole line ever being buffered.
+    """
+    number = 0
+    buffer = b""
+    skipping = False
+    async for chunk in chunks:
+        buffer += chunk
+        while (end := buffer.find(b"\n")) != -1:
+            line, buffer = buffer[:end], buffer[end + 1:]
+            if skipping:
+                skipping = False
+                continue
+            number += 1
+            yield number, line
+        if len(buffer) > MAX_LINE_BYTES and not skipping:
+            number += 1
+            yield number, buffer[:MAX_LINE_BYTES + 1]
+            skipping = True
+        if skipping:
+            buffer = b""
+    if buffer and not skipping:
+        yield number + 1, buffer
+
+def import_archive(importer: RecipeImporter, archive: zipfile.ZipFile):
+    """Import the JSON Lines file of a zip archive, with the images it references."""
+    names = [name for name in archive.namelist() if name.lower().endswith(JSON_LINES_EXTENSIONS)]
+    if len(names) != 1:
+        raise ValueError(f"The archive must contain exactly one {' or '.join(JSON_LINES_EXTENSIONS)} file")
+    importer.archive = archive
+    with archive.open(names[0]) as file:
+        importer.import_lines(numbered_lines(file))
+
+def main():
+    parser = argparse.ArgumentParser(description="Import recipes from a JSON Lines file or a zip archive.")
+    parser.add_argument("path", help="A .jsonl/.ndjson file, a .zip archive, or - for standard input")
+    parser.add_argument("--owner", required=True, help="Username or id of the user the recipes are imported for")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    owner = User.username == args.owner
+    if args.owner.isdigit():
+        owner = or_(owner, User.id == int(args.owner))
+    with SessionLocal() as db:
+        owner_id = db.execute(select(User.id).where(owner)).scalar()
+    if owner_id is None:
+        sys.exit(f"User {args.owner} not found")
+
+    importer = RecipeImporter(owner_id)
+    start = time.perf_counter()
+    if args.path == "-":
+        importer.import_lines(numbered_lines(sys.stdin.buffer))
+    elif zipfile.is_zipfile(args.path):
+        with zipfile.ZipFile(args.path) as archive:
+            import_archive(importer, archive)
+    else:
+        with open(args.path, "rb") as file:
+            importer.import_lines(numbered_lines(file))
+    elapsed = time.perf_counter() - start
+
+    for error in importer.result["errors"]:
+        print(f"line {error['line']}: {error['error']}", file=sys.stderr)
+    print(json.dumps({"imported": importer.imported, "failed": importer.failed, "seconds": round(elapsed, 2)}))
+    if importer.failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import logging
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import Column, DateTime, Integer, Table, bindparam, delete, select, text
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from backend.app.db.base_class import Base
+from backend.app.db.session import SessionLocal, engine
+from backend.app.models import Ingredient, IngredientTranslation, Recipe, recipe_ingredients
+from backend.app.services.forks import ingredients_recipe_id
+
+logger = logging.getLogger(__name__)
+
+# Full-text index over the title, instructions and ingredient names (including their
+# translations) of every recipe, keyed by recipe and scoped by owner: an FTS5 table on
+# SQLite, a tsvector table on PostgreSQL
+SEARCH_TABLE = "recipe_search"
+
+# Ingredients whose names changed since the recipes using them were last indexed
+stale_search_ingredients = Table(
+    "stale_search_ingredients",
+    Base.metadata,
+    Column("ingredient_id", Integer, primary_key=True),
+    Column("marked_at", DateTime, nullable=False),
+)
+
+# Relative weight of the title, ingredients and instructions when ranking matches
+TITLE_WEIGHT = 10.0
+INGREDIENTS_WEIGHT = 4.0
+INSTRUCTIONS_WEIGHT = 1.0
+
+MAX_QUERY_TERMS = 10
+
+# Recipes reindexed per transaction, and seconds between checks for stale ingredients
+# marked by other processes
+REINDEX_BATCH_SIZE = int(os.getenv("SEARCH_REINDEX_BATCH_SIZE", 500))
+REINDEX_INTERVAL_SECONDS = float(os.getenv("SEARCH_REINDEX_INTERVAL_SECONDS", 30))
+
+_POSTGRES = engine.dialect.name == "postgresql"
+_TERM = re.compile(r"\w+")
+
+if _POSTGRES:
+    _DELETE = text(f"DELETE FROM {SEARCH_TABLE} WHERE recipe_id IN :recipe_ids")
+    _INSERT = text(
+        f"INSERT INTO {SEARCH_TABLE} (recipe_id, owner_id, document) VALUES (:recipe_id, :owner_id, "
+        "setweight(to_tsvector('simple', :title), 'A') || "
+        "setweight(to_tsvector('simple', :ingredients), 'B') || "
+        "setweight(to_tsvector('simple', :instructions), 'C')) "
+        "ON CONFLICT (recipe_id) DO UPDATE SET owner_id = EXCLUDED.owner_id, document = EXCLUDED.document"
+    )
+    _SEARCH = text(
+        f"SELECT recipe_id FROM {SEARCH_TABLE} "
+        "WHERE owner_id = :owner_id AND document @@ to_tsquery('simple', :query) "
+        f"ORDER BY ts_rank_cd('{{0, {INSTRUCTIONS_WEIGHT / TITLE_WEIGHT}, {INGREDIENTS_WEIGHT / TITLE_WEIGHT}, 1}}', "
+        "document, to_tsquery('simple', :query)) DESC, recipe_id DESC "
+        "LIMIT :limit OFFSET :offset"
+    )
+else:
+    _DELETE = text(f"DELETE FROM {SEARCH_TABLE} WHERE rowid IN :recipe_ids")
+    _INSERT = text(
+        f"INSERT INTO {SEARCH_TABLE} (rowid, owner, title, ingredients, instructions) "
+        "VALUES (:recipe_id, 'u' || :owner_id, :title, :ingredients, :instructions)"
+    )
+    # The owner column holds one token per recipe, so the match only visits the documents
+    # of one user; it is left out of the ranking
+    _SEARCH = text(
+        f"SELECT rowid AS recipe_id FROM {SEARCH_TABLE} "
+        f"WHERE {SEARCH_TABLE} MATCH :query "
+        f"ORDER BY bm25({SEARCH_TABLE}, 0.0, {TITLE_WEIGHT}, {INGREDIENTS_WEIGHT}, {INSTRUCTIONS_WEIGHT}), rowid DESC "
+        "LIMIT :limit OFFSET :offset"
+    )
+_DELETE = _DELETE.bindparams(bindparam("recipe_ids", expanding=True))
+
+def create_search_index(connection):
+    """Create the full-text index table if it doesn't exist yet."""
+    if _POSTGRES:
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+            "recipe_id INTEGER PRIMARY KEY REFERENCES recipes (id) ON DELETE CASCADE, "
+            "owner_id INTEGER NOT NULL, "
+            "document TSVECTOR NOT NULL)"
+        ))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_owner_id ON {SEARCH_TABLE} (owner_id)"
+        ))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_{SEARCH_TABLE}_document ON {SEARCH_TABLE} USING GIN (document)"
+        ))
+    else:
+        # Prefix indexes make the prefix queries of search-as-you-type cheap
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            "owner, title, ingredients, instructions, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4')"
+        ))
+
+def drop_search_index(connection):
+    """Drop the full-text index table, so create_search_index can build it with a new layout."""
+    connection.execute(text(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+
+def _documents(db, recipe_ids: List[int]) -> List[dict]:
+    recipes = db.execute(
+        select(Recipe.id, Recipe.owner_id, Recipe.title, Recipe.instructions).where(Recipe.id.in_(recipe_ids))
+    ).all()
+
+    # Index every ingredient under its canonical name and all of its translations
+    names: Dict[int, List[str]] = {recipe.id: [] for recipe in recipes}
+    rows = db.execute(
+        select(Recipe.id.label("recipe_id"), Ingredient.name, IngredientTranslation.name.label("translation"))
+        .join(recipe_ingredients, recipe_ingredients.c.recipe_id == ingredients_recipe_id)
+        .join(Ingredient, Ingredient.id == recipe_ingredients.c.ingredient_id)
+        .outerjoin(IngredientTranslation, IngredientTranslation.ingredient_id == Ingredient.id)
+        .where(Recipe.id.in_(recipe_ids))
+    ).all()
+    for row in rows:
+        names[row.recipe_id].extend(name for name in (row.name, row.translation) if name)
+
+    return [
+        {
+            "recipe_id": recipe.id,
+            "owner_id": recipe.owner_id,
+            "title": recipe.title,
+            "ingredients": " ".join(dict.fromkeys(names[recipe.id])),
+            "instructions": recipe.instructions,
+        }
+        for recipe in recipes
+    ]
+
+def index_recipes(db, recipe_ids: List[int]):
+    """
+    Write the index entries of the given recipes, replacing existing ones.
+
+    Takes a session or connection and must run in the transaction that changed the recipes.
+    """
+    if not recipe_ids:
+        return
+    documents = _documents(db, recipe_ids)
+    db.execute(_DELETE, {"recipe_ids": recipe_ids})
+    if documents:
+        db.execute(_INSERT, documents)
+
+def remove_recipes(db, recipe_ids: List[int]):
+    """Remove the index entries of deleted recipes, in the transaction that deletes them."""
+    if recipe_ids:
+        db.execute(_DELETE, {"recipe_ids": recipe_ids})
+
+def mark_ingredient_stale(db, ingredient_id: int):
+    """
+    Queue the recipes using an ingredient for reindexing after its names changed.
+
+    Must run in the transaction that changed the names; search_reindexer picks the
+    ingredient up once it is committed.
+    """
+    statement = (postgresql_insert if _POSTGRES else sqlite_insert)(stale_search_ingredients).values(
+        ingredient_id=ingredient_id, marked_at=datetime.utcnow()
+    )
+    # A newer mark keeps a reindex that is already running from clearing the ingredient
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[stale_search_ingredients.c.ingredient_id],
+        set_={"marked_at": statement.excluded.marked_at}
+    ))
+
+class SearchReindexer:
+    """
+    Background thread that reindexes the recipes of stale ingredients, including unedited forks.
+
+    The recipes of an ingredient are reindexed in batches of their own transaction, so a
+    popular ingredient never holds locks for long. An ingredient is only cleared once all
+    of its recipes are done; an interrupted reindex starts over on the next start.
+    """
+
+    def __init__(self, batch_size: int = REINDEX_BATCH_SIZE, interval: float = REINDEX_INTERVAL_SECONDS):
+        self._batch_size = batch_size
+        self._interval = interval
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="search-reindex", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop after the current batch."""
+        if self._thread:
+            self._stop_event.set()
+            self._wake_event.set()
+            self._thread.join()
+            self._thread = None
+
+    def notify(self):
+        """Reindex right away instead of at the next interval; call after committing a mark."""
+        self._wake_event.set()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run_pending()
+            except Exception as e:
+                logger.error(f"Search reindexing failed: {e}")
+            self._wake_event.wait(self._interval)
+            self._wake_event.clear()
+
+    def run_pending(self):
+        """Reindex the recipes of every stale ingredient."""
+        with SessionLocal() as db:
+            stale = db.execute(select(stale_search_ingredients)).all()
+        for ingredient_id, marked_at in stale:
+            if not self._reindex(ingredient_id):
+                return
+            with SessionLocal() as db:
+                db.execute(
+                    delete(stale_search_ingredients)
+                    .where(stale_search_ingredients.c.ingredient_id == ingredient_id, stale_search_ingredients.c.marked_at == marked_at)
+                )
+                db.commit()
+            logger.info(f"Reindexed the recipes of ingredient {ingredient_id}")
+
+    def _reindex(self, ingredient_id: int) -> bool:
+        using_ingredient = ingredients_recipe_id.in_(
+            select(recipe_ingredients.c.recipe_id).where(recipe_ingredients.c.ingredient_id == ingredient_id)
+        )
+        after_id = 0
+        while not self._stop_event.is_set():
+            with SessionLocal() as db:
+                recipe_ids = db.execute(
+                    select(Recipe.id).where(using_ingredient, Recipe.id > after_id).order_by(Recipe.id).limit(self._batch_size)
+                ).scalars().all()
+                if not recipe_ids:
+                    return True
+                index_recipes(db, recipe_ids)
+                db.commit()
+            after_id = recipe_ids[-1]
+        return False
+
+search_reindexer = SearchReindexer()
+
+def backfill_search_index(connection, after_id: int, batch_size: int) -> Optional[int]:
+    """Index the recipes after the given id; used as a data migration."""
+    recipe_ids = connection.execute(
+        select(Recipe.id).where(Recipe.id > after_id).order_by(Recipe.id).limit(batch_size)
+    ).scalars().all()
+    if not recipe_ids:
+        return None
+    index_recipes(connection, recipe_ids)
+    return recipe_ids[-1]
+
+def search_statement(query: str, owner_id: int, limit: int, offset: int):
+    """
+    Build the statement selecting the ids of the best matching recipes of a user.
+
+    Every term of the query must match the start of a word, so results refine while the
+    user is still typing.
+
+    Returns:
+        The statement, or None if the query contains no searchable terms.
+    """
+    terms = [term.lower() for term in _TERM.findall(query)][:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    if _POSTGRES:
+        match = " & ".join(f"{term}:*" for term in terms)
+        return _SEARCH.bindparams(query=match, owner_id=owner_id, limit=limit, offset=offset)
+    match = " ".join(f'"{term}"*' for term in terms)
+    match = f'owner : "u{owner_id}" AND {{title ingredients instructions}} : ({match})'
+    return _SEARCH.bindparams(query=match, limit=limit, offset=offset)
@@ -0,0 +1,70 @@
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import DateTime, Integer, delete, exists, insert, literal, select, union, update
+from sqlalchemy.orm import Session, aliased
+
+from backend.app.models import Recipe, SharedRecipe, User
+from backend.app.models.user import cookbook_users
+
+# Columns written when a recipe is shared, in the order of the SELECT below
+SHARE_COLUMNS = [
+    "user_id", "recipe_id", "shared_by_id", "cookbook_id", "created_at",
+    "title", "thumbnail_url", "total_time", "owner_id", "owner_username",
+]
+
+def share_recipe(db: Session, recipe_id: int, shared_by_id: int, user_ids: List[int], cookbook_id: Optional[int]) -> int:
+    """
+    Add a recipe to the inboxes of the given users and of every member of a cookbook.
+
+    All inbox rows are written by one INSERT ... SELECT, which also copies the summary
+    of the recipe and its owner, so sharing with a large cookbook costs one statement.
+    Recipients that already have the recipe, and its owner, are skipped.
+
+    Returns:
+        The number of users the recipe was shared with.
+    """
+    recipients = []
+    if user_ids:
+        recipients.append(select(User.id.label("user_id")).where(User.id.in_(user_ids)))
+    if cookbook_id is not None:
+        recipients.append(select(cookbook_users.c.user_id).where(cookbook_users.c.cookbook_id == cookbook_id))
+    if not recipients:
+        return 0
+    recipient = (union(*recipients) if len(recipients) > 1 else recipients[0]).subquery()
+
+    owner = aliased(User)
+    rows = (
+        select(
+            recipient.c.user_id,
+            Recipe.id,
+            literal(shared_by_id, Integer),
+            literal(cookbook_id, Integer),
+            literal(datetime.utcnow(), DateTime),
+            Recipe.title,
+            Recipe.thumbnail_url,
+            Recipe.total_time,
+            Recipe.owner_id,
+            owner.username,
+        )
+        .select_from(recipient)
+        .join(Recipe, Recipe.id == recipe_id)
+        .join(owner, owner.id == Recipe.owner_id)
+        .where(
+            recipient.c.user_id != Recipe.owner_id,
+            ~exists().where(SharedRecipe.recipe_id == recipe_id, SharedRecipe.user_id == recipient.c.user_id)
+        )
+    )
+    return db.execute(insert(SharedRecipe).from_select(SHARE_COLUMNS, rows)).rowcount
+
+def remove_shares(db: Session, recipe_ids: List[int]):
+    """Remove recipes from every inbox; must run before the recipes are deleted."""
+    db.execute(delete(SharedRecipe).where(SharedRecipe.recipe_id.in_(recipe_ids)))
+
+def refresh_shares(db: Session, recipe: Recipe):
+    """Update the summary copied into the inboxes after a recipe was edited."""
+    db.execute(
+        update(SharedRecipe)
+        .where(SharedRecipe.recipe_id == recipe.id)
+        .values(title=recipe.title, thumbnail_url=recipe.thumbnail_url, total_time=recipe.total_time)
+    )
@@ -0,0 +1,245 @@
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+from typing import AsyncIterator, BinaryIO, List, Optional
+
+from fastapi import HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from starlette.formparsers import MultiPartException, MultiPartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+UPLOADS_DIR = os.getenv("UPLOADS_DIR", "uploads")
+STAGING_DIR = os.path.join(UPLOADS_DIR, ".staging")
+
+CHUNK_SIZE = 64 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+MAX_REQUEST_UPLOAD_BYTES = int(os.getenv("MAX_REQUEST_UPLOAD_BYTES", 50 * 1024 * 1024))
+MAX_FILES_PER_REQUEST = int(os.getenv("MAX_FILES_PER_REQUEST", 20))
+# Room for the text fields and multipart framing on top of the files of a request
+MAX_FORM_FIELDS_BYTES = int(os.getenv("MAX_FORM_FIELDS_BYTES", 1024 * 1024))
+MAX_REQUEST_BODY_BYTES = MAX_REQUEST_UPLOAD_BYTES + MAX_FORM_FIELDS_BYTES
+
+_EXTENSION_PATTERN = re.compile(r"^\.[a-z0-9]{1,8}$")
+
+class StagedUpload:
+    """An uploaded file written to the staging directory under a temporary name."""
+
+    def __init__(self, staged_path: str, digest: str, extension: str, size: int):
+        self.staged_path = staged_path
+        self.digest = digest
+        self.extension = extension
+        self.size = size
+
+    @property
+    def relative_path(self) -> str:
+        """Content-addressed path of the file below the uploads directory."""
+        return f"{self.digest[:2]}/{self.digest}{self.extension}"
+
+    @property
+    def url(self) -> str:
+        """Path under which the file is served by the /uploads static mount."""
+        return f"/uploads/{self.relative_path}"
+
+    def promote(self):
+        """Move the file to its content-addressed location, or drop it if it is already stored."""
+        final_path = os.path.join(UPLOADS_DIR, self.relative_path)
+        if os.path.exists(final_path):
+            self.discard()
+            return
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(self.staged_path, final_path)
+
+    def discard(self):
+        """Remove the staged file."""
+        try:
+            os.remove(self.staged_path)
+        except FileNotFoundError:
+            pass
+
+def _extension(filename: Optional[str]) -> str:
+    extension = os.path.splitext(filename or "")[1].lower()
+    return extension if _EXTENSION_PATTERN.match(extension) else ""
+
+def stage_file(file: BinaryIO, filename: Optional[str], max_bytes: int = MAX_UPLOAD_BYTES) -> StagedUpload:
+    """
+    Stream a readable binary file, such as a member of a zip archive, to the staging
+    directory, hashing it chunk by chunk.
+
+    Raises:
+        HTTPException: 413 if the file is larger than max_bytes.
+    """
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    fd, staged_path = tempfile.mkstemp(dir=STAGING_DIR)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while chunk := file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File {filename} exceeds the upload limit of {max_bytes} bytes"
+                    )
+                digest.update(chunk)
+                f.write(chunk)
+    except Exception:
+        os.remove(staged_path)
+        raise
+    return StagedUpload(staged_path, digest.hexdigest(), _extension(filename), size)
+
+class _UploadBudget:
+    """What is left of the upload limits of one request."""
+
+    def __init__(self):
+        self.files = MAX_FILES_PER_REQUEST
+        self.bytes = MAX_REQUEST_UPLOAD_BYTES
+
+class _StagingFile:
+    """
+    File object of an UploadFile that writes the part to the staging directory and hashes
+    it as it arrives.
+
+    It has no _rolled attribute, so UploadFile calls it in the threadpool. The staged
+    file is removed on close unless it was promoted before.
+    """
+
+    def __init__(self, filename: Optional[str], budget: _UploadBudget):
+        self._filename = filename
+        self._budget = budget
+        self._file: Optional[BinaryIO] = None
+        self._staged_path: Optional[str] = None
+        self._digest = hashlib.sha256()
+        self._size = 0
+
+    def _open(self):
+        if self._staged_path is None:
+            os.makedirs(STAGING_DIR, exist_ok=True)
+            fd, self._staged_path = tempfile.mkstemp(dir=STAGING_DIR)
+            self._file = os.fdopen(fd, "wb")
+
+    def write(self, data: bytes):
+        self._size += len(data)
+        self._budget.bytes -= len(data)
+        if self._size > MAX_UPLOAD_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File {self._filename} exceeds the upload limit of {MAX_UPLOAD_BYTES} bytes"
+            )
+        if self._budget.bytes < 0:
+            raise HTTPException(
+                status_code=413,
+                detail=f"The files of a request exceed the limit of {MAX_REQUEST_UPLOAD_BYTES} bytes"
+            )
+        self._open()
+        self._digest.update(data)
+        self._file.write(data)
+
+    def seek(self, offset: int):
+        # Starlette seeks back to the start once the part is complete. Nothing reads the
+        # file before it is promoted, so it is closed instead.
+        self._open()
+        if not self._file.closed:
+            self._file.close()
+
+    def staged_upload(self) -> StagedUpload:
+        return StagedUpload(self._staged_path, self._digest.hexdigest(), _extension(self._filename), self._size)
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+        if self._staged_path is not None:
+            self.staged_upload().discard()
+
+class _StagingMultiPartParser(MultiPartParser):
+    """Multipart parser that stages the files of a request instead of spooling them."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._budget = _UploadBudget()
+        self._staging_files: List[_StagingFile] = []
+
+    def on_headers_finished(self):
+        super().on_headers_finished()
+        upload = self._current_part.file
+        if upload is None:
+            return
+        self._budget.files -= 1
+        if self._budget.files < 0:
+            raise HTTPException(status_code=413, detail=f"At most {MAX_FILES_PER_REQUEST} files can be uploaded at once")
+        # Replaces the spooled file, which was never written to
+        upload.file.close()
+        upload.file = _StagingFile(upload.filename, self._budget)
+        self._staging_files.append(upload.file)
+
+    async def parse(self):
+        try:
+            return await super().parse()
+        except BaseException:
+            for staging_file in self._staging_files:
+                await run_in_threadpool(staging_file.close)
+            raise
+
+async def _limited(stream: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    size = 0
+    async for chunk in stream:
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"The request exceeds the limit of {max_bytes} bytes")
+        yield chunk
+
+class _StagingRequest(Request):
+    def form(self, **kwargs):
+        return self._stage_form()
+
+    async def _stage_form(self):
+        if self._form is None:
+            content_type, _ = parse_options_header(self.headers.get("Content-Type"))
+            if content_type != b"multipart/form-data":
+                return await super().form()
+            parser = _StagingMultiPartParser(self.headers, _limited(self.stream(), MAX_REQUEST_BODY_BYTES))
+            try:
+                self._form = await parser.parse()
+            except MultiPartException as e:
+                raise HTTPException(status_code=400, detail=e.message)
+        return self._form
+
+class StagedUploadRoute(APIRoute):
+    """
+    Route whose uploaded files are written to the staging directory and hashed while the
+    body streams in, within the per-file and per-request limits.
+
+    Bodies announcing more than MAX_REQUEST_BODY_BYTES are rejected before they are read.
+    The UploadFiles of the endpoint hold the staged files; get them with staged_uploads.
+    Staged files that weren't promoted are removed once the response is sent.
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def staged_upload_handler(request: Request):
+            content_length = request.headers.get("content-length", "")
+            if content_length.isdigit() and int(content_length) > MAX_REQUEST_BODY_BYTES:
+                raise HTTPException(status_code=413, detail=f"The request exceeds the limit of {MAX_REQUEST_BODY_BYTES} bytes")
+            return await handler(_StagingRequest(request.scope, request.receive))
+
+        return staged_upload_handler
+
+def staged_uploads(uploads: List[UploadFile]) -> List[StagedUpload]:
+    """Return the staged files of the uploads of a StagedUploadRoute endpoint."""
+    return [upload.file.staged_upload() for upload in uploads]
+
+def remove_stale_staging_files(max_age_seconds: int = 3600):
+    """Remove staging files left behind by requests that died before commit or rollback."""
+    if not os.path.isdir(STAGING_DIR):
+        return
+    cutoff = time.time() - max_age_seconds
+    for entry in os.scandir(STAGING_DIR):
+        if entry.is_file() and entry.stat().st_mtime < cutoff:
+            os.remove(entry.path)
+            logger.info(f"Removed stale staging file {entry.name}")
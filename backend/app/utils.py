@@ -1,17 +1,19 @@
 import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 from starlette.status import HTTP_401_UNAUTHORIZED
 from dotenv import load_dotenv
 import os
-import json
-from passlib.context import CryptContext
 
 from backend.app.models import User
 from backend.app.schemas import TokenData
-from backend.app.db import get_db
+from backend.app.db import AsyncSessionLocal
 
 load_dotenv(r"C:\Users\Anja\recipe_app\backend\.env")
 
@@ -24,37 +26,87 @@ ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+TOKEN_VERSION_TTL_SECONDS = int(os.getenv("TOKEN_VERSION_TTL_SECONDS", 60))
+TOKEN_VERSION_CACHE_SIZE = int(os.getenv("TOKEN_VERSION_CACHE_SIZE", 10000))
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password using passlib's CryptContext."""
-    return pwd_context.verify(plain_password, hashed_password)
+_MISSING = object()
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+class TokenVersionCache:
+    """LRU cache of user token versions whose entries expire after a TTL."""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self._max_size = max_size
+        self._ttl_seconds = ttl_seconds
+        # User id -> (token version, monotonic expiry time), least recently used first
+        self._entries: "OrderedDict[int, Tuple[Optional[int], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int):
+        """Return the cached version, or _MISSING if it isn't cached or has expired."""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return _MISSING
+            if entry[1] <= time.monotonic():
+                del self._entries[user_id]
+                return _MISSING
+            self._entries.move_to_end(user_id)
+            return entry[0]
+
+    def put(self, user_id: int, version: Optional[int]):
+        with self._lock:
+            self._entries[user_id] = (version, time.monotonic() + self._ttl_seconds)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+    def forget(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+_token_versions = TokenVersionCache(TOKEN_VERSION_CACHE_SIZE, TOKEN_VERSION_TTL_SECONDS)
+
+async def _current_token_version(user_id: int) -> Optional[int]:
+    """
+    Return the token version of a user, or None if the user no longer exists.
+
+    Versions are cached for TOKEN_VERSION_TTL_SECONDS, so revoking tokens takes at most
+    that long to reach every process while most requests skip the database entirely.
+    """
+    version = _token_versions.get(user_id)
+    if version is not _MISSING:
+        return version
+
+    async with AsyncSessionLocal() as db:
+        version = (await db.execute(select(User.token_version).where(User.id == user_id))).scalar_one_or_none()
+    _token_versions.put(user_id, version)
+    return version
+
+def forget_token_version(user_id: int):
+    """Drop the cached token version of a user after it has been bumped."""
+    _token_versions.forget(user_id)
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> TokenData:
     credentials_exception = HTTPException(
         status_code=HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        logging.info("Received token: %s", token)
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        logging.info("Decoded payload: %s", payload)
-        email: str = payload.get("sub")
-        if email is None:
-            logging.warning("Token payload does not contain 'sub'")
-            raise credentials_exception
-        token_data = TokenData(email=email)
     except JWTError as e:
-        logging.error("JWT decoding error: %s", e)
+        logging.warning("JWT decoding error: %s", e)
         raise credentials_exception
-    user = db.query(User).filter(User.email == token_data.email).first()
-    if user is None:
-        logging.warning("No user found for email: %s", token_data.email)
+
+    user_id = payload.get("uid")
+    username = payload.get("username")
+    email = payload.get("sub")
+    if user_id is None or username is None or email is None:
+        logging.warning("Token payload does not contain the user claims")
+        raise credentials_exception
+
+    if payload.get("ver", 0) != await _current_token_version(user_id):
+        logging.warning("Revoked or stale token for user %s", user_id)
         raise credentials_exception
-    logging.info("Authenticated user: %s", user.username)
-    return user
 
-def load_predefined_ingredients(filepath: str):
-    with open(filepath, 'r', encoding='utf-8') as file:
-        return json.load(file)
\ No newline at end of file
+    return TokenData(id=user_id, username=username, email=email)
\ No newline at end of file
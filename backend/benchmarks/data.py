@@ -0,0 +1,166 @@
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import func, insert, select
+
+SYLLABLES = [
+    "ba", "ke", "mi", "lo", "ru", "sa", "te", "vi", "no", "pa", "zu", "cho", "fen",
+    "gar", "hel", "ko", "lin", "mar", "pel", "ros", "tan", "ul", "wer", "xa",
+]
+LANGUAGES = ["en", "de", "fr"]
+INSERT_BATCH_SIZE = 1000
+
+@dataclass
+class DatasetConfig:
+    users: int = 20
+    recipes: int = 2000
+    ingredients: int = 500
+    translations_per_ingredient: int = 2
+    ingredients_per_recipe: int = 8
+    cookbooks: int = 40
+    recipes_per_cookbook: int = 25
+    seed: int = 42
+
+@dataclass
+class Dataset:
+    """Ids of the generated rows, used to build realistic requests."""
+    user_ids: List[int] = field(default_factory=list)
+    recipe_ids_by_user: Dict[int, List[int]] = field(default_factory=dict)
+    ingredient_ids: List[int] = field(default_factory=list)
+    ingredient_names: List[str] = field(default_factory=list)
+    words: List[str] = field(default_factory=list)
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+
+def _insert(connection, table, rows: List[dict]):
+    for start in range(0, len(rows), INSERT_BATCH_SIZE):
+        connection.execute(insert(table), rows[start:start + INSERT_BATCH_SIZE])
+
+def _next_id(connection, table) -> int:
+    return (connection.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+def generate(config: DatasetConfig) -> Dataset:
+    """
+    Insert a synthetic dataset with bulk statements.
+
+    The same config always produces the same rows, so runs against separately
+    generated databases are comparable.
+    """
+    # Imported here, as the app reads its database settings at import time and the
+    # benchmark runner configures them after parsing its arguments
+    from backend.app.db.session import engine
+    from backend.app.models import (
+        Cookbook,
+        CookbookRecipe,
+        Ingredient,
+        IngredientTranslation,
+        Recipe,
+        User,
+        recipe_ingredients,
+    )
+    from backend.app.models.user import cookbook_users
+    from backend.app.services.catalogue import bump_catalogue_version
+    from backend.app.services.ingredient_index import normalize_name
+    from backend.app.services.ordering import GAP
+    from backend.app.services.passwords import pwd_context
+    from backend.app.services.search import index_recipes
+
+    rng = random.Random(config.seed)
+    dataset = Dataset()
+    # Every user gets the same password; hashing one per user would dominate the setup
+    hashed_password = pwd_context.hash("benchmark")
+    now = datetime.utcnow()
+
+    with engine.begin() as connection:
+        user_id = _next_id(connection, User.__table__)
+        users = []
+        for i in range(config.users):
+            users.append({
+                "id": user_id + i,
+                "username": f"bench_user_{user_id + i}",
+                "email": f"bench_user_{user_id + i}@example.com",
+                "hashed_password": hashed_password,
+                "token_version": 0,
+            })
+        _insert(connection, User.__table__, users)
+        dataset.user_ids = [user["id"] for user in users]
+
+        ingredient_id = _next_id(connection, Ingredient.__table__)
+        names = set()
+        ingredients, translations = [], []
+        while len(ingredients) < config.ingredients:
+            name = _word(rng).capitalize()
+            if name.lower() in names:
+                continue
+            names.add(name.lower())
+            ingredients.append({
+                "id": ingredient_id,
+                "name": name,
+                "normalized_name": normalize_name(name),
+                "language": "en",
+                "creator_id": None if rng.random() < 0.8 else rng.choice(dataset.user_ids),
+            })
+            for language in LANGUAGES[1:1 + config.translations_per_ingredient]:
+                translation = f"{name}{_word(rng)}"
+                translations.append({"ingredient_id": ingredient_id, "name": translation, "normalized_name": normalize_name(translation), "language": language})
+            ingredient_id += 1
+        _insert(connection, Ingredient.__table__, ingredients)
+        _insert(connection, IngredientTranslation.__table__, translations)
+        bump_catalogue_version(connection)
+        dataset.ingredient_ids = [ingredient["id"] for ingredient in ingredients]
+        dataset.ingredient_names = [ingredient["name"] for ingredient in ingredients]
+
+        dataset.words = [_word(rng) for _ in range(2000)]
+        recipe_id = _next_id(connection, Recipe.__table__)
+        recipes, links = [], []
+        for i in range(config.recipes):
+            owner_id = rng.choice(dataset.user_ids)
+            prep_time, cook_time = rng.randint(5, 60), rng.randint(0, 120)
+            changed_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+            recipes.append({
+                "id": recipe_id + i,
+                "title": " ".join(rng.choice(dataset.words) for _ in range(rng.randint(2, 5))).capitalize(),
+                "servings": rng.randint(1, 8),
+                "servings_unit": "NUMBER",
+                "special_equipment": [],
+                "instructions": " ".join(rng.choice(dataset.words) for _ in range(rng.randint(30, 300))),
+                "thumbnail_url": None,
+                "images_url": [],
+                "prep_time": prep_time,
+                "cook_time": cook_time,
+                "total_time": prep_time + cook_time,
+                "added_at": changed_at,
+                "changed_at": changed_at,
+                "owner_id": owner_id,
+            })
+            dataset.recipe_ids_by_user.setdefault(owner_id, []).append(recipe_id + i)
+            for linked_id in rng.sample(dataset.ingredient_ids, min(config.ingredients_per_recipe, len(dataset.ingredient_ids))):
+                links.append({
+                    "recipe_id": recipe_id + i,
+                    "ingredient_id": linked_id,
+                    "quantity": rng.choice([None, 1, 2, 100, 250]),
+                    "unit": rng.choice([None, "g", "ml", "tbsp"]),
+                })
+        _insert(connection, Recipe.__table__, recipes)
+        _insert(connection, recipe_ingredients, links)
+
+        cookbook_id = _next_id(connection, Cookbook.__table__)
+        cookbooks, members, entries = [], [], []
+        for i in range(config.cookbooks):
+            cookbooks.append({"id": cookbook_id + i, "name": _word(rng).capitalize(), "created_at": now})
+            for member_id in rng.sample(dataset.user_ids, min(3, len(dataset.user_ids))):
+                members.append({"user_id": member_id, "cookbook_id": cookbook_id + i})
+            for position, linked_id in enumerate(rng.sample([recipe["id"] for recipe in recipes], min(config.recipes_per_cookbook, len(recipes)))):
+                entries.append({"recipe_id": linked_id, "cookbook_id": cookbook_id + i, "position": (position + 1) * GAP, "created_at": now})
+        _insert(connection, Cookbook.__table__, cookbooks)
+        _insert(connection, cookbook_users, members)
+        _insert(connection, CookbookRecipe.__table__, entries)
+
+        recipe_ids = [recipe["id"] for recipe in recipes]
+        for start in range(0, len(recipe_ids), INSERT_BATCH_SIZE):
+            index_recipes(connection, recipe_ids[start:start + INSERT_BATCH_SIZE])
+
+    return dataset
@@ -0,0 +1,327 @@
+"""
+Benchmark the API in-process against a synthetic dataset.
+
+    python -m backend.benchmarks.run --recipes 5000 --concurrency 16 --save baseline.json
+    python -m backend.benchmarks.run --recipes 5000 --concurrency 16 --compare baseline.json
+    python -m backend.benchmarks.run --only /auth/ --concurrency 64 --requests 200
+    python -m backend.benchmarks.run --only "login storm" --concurrency 16 --requests 400
+
+A fresh SQLite database is generated in a temporary directory unless --database-url is
+given. Each scenario is driven by concurrent clients through the ASGI interface, alone
+or, in the mixes, together with others. Throughput, latency percentiles and SQL
+statements per request are reported, along with the requests rejected with 503 once the
+password hashing queue is full. With --compare, scenarios whose p95 latency or throughput
+got worse by more than --threshold are flagged and the exit code is 1.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backend.benchmarks.data import DatasetConfig
+
+Scenario = Tuple[str, Callable]
+
+def _configure_environment(args):
+    # Must run before the app is imported, as its modules read the settings at import time
+    work_dir = tempfile.mkdtemp(prefix="recipe-benchmark-")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret-key")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(work_dir, 'benchmark.db')}"
+    os.environ["UPLOADS_DIR"] = os.path.join(work_dir, "uploads")
+    os.environ.setdefault("API_BASE_URL", "http://benchmark")
+    os.environ["ACCESS_LOG_ENABLED"] = "false"
+    os.environ["RUN_BACKFILLS_AT_STARTUP"] = "false"
+    os.environ.pop("INGREDIENTS_FILE_PATH", None)
+    os.makedirs(os.environ["UPLOADS_DIR"], exist_ok=True)
+
+def _percentile(sorted_values: List[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(percent / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def _scenarios(dataset) -> List[Scenario]:
+    """Named request builders; each gets a random generator and returns (method, url, kwargs)."""
+    users = [user_id for user_id in dataset.user_ids if dataset.recipe_ids_by_user.get(user_id)]
+
+    def list_recipes(rng):
+        return rng.choice(users), "GET", "/api/recipes?limit=50", {}
+
+    def recipe_summaries(rng):
+        return rng.choice(users), "GET", "/api/recipes/summary?limit=50", {}
+
+    def get_recipe(rng):
+        user_id = rng.choice(users)
+        return user_id, "GET", f"/api/recipes/{rng.choice(dataset.recipe_ids_by_user[user_id])}", {}
+
+    def search_recipes(rng):
+        query = " ".join(rng.choice(dataset.words)[:4] for _ in range(rng.randint(1, 2)))
+        return rng.choice(users), "GET", "/api/recipes/search", {"params": {"q": query, "limit": 20}}
+
+    def cookable_recipes(rng):
+        on_hand = rng.sample(dataset.ingredient_ids, 10)
+        return rng.choice(users), "GET", "/api/recipes/cookable", {"params": {"ingredient_ids": on_hand, "limit": 20}}
+
+    def list_ingredients(rng):
+        return rng.choice(users), "GET", "/api/ingredients", {}
+
+    def suggest_ingredients(rng):
+        prefix = rng.choice(dataset.ingredient_names)[:rng.randint(1, 4)]
+        return rng.choice(users), "GET", "/api/ingredients/suggest", {"params": {"prefix": prefix, "lang": "de"}}
+
+    def create_recipe(rng):
+        ingredients = [{"name": name, "quantity": 1} for name in rng.sample(dataset.ingredient_names, 6)]
+        data = {
+            "title": " ".join(rng.choice(dataset.words) for _ in range(3)),
+            "ingredients": json.dumps(ingredients),
+            "instructions": " ".join(rng.choice(dataset.words) for _ in range(100)),
+            "servings": "4",
+            "servings_unit": "NUMBER",
+        }
+        return rng.choice(users), "POST", "/api/recipes", {"data": data}
+
+    # Both run bcrypt on the bounded password executor; with more concurrent clients than
+    # PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE_SIZE, the excess is rejected with 503
+    def login(rng):
+        user_id = rng.choice(dataset.user_ids)
+        return user_id, "POST", "/api/auth/login", {"json": {"identifier": f"bench_user_{user_id}", "password": "benchmark"}}
+
+    registrations = itertools.count()
+
+    def register(rng):
+        name = f"bench_signup_{next(registrations)}_{rng.getrandbits(32):08x}"
+        return rng.choice(users), "POST", "/api/auth/register", {"json": {"username": name, "email": f"{name}@example.com", "password": "benchmark"}}
+
+    # Writes come last so the read scenarios all see the same data
+    return [
+        ("GET /recipes", list_recipes),
+        ("GET /recipes/summary", recipe_summaries),
+        ("GET /recipes/{id}", get_recipe),
+        ("GET /recipes/search", search_recipes),
+        ("GET /recipes/cookable", cookable_recipes),
+        ("GET /ingredients", list_ingredients),
+        ("GET /ingredients/suggest", suggest_ingredients),
+        ("POST /recipes", create_recipe),
+        ("POST /auth/login", login),
+        ("POST /auth/register", register),
+    ]
+
+# Scenarios run at the same time: the first sends --requests requests while the others
+# keep running, to see how load on one endpoint affects the rest
+MIXES: List[Tuple[str, str, List[str]]] = [
+    ("login storm", "POST /auth/login", ["GET /recipes", "GET /recipes/{id}"]),
+]
+
+class StatementCounter:
+    """Counts the SQL statements executed by both engines."""
+
+    def __init__(self, engines):
+        from sqlalchemy import event
+
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "after_cursor_execute", self._increment)
+
+    def _increment(self, *args):
+        self.count += 1
+
+def _split(total: int, concurrency: int) -> List[int]:
+    return [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+
+async def _drive(client, headers: Dict[int, dict], build: Callable, concurrency: int, seed: int, requests: int = 0, done: Optional[asyncio.Event] = None):
+    """
+    Send requests from concurrent clients, either the given number in total or until done is set.
+
+    Returns:
+        The latencies, the status codes of the failed requests and the elapsed seconds.
+    """
+    latencies, errors = [], []
+
+    async def worker(worker_id: int, count: int):
+        rng = random.Random(seed * 1000 + worker_id)
+        sent = 0
+        while not done.is_set() if done is not None else sent < count:
+            user_id, method, url, kwargs = build(rng)
+            start = time.perf_counter()
+            response = await client.request(method, url, headers=headers[user_id], **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+            sent += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker(i, n) for i, n in enumerate(_split(requests, concurrency))])
+    return latencies, errors, time.perf_counter() - start
+
+def _summarize(latencies: List[float], errors: List[int], elapsed: float, statements_per_request: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rejected": errors.count(503),
+        "throughput": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+        "sql_per_request": round(statements_per_request, 2),
+    }
+
+async def _run_scenario(client, headers: Dict[int, dict], build: Callable, args, seed: int, counter: StatementCounter) -> dict:
+    await _drive(client, headers, build, args.concurrency, seed, requests=args.warmup)
+
+    statements_before = counter.count
+    latencies, errors, elapsed = await _drive(client, headers, build, args.concurrency, seed, requests=args.requests)
+    return _summarize(latencies, errors, elapsed, (counter.count - statements_before) / max(len(latencies), 1))
+
+async def _run_mix(client, headers: Dict[int, dict], load: Scenario, background: List[Scenario], args, seed: int, counter: StatementCounter) -> Dict[str, dict]:
+    """
+    Run the load scenario while the background scenarios keep sending requests, and
+    report each of them. Statements are counted for the mix as a whole.
+    """
+    for index, (_, build) in enumerate([load, *background]):
+        await _drive(client, headers, build, args.concurrency, seed + index, requests=args.warmup)
+
+    done = asyncio.Event()
+
+    async def drive_load():
+        try:
+            return await _drive(client, headers, load[1], args.concurrency, seed, requests=args.requests)
+        finally:
+            done.set()
+
+    statements_before = counter.count
+    runs = await asyncio.gather(
+        drive_load(),
+        *[_drive(client, headers, build, args.concurrency, seed + index, done=done) for index, (_, build) in enumerate(background, start=1)]
+    )
+    statements_per_request = (counter.count - statements_before) / max(sum(len(latencies) for latencies, _, _ in runs), 1)
+    return {name: _summarize(*run, statements_per_request) for (name, _), run in zip([load, *background], runs)}
+
+async def _run(args, dataset) -> Dict[str, dict]:
+    import httpx
+
+    from backend.app.api.v1.auth import create_access_token
+    from backend.app.db.async_session import async_engine
+    from backend.app.db.session import engine
+    from backend.app.main import app
+
+    # Tokens are issued directly; logging in would only benchmark bcrypt
+    headers = {
+        user_id: {"Authorization": f"Bearer {create_access_token({'sub': f'bench_user_{user_id}@example.com', 'uid': user_id, 'username': f'bench_user_{user_id}', 'ver': 0})}"}
+        for user_id in dataset.user_ids
+    }
+    counter = StatementCounter([engine, async_engine.sync_engine])
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            scenarios = _scenarios(dataset)
+            for index, (name, build) in enumerate(scenarios):
+                if args.only and not any(pattern in name for pattern in args.only):
+                    continue
+                results[name] = await _run_scenario(client, headers, build, args, args.seed + index, counter)
+                print(_format_row(name, results[name]), flush=True)
+
+            by_name = dict(scenarios)
+            for index, (mix, load, background) in enumerate(MIXES, start=len(scenarios)):
+                if args.only and not any(pattern in mix for pattern in args.only):
+                    continue
+                mix_results = await _run_mix(
+                    client, headers, (load, by_name[load]), [(name, by_name[name]) for name in background],
+                    args, args.seed + index, counter
+                )
+                for name, result in mix_results.items():
+                    results[f"{mix}: {name}"] = result
+                    print(_format_row(f"{mix}: {name}", result), flush=True)
+    return results
+
+SQL_REGRESSION = 0.5
+
+NAME_WIDTH = 40
+
+COLUMNS = ["requests", "errors", "rejected", "throughput", "p50_ms", "p95_ms", "p99_ms", "sql_per_request"]
+
+def _format_row(name: str, result: dict) -> str:
+    return f"{name:<{NAME_WIDTH}}" + "".join(f"{result[column]:>16}" for column in COLUMNS)
+
+def _compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> bool:
+    """Print the change against the baseline and return whether any scenario regressed."""
+    regressed = False
+    print(f"\n{'scenario':<{NAME_WIDTH}}{'p95 change':>16}{'throughput change':>20}{'sql change':>14}")
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f"{name:<{NAME_WIDTH}}{'(no baseline)':>16}")
+            continue
+        p95_change = result["p95_ms"] / previous["p95_ms"] - 1 if previous["p95_ms"] else 0.0
+        throughput_change = result["throughput"] / previous["throughput"] - 1 if previous["throughput"] else 0.0
+        sql_change = result["sql_per_request"] - previous["sql_per_request"]
+        flag = ""
+        # Cache refreshes add the odd statement; a new query per request shows up as >= 1
+        if p95_change > threshold or throughput_change < -threshold or sql_change >= SQL_REGRESSION:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"{name:<{NAME_WIDTH}}{p95_change:>+16.1%}{throughput_change:>+20.1%}{sql_change:>+14.2f}{flag}")
+    return regressed
+
+def main():
+    defaults = DatasetConfig()
+    parser = argparse.ArgumentParser(description="Benchmark the API against a synthetic dataset.")
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--recipes", type=int, default=defaults.recipes)
+    parser.add_argument("--ingredients", type=int, default=defaults.ingredients)
+    parser.add_argument("--cookbooks", type=int, default=defaults.cookbooks)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients per scenario")
+    parser.add_argument("--requests", type=int, default=400, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=40, help="Unmeasured requests per scenario")
+    parser.add_argument("--only", nargs="*", help="Only run scenarios whose name contains one of these")
+    parser.add_argument("--database-url", help="Run against this database instead of a generated SQLite file")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Compare the results against a JSON file written with --save")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change that counts as a regression")
+    args = parser.parse_args()
+
+    _configure_environment(args)
+
+    from backend.app.db.init_db import init_db
+    from backend.benchmarks.data import generate
+
+    config = DatasetConfig(
+        users=args.users,
+        recipes=args.recipes,
+        ingredients=args.ingredients,
+        cookbooks=args.cookbooks,
+        seed=args.seed,
+    )
+    init_db()
+    start = time.perf_counter()
+    dataset = generate(config)
+    print(f"Generated {config.recipes} recipes for {config.users} users in {time.perf_counter() - start:.1f}s\n")
+
+    print(f"{'scenario':<{NAME_WIDTH}}" + "".join(f"{column:>16}" for column in COLUMNS))
+    results = asyncio.run(_run(args, dataset))
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump({"config": asdict(config), "concurrency": args.concurrency, "results": results}, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline["config"] != asdict(config) or baseline["concurrency"] != args.concurrency:
+            print("\nWarning: the baseline was recorded with a different dataset or concurrency")
+        if _compare(results, baseline["results"], args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
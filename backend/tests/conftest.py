@@ -0,0 +1,79 @@
+import itertools
+import json
+import os
+import tempfile
+
+import pytest
+
+# The app reads its settings at import time, so they are set before it is imported
+_work_dir = tempfile.mkdtemp(prefix="recipe-tests-")
+os.environ.update(
+    SECRET_KEY="test-secret-key-test-secret-key-test",
+    ALGORITHM="HS256",
+    DATABASE_URL=f"sqlite:///{os.path.join(_work_dir, 'test.db')}",
+    UPLOADS_DIR=os.path.join(_work_dir, "uploads"),
+    API_BASE_URL="http://testserver",
+    FRONTEND_BASE_URL="http://localhost:3000",
+    INGREDIENTS_FILE_PATH=os.path.join(os.path.dirname(os.path.dirname(__file__)), "ingredients.json"),
+    ACCESS_LOG_ENABLED="false",
+    RUN_BACKFILLS_AT_STARTUP="false",
+    BCRYPT_ROUNDS="4",
+)
+os.makedirs(os.environ["UPLOADS_DIR"], exist_ok=True)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from backend.app.db.async_session import async_engine
+from backend.app.db.session import engine
+from backend.app.main import app
+
+class StatementCounter:
+    """Counts the SQL statements executed by both engines."""
+
+    def __init__(self):
+        self.count = 0
+
+    def _increment(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        for counted_engine in (engine, async_engine.sync_engine):
+            event.listen(counted_engine, "after_cursor_execute", self._increment)
+        return self
+
+    def __exit__(self, *exc_info):
+        for counted_engine in (engine, async_engine.sync_engine):
+            event.remove(counted_engine, "after_cursor_execute", self._increment)
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+_user_numbers = itertools.count()
+
+def register(client) -> dict:
+    """Register a new user and return its authorization header."""
+    name = f"test_user_{next(_user_numbers)}"
+    response = client.post("/api/auth/register", json={"username": name, "email": f"{name}@example.com", "password": "secret"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def auth_headers(client):
+    """Register a user of its own for the test and return its authorization header."""
+    return register(client)
+
+DEFAULT_INGREDIENTS = [{"name": "flour", "quantity": 200, "unit": "g"}, {"name": "Zucker", "quantity": 1}]
+
+def create_recipe(client, headers, title: str, ingredients=None, instructions: str = "Mix and bake.") -> dict:
+    response = client.post("/api/recipes", headers=headers, data={
+        "title": title,
+        "ingredients": json.dumps(ingredients or DEFAULT_INGREDIENTS),
+        "instructions": instructions,
+        "servings": "4",
+        "servings_unit": "NUMBER",
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
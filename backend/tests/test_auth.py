@@ -0,0 +1,20 @@
+"""Registration rejects taken emails and usernames with 400 instead of failing on commit."""
+import pytest
+
+def register(client, username: str, email: str):
+    return client.post("/api/auth/register", json={"username": username, "email": email, "password": "secret"})
+
+@pytest.fixture(scope="module")
+def taken_account(client):
+    response = register(client, "taken_name", "taken@example.com")
+    assert response.status_code == 200, response.text
+
+@pytest.mark.parametrize("username, email, detail", [
+    ("taken_name", "other@example.com", "Username already taken"),
+    ("other_name", "taken@example.com", "Email already registered"),
+])
+def test_register_rejects_taken_username_or_email(client, taken_account, username, email, detail):
+    response = register(client, username, email)
+
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == detail
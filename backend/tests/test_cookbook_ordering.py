@@ -0,0 +1,49 @@
+"""Moving cookbook recipes keeps their order, also once the gaps between positions run out."""
+from backend.app.services.ordering import GAP
+from backend.tests.conftest import create_recipe
+
+def create_cookbook(client, headers) -> int:
+    response = client.post("/api/cookbooks", headers=headers, json={"name": "Baking"})
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+def cookbook_entries(client, headers, cookbook_id: int) -> list:
+    response = client.get(f"/api/cookbooks/{cookbook_id}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["recipes"]
+
+def test_repeated_moves_to_the_start_rebalance_the_cookbook(client, auth_headers):
+    cookbook_id = create_cookbook(client, auth_headers)
+    entry_ids = []
+    for i in range(4):
+        recipe = create_recipe(client, auth_headers, f"Bread {i}")
+        response = client.post(f"/api/cookbooks/{cookbook_id}/recipes", headers=auth_headers, json={"recipe_id": recipe["id"]})
+        assert response.status_code == 201, response.text
+        entry_ids.append(response.json()["id"])
+    assert [entry["position"] for entry in cookbook_entries(client, auth_headers, cookbook_id)] == [GAP, 2 * GAP, 3 * GAP, 4 * GAP]
+
+    # Each move halves the room before the first entry, so the positions run out long
+    # before the last move and the cookbook has to be renumbered on the way
+    expected = list(entry_ids)
+    for i in range(3 * GAP.bit_length()):
+        entry_id = expected[-1]
+        response = client.post(f"/api/cookbooks/{cookbook_id}/recipes/{entry_id}/move", headers=auth_headers, json={"after_id": None})
+        assert response.status_code == 200, response.text
+        expected = [entry_id] + expected[:-1]
+
+    entries = cookbook_entries(client, auth_headers, cookbook_id)
+    positions = [entry["position"] for entry in entries]
+    assert [entry["id"] for entry in entries] == expected
+    assert positions == sorted(set(positions)) and positions[0] > 0
+
+def test_move_after_an_entry_places_it_between_its_neighbours(client, auth_headers):
+    cookbook_id = create_cookbook(client, auth_headers)
+    entry_ids = []
+    for i in range(3):
+        recipe = create_recipe(client, auth_headers, f"Cake {i}")
+        entry_ids.append(client.post(f"/api/cookbooks/{cookbook_id}/recipes", headers=auth_headers, json={"recipe_id": recipe["id"]}).json()["id"])
+
+    response = client.post(f"/api/cookbooks/{cookbook_id}/recipes/{entry_ids[2]}/move", headers=auth_headers, json={"after_id": entry_ids[0]})
+
+    assert response.status_code == 200, response.text
+    assert [entry["id"] for entry in cookbook_entries(client, auth_headers, cookbook_id)] == [entry_ids[0], entry_ids[2], entry_ids[1]]
@@ -0,0 +1,47 @@
+"""The rating count and average of cookbook recipes follow the feedback that is added and deleted."""
+from backend.tests.conftest import create_recipe, register
+
+def rating(client, headers, cookbook_id: int, entry_id: int):
+    response = client.get(f"/api/cookbooks/{cookbook_id}", headers=headers)
+    assert response.status_code == 200, response.text
+    entry = next(entry for entry in response.json()["recipes"] if entry["id"] == entry_id)
+    return entry["rating_count"], entry["rating_average"]
+
+def test_ratings_keep_the_count_and_average(client, auth_headers):
+    member = register(client)
+    cookbook_id = client.post("/api/cookbooks", headers=auth_headers, json={"name": "Family"}).json()["id"]
+    member_id = client.get("/api/users/me", headers=member).json()["id"]
+    assert client.post(f"/api/cookbooks/{cookbook_id}/members", headers=auth_headers, json={"user_id": member_id}).status_code == 204
+    recipe = create_recipe(client, auth_headers, "Pancakes")
+    entry_id = client.post(f"/api/cookbooks/{cookbook_id}/recipes", headers=auth_headers, json={"recipe_id": recipe["id"]}).json()["id"]
+    feedback_url = f"/api/cookbooks/{cookbook_id}/recipes/{entry_id}/feedback"
+
+    def give(headers, **feedback) -> int:
+        response = client.post(feedback_url, headers=headers, json=feedback)
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+
+    def remove(headers, feedback_id: int):
+        response = client.delete(f"{feedback_url}/{feedback_id}", headers=headers)
+        assert response.status_code == 204, response.text
+
+    assert rating(client, auth_headers, cookbook_id, entry_id) == (0, None)
+
+    own = give(auth_headers, rating=4)
+    give(member, rating=2)
+    give(member, comment="Fluffy")
+    assert rating(client, auth_headers, cookbook_id, entry_id) == (2, 3.0)
+
+    # A second rating by the same user is rejected without touching the aggregate
+    response = client.post(feedback_url, headers=auth_headers, json={"rating": 5})
+    assert response.status_code == 400, response.text
+    assert rating(client, auth_headers, cookbook_id, entry_id) == (2, 3.0)
+
+    # Re-rating replaces the user's rating
+    remove(auth_headers, own)
+    assert rating(client, auth_headers, cookbook_id, entry_id) == (1, 2.0)
+    own = give(auth_headers, rating=5)
+    assert rating(client, auth_headers, cookbook_id, entry_id) == (2, 3.5)
+
+    remove(auth_headers, own)
+    assert rating(client, auth_headers, cookbook_id, entry_id) == (1, 2.0)
@@ -0,0 +1,46 @@
+"""Forks keep their ingredients when the original goes away and only show ancestors the user may see."""
+from backend.tests.conftest import create_recipe, register
+
+def user_id(client, headers) -> int:
+    return client.get("/api/users/me", headers=headers).json()["id"]
+
+def fork(client, headers, recipe_id: int) -> dict:
+    response = client.post(f"/api/recipes/{recipe_id}/fork", headers=headers)
+    assert response.status_code == 201, response.text
+    return response.json()
+
+def share(client, headers, recipe_id: int, recipient_headers):
+    response = client.post(f"/api/recipes/{recipe_id}/shares", headers=headers, json={"user_ids": [user_id(client, recipient_headers)]})
+    assert response.status_code == 200, response.text
+
+def test_deleting_the_original_keeps_the_forks(client, auth_headers):
+    original = create_recipe(client, auth_headers, "Sourdough")
+    first = fork(client, auth_headers, original["id"])
+    # A fork of an unedited fork reads the ingredient rows of the original as well
+    second = fork(client, auth_headers, first["id"])
+
+    response = client.delete(f"/api/recipes/{original['id']}", headers=auth_headers)
+    assert response.status_code == 204, response.text
+
+    first = client.get(f"/api/recipes/{first['id']}", headers=auth_headers).json()
+    second = client.get(f"/api/recipes/{second['id']}", headers=auth_headers).json()
+    assert [ingredient["name"] for ingredient in first["ingredients"]] == ["Flour", "Sugar"]
+    assert [ingredient["name"] for ingredient in second["ingredients"]] == ["Flour", "Sugar"]
+    assert first["lineage"] == []
+    assert [ancestor["id"] for ancestor in second["lineage"]] == [first["id"]]
+
+def test_lineage_hides_ancestors_that_were_not_shared(client):
+    owner, middle, last = register(client), register(client), register(client)
+    original = create_recipe(client, owner, "Focaccia")
+    share(client, owner, original["id"], middle)
+    first = fork(client, middle, original["id"])
+    share(client, middle, first["id"], last)
+    second = fork(client, last, first["id"])
+
+    lineage = client.get(f"/api/recipes/{second['id']}", headers=last).json()["lineage"]
+
+    assert lineage == [
+        {"id": first["id"], "title": "Focaccia", "owner_id": user_id(client, middle)},
+        {"id": original["id"], "title": None, "owner_id": None},
+    ]
+    assert [ancestor["title"] for ancestor in client.get(f"/api/recipes/{first['id']}", headers=middle).json()["lineage"]] == ["Focaccia"]
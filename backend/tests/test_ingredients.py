@@ -0,0 +1,23 @@
+"""Recipes resolve ingredient and translation names through the normalized_name columns."""
+from backend.tests.conftest import create_recipe
+
+def create_ingredient(client, headers, name: str, translation: str):
+    ingredient = client.post("/api/ingredients", headers=headers, json={"name": name, "language": "de"})
+    assert ingredient.status_code == 200, ingredient.text
+    ingredient_id = ingredient.json()["id"]
+    response = client.post(
+        f"/api/ingredients/{ingredient_id}/translations", headers=headers, json={"name": translation, "language": "fr"}
+    )
+    assert response.status_code == 200, response.text
+
+def test_recipe_ingredients_resolve_by_normalized_name(client, auth_headers):
+    create_ingredient(client, auth_headers, " Äpfel Boskoop ", "Pommes Boskoop")
+    create_ingredient(client, auth_headers, "Birnen", "Poires Williams")
+
+    # SQL lower() would only fold the ASCII letters of these names
+    recipe = create_recipe(client, auth_headers, "Apfelkuchen", ingredients=[
+        {"name": "ÄPFEL BOSKOOP", "quantity": 3},
+        {"name": "  poires williams", "quantity": 2},
+    ])
+
+    assert [ingredient["name"] for ingredient in recipe["ingredients"]] == [" Äpfel Boskoop ", "Birnen"]
@@ -0,0 +1,15 @@
+"""Pool metrics cover the async engine that serves most reads, not only the sync one."""
+
+def test_health_reports_both_pools(client, auth_headers):
+    before = client.get("/health/db").json()
+    assert client.get("/api/recipes/summary", headers=auth_headers).status_code == 200
+    after = client.get("/health/db").json()
+
+    assert set(after) == {"sync", "async"}
+    assert after["async"]["checkouts"] > before["async"]["checkouts"]
+
+def test_metrics_label_the_pools_by_engine(client):
+    metrics = client.get("/metrics").text
+
+    assert 'db_pool_checkouts_total{engine="sync"}' in metrics
+    assert 'db_pool_checkouts_total{engine="async"}' in metrics
@@ -0,0 +1,29 @@
+"""Lines of imported files are read with bounded memory, however long they are."""
+import io
+import json
+import zipfile
+
+from backend.app.services import recipe_import
+from backend.app.services.recipe_import import numbered_lines
+
+def test_numbered_lines_cut_off_long_lines(monkeypatch):
+    monkeypatch.setattr(recipe_import, "MAX_LINE_BYTES", 8)
+    file = io.BytesIO(b"short\n" + b"x" * 100 + b"\n12345678\nlast")
+
+    assert list(numbered_lines(file)) == [(1, b"short"), (2, b"x" * 9), (3, b"12345678"), (4, b"last")]
+
+def test_zip_import_reports_long_lines_and_imports_the_rest(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(recipe_import, "MAX_LINE_BYTES", 1024)
+    recipe = {"title": "Zipped", "ingredients": [{"name": "flour", "quantity": 100}], "servings": 2, "instructions": "Bake."}
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zip_file:
+        zip_file.writestr("recipes.jsonl", b"x" * 100_000 + b"\n" + json.dumps(recipe).encode() + b"\n")
+
+    response = client.post(
+        "/api/recipes/import", headers={**auth_headers, "Content-Type": "application/zip"}, content=archive.getvalue()
+    )
+
+    assert response.status_code == 200, response.text
+    result = response.json()
+    assert result["imported"] == 1
+    assert result["errors"] == [{"line": 1, "error": "Line is longer than 1024 bytes"}]
@@ -0,0 +1,36 @@
+"""The number of SQL statements of the recipe listings must not grow with the number of recipes."""
+import pytest
+
+from backend.tests.conftest import StatementCounter, create_recipe
+
+def count_statements(client, headers, url: str) -> int:
+    with StatementCounter() as counter:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+    return counter.count
+
+@pytest.mark.parametrize("url", ["/api/recipes", "/api/recipes?limit=50", "/api/recipes/summary"])
+def test_recipe_listing_runs_a_constant_number_of_statements(client, auth_headers, url):
+    first = create_recipe(client, auth_headers, "Recipe 0")
+    # Warm up the per-user caches so that both measurements see the same state
+    client.get(url, headers=auth_headers)
+    few = count_statements(client, auth_headers, url)
+
+    for i in range(1, 20):
+        create_recipe(client, auth_headers, f"Recipe {i}")
+    # Forks add fork counts and lineage to the listing
+    fork = client.post(f"/api/recipes/{first['id']}/fork", headers=auth_headers)
+    assert fork.status_code == 201, fork.text
+    many = count_statements(client, auth_headers, url)
+
+    assert many == few
+
+def test_recipe_listing_returns_ingredients_and_forks(client, auth_headers):
+    original = create_recipe(client, auth_headers, "Original")
+    fork = client.post(f"/api/recipes/{original['id']}/fork", headers=auth_headers).json()
+
+    recipes = {recipe["id"]: recipe for recipe in client.get("/api/recipes", headers=auth_headers).json()}
+
+    assert [ingredient["name"] for ingredient in recipes[fork["id"]]["ingredients"]] == ["Flour", "Sugar"]
+    assert recipes[original["id"]]["fork_count"] == 1
+    assert [ancestor["id"] for ancestor in recipes[fork["id"]]["lineage"]] == [original["id"]]
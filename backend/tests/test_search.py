@@ -0,0 +1,40 @@
+"""Recipe search is scoped to the owner, pages stably and follows ingredient translations."""
+from backend.app.services.search import search_reindexer
+from backend.tests.conftest import create_recipe, register
+
+def search(client, headers, q: str, **params) -> dict:
+    response = client.get("/api/recipes/search", headers=headers, params={"q": q, **params})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_search_only_returns_own_recipes(client, auth_headers):
+    own = create_recipe(client, auth_headers, "Quorn walnut loaf")
+    create_recipe(client, register(client), "Quorn walnut cake")
+
+    assert [item["id"] for item in search(client, auth_headers, "quorn waln")["items"]] == [own["id"]]
+
+def test_search_pages_equal_scores_without_repeating(client, auth_headers):
+    created = [create_recipe(client, auth_headers, "Plain xylophone buns")["id"] for _ in range(5)]
+
+    seen, offset = [], 0
+    while offset is not None:
+        page = search(client, auth_headers, "xylo", limit=2, offset=offset)
+        seen.extend(item["id"] for item in page["items"])
+        offset = page["next_offset"]
+
+    assert seen == sorted(created, reverse=True)
+
+def test_search_finds_recipes_by_translations_added_later(client, auth_headers):
+    ingredient = client.post("/api/ingredients", headers=auth_headers, json={"name": "Quandong", "language": "en"})
+    assert ingredient.status_code == 200, ingredient.text
+    recipe = create_recipe(client, auth_headers, "Bush tart", ingredients=[{"name": "Quandong", "quantity": 3}])
+
+    translation = client.post(
+        f"/api/ingredients/{ingredient.json()['id']}/translations",
+        headers=auth_headers,
+        json={"name": "Wüstenpfirsich", "language": "de"}
+    )
+    assert translation.status_code == 200, translation.text
+    search_reindexer.run_pending()
+
+    assert [item["id"] for item in search(client, auth_headers, "wustenpf")["items"]] == [recipe["id"]]
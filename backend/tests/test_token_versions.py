@@ -0,0 +1,28 @@
+"""The token version cache is bounded, expires entries and revocation takes effect at once."""
+from backend.app import utils
+from backend.app.utils import TokenVersionCache
+
+def test_cache_evicts_the_least_recently_used_user():
+    cache = TokenVersionCache(max_size=2, ttl_seconds=60)
+    cache.put(1, 0)
+    cache.put(2, 0)
+    cache.get(1)
+    cache.put(3, 0)
+
+    assert cache.get(2) is utils._MISSING
+    assert cache.get(1) == 0
+    assert cache.get(3) == 0
+
+def test_cache_drops_expired_entries(monkeypatch):
+    cache = TokenVersionCache(max_size=2, ttl_seconds=60)
+    cache.put(1, 4)
+    monkeypatch.setattr(utils.time, "monotonic", lambda: float("inf"))
+
+    assert cache.get(1) is utils._MISSING
+
+def test_revoked_tokens_are_rejected(client, auth_headers):
+    assert client.get("/api/recipes/summary", headers=auth_headers).status_code == 200
+
+    assert client.post("/api/auth/revoke", headers=auth_headers).status_code == 204
+
+    assert client.get("/api/recipes/summary", headers=auth_headers).status_code == 401
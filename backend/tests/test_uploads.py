@@ -0,0 +1,59 @@
+"""Uploaded files are staged and hashed while the body streams in, within the upload limits."""
+import hashlib
+import json
+import os
+
+import pytest
+
+from backend.app.services import uploads
+from backend.tests.conftest import DEFAULT_INGREDIENTS
+
+IMAGE = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 64
+
+def post_recipe(client, headers, files, ingredients=None):
+    return client.post("/api/recipes", headers=headers, files=files, data={
+        "title": "Uploaded",
+        "ingredients": json.dumps(ingredients or DEFAULT_INGREDIENTS),
+        "instructions": "Mix and bake.",
+        "servings": "4",
+        "servings_unit": "NUMBER",
+    })
+
+def staging_files():
+    return os.listdir(uploads.STAGING_DIR) if os.path.isdir(uploads.STAGING_DIR) else []
+
+def test_upload_is_stored_under_its_hash(client, auth_headers):
+    response = post_recipe(client, auth_headers, {"thumbnail": ("cake.png", IMAGE, "image/png")})
+
+    assert response.status_code == 201, response.text
+    digest = hashlib.sha256(IMAGE).hexdigest()
+    assert response.json()["thumbnail_url"] == f"/uploads/{digest[:2]}/{digest}.png"
+    with open(os.path.join(uploads.UPLOADS_DIR, digest[:2], f"{digest}.png"), "rb") as file:
+        assert file.read() == IMAGE
+    assert staging_files() == []
+
+def test_file_over_the_limit_is_rejected_while_streaming(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(uploads, "MAX_UPLOAD_BYTES", len(IMAGE) - 1)
+
+    response = post_recipe(client, auth_headers, {"thumbnail": ("cake.png", IMAGE, "image/png")})
+
+    assert response.status_code == 413, response.text
+    assert staging_files() == []
+
+def test_request_over_the_limit_is_rejected_by_content_length(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(uploads, "MAX_REQUEST_BODY_BYTES", 1024)
+
+    response = post_recipe(client, auth_headers, {"thumbnail": ("cake.png", IMAGE, "image/png")})
+
+    assert response.status_code == 413, response.text
+    assert staging_files() == []
+
+@pytest.mark.parametrize("files", [
+    {"thumbnail": ("cake.png", IMAGE, "image/png")},
+    [("images", ("a.png", IMAGE, "image/png")), ("images", ("b.png", IMAGE[::-1], "image/png"))],
+])
+def test_staged_files_are_removed_when_the_recipe_is_rejected(client, auth_headers, files):
+    response = post_recipe(client, auth_headers, files, ingredients=[{"name": "no such ingredient"}])
+
+    assert response.status_code == 400, response.text
+    assert staging_files() == []